@@ -1,100 +1,385 @@
 import pyttsx3
+import time
+import heapq
 import threading
+import itertools
 import logging
-from typing import Optional
+from collections import deque
+from typing import Dict, Iterable, Optional, Sequence
 from app.config import Config
+from app.speech_cache import PhraseClipCache, ClipPlayer
+from app.metrics import REGISTRY
 
 logger = logging.getLogger(__name__)
 
+# Speech priorities: lower values are more urgent
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Phrase pieces rendered per idle pass, so synthesis never delays speech for long
+CLIPS_PER_IDLE_PASS = 4
+# Minimum seconds between warnings about announcements over the safety latency budget
+LATENCY_WARNING_INTERVAL = 5.0
+
+class SpeechRequest:
+    """A queued utterance"""
+
+    def __init__(self, text: str, priority: int, enqueued_at: float, expires_at: float,
+                 parts: Optional[Sequence[str]] = None, capture_time: Optional[float] = None):
+        self.text = text
+        self.parts = tuple(parts) if parts else None
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.expires_at = expires_at
+        self.capture_time = capture_time  # time.time() of the frame that prompted it
+
 class AudioManager:
-    """Text-to-speech manager for audio announcements"""
-    
+    """
+    Text-to-speech manager for audio announcements
+
+    A single long-lived worker thread owns the pyttsx3 engine and speaks
+    requests from a priority queue. Duplicate pending messages are coalesced,
+    messages older than config.speech_max_age are dropped unspoken, and an
+    urgent message cuts off lower-priority speech that is in progress.
+
+    With config.phrase_cache enabled and a playback library available,
+    announcements whose pieces have been rendered before are played from a
+    PhraseClipCache; missing pieces are spoken live once and rendered while
+    the queue is idle.
+
+    Announcements can carry the capture time of the frame that prompted
+    them; the time from capture until speech starts is tracked against
+    config.safety_latency_budget_ms and a warning is logged when it is over.
+    """
+
     def __init__(self, config: Config):
         self.config = config
         self.engine = None
-        self.is_speaking = False
         self.speech_thread = None
+        self._queue = []
+        self._pending: Dict[str, SpeechRequest] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._speaking = threading.Event()
+        self._stop = threading.Event()
+        self._current: Optional[SpeechRequest] = None
+        self._started = False
+        self._latencies = deque(maxlen=200)
+        self._capture_latencies = deque(maxlen=200)
+        self._last_latency_warning = 0.0
+        self._counters = {'spoken': 0, 'coalesced': 0, 'expired': 0, 'preempted': 0, 'evicted': 0,
+                          'clip_hits': 0, 'clip_misses': 0, 'over_budget': 0}
+        self.clip_cache: Optional[PhraseClipCache] = None
+        self.clip_player: Optional[ClipPlayer] = None
+        self._clips_to_render = deque()
         self._initialize_engine()
-        
+
+    @property
+    def is_speaking(self) -> bool:
+        """True while the worker is speaking an utterance"""
+        return self._speaking.is_set()
+
     def _initialize_engine(self):
-        """Initialize the text-to-speech engine"""
+        """Start the speech worker and wait until it has initialized the engine"""
+        ready = threading.Event()
+        errors = []
+        self.speech_thread = threading.Thread(
+            target=self._speech_worker, args=(ready, errors), name="visora-speech", daemon=True
+        )
+        self.speech_thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+
+    def _create_engine(self):
+        """Initialize the text-to-speech engine (runs on the worker thread)"""
         try:
             logger.info("Initializing text-to-speech engine")
             self.engine = pyttsx3.init()
-            
+
             # Configure voice properties
             voices = self.engine.getProperty('voices')
             if voices:
                 self.engine.setProperty('voice', voices[0].id)  # Use default voice
-                
+
             self.engine.setProperty('rate', 200)  # Speed of speech
             self.engine.setProperty('volume', 0.9)  # Volume level
-            
+
+            if self.config.phrase_cache:
+                self._initialize_clip_cache(voices[0].id if voices else "")
+
+            try:
+                self.engine.connect('started-utterance', self._on_started)
+            except Exception as e:
+                logger.debug(f"Speech start callbacks unavailable: {e}")
+
             logger.info("Text-to-speech engine initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize text-to-speech engine: {e}")
             raise
-            
-    def speak_async(self, text: str) -> None:
-        """
-        Speak text asynchronously to avoid blocking
-        
-        Args:
-            text: Text to be spoken
-        """
-        if self.engine is None:
-            logger.error("Text-to-speech engine not initialized")
+
+    def _initialize_clip_cache(self, voice_id: str):
+        """Set up cached clip playback if an audio player is available"""
+        player = ClipPlayer()
+        if not player.available:
             return
-            
-        if self.is_speaking:
-            logger.debug("Already speaking, skipping: %s", text)
+        try:
+            # Clips rendered with another voice or rate must not be reused
+            signature = f"{voice_id}|{self.engine.getProperty('rate')}"
+            self.clip_cache = PhraseClipCache(self.config, voice_signature=signature)
+            self.clip_player = player
+            logger.info(f"Phrase clip cache enabled in {self.config.phrase_cache_dir}")
+        except OSError as e:
+            logger.warning(f"Phrase clip cache disabled: {e}")
+
+    def _speech_worker(self, ready: threading.Event, errors: list):
+        """Own the engine and speak queued requests until shutdown"""
+        try:
+            self._create_engine()
+        except Exception as e:
+            errors.append(e)
+            ready.set()
             return
-            
-        def _speak():
+        ready.set()
+
+        while not self._stop.is_set():
+            request = self._next_request()
+            if request is None:
+                self._render_pending_clips()
+                continue
+            if time.perf_counter() > request.expires_at:
+                self._counters['expired'] += 1
+                logger.debug("Dropping stale speech: %s", request.text)
+                continue
+
+            self._current = request
+            self._started = False
+            self._speaking.set()
             try:
-                self.is_speaking = True
-                logger.debug("Speaking: %s", text)
-                self.engine.say(text)
-                self.engine.runAndWait()
+                clip = self.clip_cache.compose(request.parts) if self.clip_cache and request.parts else None
+                if clip is not None:
+                    logger.debug("Playing cached clip: %s", request.text)
+                    self._counters['clip_hits'] += 1
+                    self._record_latency(request)
+                    self.clip_player.play(clip)
+                else:
+                    logger.debug("Speaking: %s", request.text)
+                    if self.clip_cache and request.parts:
+                        self._counters['clip_misses'] += 1
+                        self._clips_to_render.extend(self.clip_cache.missing(request.parts))
+                    self.engine.say(request.text)
+                    self.engine.runAndWait()
+                self._counters['spoken'] += 1
             except Exception as e:
                 logger.error(f"Failed to speak: {e}")
             finally:
-                self.is_speaking = False
-                
-        # Run in a separate thread to avoid blocking
+                if not self._started:
+                    self._record_latency(request)
+                self._current = None
+                self._speaking.clear()
+
+    def _render_pending_clips(self):
+        """Render a few queued phrase pieces while there is nothing to say"""
+        if self.clip_cache is None or not self._clips_to_render:
+            return
+        pieces = []
+        while self._clips_to_render and len(pieces) < CLIPS_PER_IDLE_PASS:
+            pieces.append(self._clips_to_render.popleft())
         try:
-            if self.speech_thread and self.speech_thread.is_alive():
-                # If there's an active thread, wait for it to finish or skip
-                logger.debug("Speech thread is active, skipping new speech request")
+            rendered = self.clip_cache.synthesize(self.engine, pieces)
+            if rendered:
+                logger.debug(f"Rendered {rendered} phrase clips")
+        except Exception as e:
+            logger.warning(f"Failed to render phrase clips: {e}")
+
+    def _next_request(self) -> Optional[SpeechRequest]:
+        """Pop the most urgent, oldest request, waiting briefly if the queue is empty"""
+        with self._condition:
+            if not self._queue:
+                self._condition.wait(timeout=0.2)
+            if not self._queue:
+                return None
+            _, _, request = heapq.heappop(self._queue)
+            self._pending.pop(request.text, None)
+            return request
+
+    def _on_started(self, name=None):
+        """Engine callback fired when an utterance starts playing"""
+        if self._current is not None and not self._started:
+            self._record_latency(self._current)
+
+    def _record_latency(self, request: SpeechRequest):
+        self._started = True
+        latency = time.perf_counter() - request.enqueued_at
+        self._latencies.append(latency)
+        REGISTRY.observe("speech_start_latency", latency)
+        if request.capture_time is not None:
+            self._record_capture_latency(time.time() - request.capture_time, request.text)
+
+    def _record_capture_latency(self, latency: float, text: str):
+        """Track capture-to-announcement latency and warn when it exceeds the safety budget"""
+        self._capture_latencies.append(latency)
+        REGISTRY.observe("capture_to_announcement", latency)
+        budget = self.config.safety_latency_budget_ms / 1000
+        if budget > 0 and latency > budget:
+            self._counters['over_budget'] += 1
+            now = time.monotonic()
+            if now - self._last_latency_warning >= LATENCY_WARNING_INTERVAL:
+                self._last_latency_warning = now
+                logger.warning(
+                    f"Announcement '{text}' started {latency * 1000:.0f} ms after capture, over the "
+                    f"{self.config.safety_latency_budget_ms:.0f} ms safety budget "
+                    f"({self._counters['over_budget']} over budget so far)"
+                )
+
+    def speak_async(self, text: str, priority: int = PRIORITY_NORMAL,
+                    parts: Optional[Sequence[str]] = None, capture_time: Optional[float] = None) -> None:
+        """
+        Queue text for the speech worker without blocking
+
+        Args:
+            text: Text to be spoken
+            priority: PRIORITY_URGENT, PRIORITY_NORMAL or PRIORITY_LOW
+            parts: Phrase pieces that can be played from cached clips instead
+            capture_time: time.time() at which the prompting frame was captured
+        """
+        if self.engine is None:
+            logger.error("Text-to-speech engine not initialized")
+            return
+
+        with REGISTRY.timer("speak_enqueue"):
+            self._enqueue(text, priority, parts, capture_time)
+
+    def _enqueue(self, text: str, priority: int, parts: Optional[Sequence[str]],
+                 capture_time: Optional[float] = None):
+        now = time.perf_counter()
+        with self._condition:
+            current = self._current
+            if text in self._pending or (current is not None and current.text == text):
+                self._counters['coalesced'] += 1
+                logger.debug("Already queued or speaking, coalescing: %s", text)
                 return
-                
-            self.speech_thread = threading.Thread(target=_speak, daemon=True)
-            self.speech_thread.start()
-        except RuntimeError as e:
-            if "threads can only be started once" in str(e):
-                # Create a new thread instance
-                self.speech_thread = threading.Thread(target=_speak, daemon=True)
-                self.speech_thread.start()
-            else:
-                logger.error(f"Failed to start speech thread: {e}")
-        
-    def announce_object_direction(self, label: str, direction: str, distance: str) -> None:
+
+            request = SpeechRequest(text, priority, now, now + self.config.speech_max_age, parts, capture_time)
+            heapq.heappush(self._queue, (priority, next(self._sequence), request))
+            self._pending[text] = request
+
+            # Keep the queue bounded by evicting the least urgent, newest entry
+            if len(self._queue) > self.config.speech_queue_size:
+                victim = max(self._queue)
+                self._queue.remove(victim)
+                heapq.heapify(self._queue)
+                self._pending.pop(victim[2].text, None)
+                self._counters['evicted'] += 1
+
+            self._condition.notify()
+
+        # Urgent messages cut off less important speech
+        if current is not None and priority < current.priority:
+            self._counters['preempted'] += 1
+            logger.debug("Preempting '%s' for '%s'", current.text, text)
+            self._interrupt()
+
+    def _interrupt(self):
+        """Cut off the utterance or clip that is playing"""
+        try:
+            self.engine.stop()
+            if self.clip_player is not None:
+                self.clip_player.stop()
+        except Exception as e:
+            logger.error(f"Failed to interrupt speech: {e}")
+
+    def announce_object_direction(self, label: str, direction: str, distance: str,
+                                  capture_time: Optional[float] = None) -> None:
         """
         Announce object with direction and distance
-        
+
         Args:
             label: Object label
             direction: Direction of the object
             distance: Distance descriptor
+            capture_time: time.time() at which the frame was captured
         """
         announcement = f"{label} detected at {direction}, {distance}"
-        self.speak_async(announcement)
-        
-    def announce_navigation(self, instruction: str) -> None:
+        if direction == "center" or distance == "very close":
+            priority = PRIORITY_URGENT
+        elif distance == "far away":
+            priority = PRIORITY_LOW
+        else:
+            priority = PRIORITY_NORMAL
+        self.speak_async(announcement, priority, parts=(label, "detected at", direction, distance),
+                         capture_time=capture_time)
+
+    def announce_navigation(self, instruction: str, capture_time: Optional[float] = None) -> None:
         """
         Announce navigation instruction
-        
+
         Args:
             instruction: Navigation instruction
+            capture_time: time.time() at which the frame was captured
+        """
+        priority = PRIORITY_URGENT if "directly ahead" in instruction else PRIORITY_NORMAL
+        self.speak_async(instruction, priority, parts=(instruction,), capture_time=capture_time)
+
+    def prewarm_phrases(self, labels: Iterable[str], directions: Iterable[str], distances: Iterable[str]) -> int:
+        """
+        Queue the announcement vocabulary for rendering into cached clips
+
+        Pieces are rendered in the background while no speech is queued.
+
+        Args:
+            labels: Object labels the detector can report (list or id -> name dict)
+            directions: Direction labels
+            distances: Distance descriptors
+
+        Returns:
+            Number of pieces queued for rendering
+        """
+        if self.clip_cache is None:
+            return 0
+        if isinstance(labels, dict):
+            labels = labels.values()
+        pieces = self.clip_cache.missing(list(dict.fromkeys(
+            ["detected at", *labels, *directions, *distances]
+        )))
+        self._clips_to_render.extend(pieces)
+        logger.info(f"Queued {len(pieces)} phrase clips for rendering")
+        return len(pieces)
+
+    def speech_stats(self) -> Dict:
         """
-        self.speak_async(instruction)
\ No newline at end of file
+        Get speech queue statistics
+
+        Returns:
+            Dictionary with counters, enqueue-to-speech and capture-to-speech
+            latency percentiles in ms
+        """
+        def _percentile(values, p):
+            if not values:
+                return 0.0
+            return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+        latencies = sorted(self._latencies)
+        capture_latencies = sorted(self._capture_latencies)
+        stats = dict(self._counters)
+        stats.update({
+            'queued': len(self._queue),
+            'latency_p50_ms': _percentile(latencies, 0.50),
+            'latency_p95_ms': _percentile(latencies, 0.95),
+            'latency_max_ms': latencies[-1] * 1000 if latencies else 0.0,
+            'capture_latency_p50_ms': _percentile(capture_latencies, 0.50),
+            'capture_latency_p95_ms': _percentile(capture_latencies, 0.95),
+            'capture_latency_max_ms': capture_latencies[-1] * 1000 if capture_latencies else 0.0
+        })
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop the speech worker"""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self.engine is not None and self.is_speaking:
+            self._interrupt()
+        if self.speech_thread is not None:
+            self.speech_thread.join(timeout=2.0)
@@ -0,0 +1,350 @@
+import os
+import ast
+import json
+import shutil
+import logging
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from app.config import Config
+from app.detections import COCO_CLASS_NAMES
+
+logger = logging.getLogger(__name__)
+
+# Raw per-image output shared by every backend: (xyxy, confidences, class_ids)
+RawDetections = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+MAX_DETECTIONS = 300
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+class InferenceBackend:
+    """Base class for detector inference backends"""
+
+    name = "base"
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.class_names = COCO_CLASS_NAMES
+
+    def predict(self, frames: List[np.ndarray], conf: float, iou: float) -> List[RawDetections]:
+        """
+        Run detection on a list of BGR frames
+
+        Args:
+            frames: Input image frames
+            conf: Confidence threshold
+            iou: IoU threshold for non-maximum suppression
+
+        Returns:
+            One (xyxy, confidences, class_ids) tuple of NumPy arrays per frame
+        """
+        raise NotImplementedError
+
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch eager inference through the ultralytics YOLO wrapper"""
+
+    name = "torch"
+
+    def __init__(self, config: Config, model_path: Optional[str] = None):
+        super().__init__(config)
+        from ultralytics import YOLO
+        if self.config.inference_threads > 0:
+            import torch
+            torch.set_num_threads(self.config.inference_threads)
+        self.model = YOLO(model_path or self.config.model_name)
+        if hasattr(self.model, 'names'):
+            self.class_names = self.model.names
+
+    def predict(self, frames: List[np.ndarray], conf: float, iou: float) -> List[RawDetections]:
+        results = self.model(list(frames), conf=conf, iou=iou, verbose=False)
+        raw = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                raw.append(_empty_raw())
+                continue
+            # One device-to-host transfer per tensor instead of per box
+            raw.append((
+                boxes.xyxy.cpu().numpy(),
+                boxes.conf.cpu().numpy(),
+                boxes.cls.cpu().numpy()
+            ))
+        return raw
+
+
+class _ExportedYoloBackend(InferenceBackend):
+    """Shared letterbox pre-processing and YOLOv8 head decoding for exported models"""
+
+    def __init__(self, config: Config):
+        super().__init__(config)
+        self.image_size = self.config.inference_image_size
+
+    def _preprocess(self, frame: np.ndarray) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        return letterbox(frame, self.image_size)
+
+    def _postprocess(self, output: np.ndarray, scale: float, pad: Tuple[int, int],
+                     shape: Tuple[int, int], conf: float, iou: float) -> RawDetections:
+        """Decode one (4 + classes, anchors) YOLOv8 output into boxes in frame pixels"""
+        predictions = output.T
+        class_scores = predictions[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        confidences = class_scores[np.arange(len(class_ids)), class_ids]
+        keep = confidences >= conf
+        if not keep.any():
+            return _empty_raw()
+        predictions, class_ids, confidences = predictions[keep], class_ids[keep], confidences[keep]
+
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad[0]) / scale
+        xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad[1]) / scale
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, shape[0])
+
+        keep = class_aware_nms(xyxy, confidences, class_ids, conf, iou)
+        return xyxy[keep], confidences[keep], class_ids[keep]
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        """Run the network on a (B, 3, S, S) tensor and return (B, 4 + classes, anchors)"""
+        raise NotImplementedError
+
+    def predict(self, frames: List[np.ndarray], conf: float, iou: float) -> List[RawDetections]:
+        prepared = [self._preprocess(frame) for frame in frames]
+        batch = np.stack([tensor for tensor, _, _ in prepared])
+        outputs = self._run(batch)
+        return [
+            self._postprocess(outputs[i], scale, pad, frames[i].shape[:2], conf, iou)
+            for i, (_, scale, pad) in enumerate(prepared)
+        ]
+
+
+class OnnxRuntimeBackend(_ExportedYoloBackend):
+    """Exported ONNX model run on onnxruntime with configurable thread pools"""
+
+    name = "onnx"
+
+    def __init__(self, config: Config, model_path: Optional[str] = None):
+        super().__init__(config)
+        import onnxruntime as ort
+        if model_path is None:
+            if self.config.quantization:
+                from app.quantization import quantize_model
+                model_path = quantize_model(config)
+            else:
+                model_path = export_model(config, "onnx")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.config.inference_threads > 0:
+            options.intra_op_num_threads = self.config.inference_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.fixed_batch = batch_dim if isinstance(batch_dim, int) else None
+        self.class_names = load_class_names(model_path, self.session.get_modelmeta().custom_metadata_map)
+        logger.info(f"ONNX Runtime session ready ({model_path}, threads={self.config.inference_threads or 'default'})")
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        if self.fixed_batch == 1 and len(batch) > 1:
+            return np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0]
+                                   for i in range(len(batch))])
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoBackend(_ExportedYoloBackend):
+    """Exported OpenVINO IR model compiled for the CPU plugin"""
+
+    name = "openvino"
+
+    def __init__(self, config: Config, model_path: Optional[str] = None):
+        super().__init__(config)
+        import openvino as ov
+        model_path = model_path or export_model(config, "openvino")
+
+        core = ov.Core()
+        properties = {}
+        if self.config.inference_threads > 0:
+            properties["INFERENCE_NUM_THREADS"] = self.config.inference_threads
+        self.compiled = core.compile_model(model_path, "CPU", properties)
+        self.fixed_batch = None
+        batch_dim = self.compiled.input(0).get_partial_shape()[0]
+        if batch_dim.is_static:
+            self.fixed_batch = batch_dim.get_length()
+        self.class_names = load_class_names(model_path)
+        logger.info(f"OpenVINO model compiled ({model_path}, threads={self.config.inference_threads or 'default'})")
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        if self.fixed_batch == 1 and len(batch) > 1:
+            return np.concatenate([self.compiled(batch[i:i + 1])[0] for i in range(len(batch))])
+        return self.compiled(batch)[0]
+
+
+def letterbox(frame: np.ndarray, image_size: int) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+    """
+    Letterbox a BGR frame into a normalized CHW float32 RGB tensor
+
+    Args:
+        frame: Input BGR frame
+        image_size: Square network input size
+
+    Returns:
+        Tuple of (tensor, scale, (pad_x, pad_y)) needed to map boxes back
+    """
+    height, width = frame.shape[:2]
+    scale = min(image_size / height, image_size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    pad_x, pad_y = (image_size - new_w) // 2, (image_size - new_h) // 2
+
+    canvas = np.full((image_size, image_size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+        frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+    )
+    tensor = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)
+    return np.ascontiguousarray(tensor, dtype=np.float32) / 255.0, scale, (pad_x, pad_y)
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVinoBackend.name: OpenVinoBackend
+}
+
+
+def create_backend(config: Config) -> InferenceBackend:
+    """
+    Create the inference backend selected by config.inference_backend
+
+    Args:
+        config: Application configuration
+
+    Returns:
+        Initialized inference backend
+    """
+    backend_cls = BACKENDS.get(config.inference_backend)
+    if backend_cls is None:
+        raise ValueError(
+            f"Unknown inference backend '{config.inference_backend}', expected one of {sorted(BACKENDS)}"
+        )
+    logger.info(f"Using {backend_cls.name} inference backend")
+    return backend_cls(config)
+
+
+def cached_artifact_path(config: Config, export_format: str, suffix: str = "") -> str:
+    """
+    Get the cache location for an exported copy of config.model_name
+
+    Args:
+        config: Application configuration
+        export_format: Export format ("onnx" or "openvino")
+        suffix: Extra tag distinguishing variants such as quantized models
+
+    Returns:
+        Path of the model file inside the cache directory
+    """
+    stem = os.path.splitext(os.path.basename(config.model_name))[0]
+    name = f"{stem}-{config.inference_image_size}{suffix}"
+    if export_format == "openvino":
+        return os.path.join(config.model_cache_dir, f"{name}_openvino_model", f"{stem}.xml")
+    return os.path.join(config.model_cache_dir, f"{name}.onnx")
+
+
+def _is_fresh(artifact: str, source: str) -> bool:
+    if not os.path.exists(artifact):
+        return False
+    # Weights downloaded by name (e.g. "yolov8n.pt" not on disk) cannot be outdated
+    return not os.path.exists(source) or os.path.getmtime(artifact) >= os.path.getmtime(source)
+
+
+def export_model(config: Config, export_format: str) -> str:
+    """
+    Export config.model_name once and reuse the cached artifact on later starts
+
+    Args:
+        config: Application configuration
+        export_format: Export format ("onnx" or "openvino")
+
+    Returns:
+        Path of the exported model file
+    """
+    target = cached_artifact_path(config, export_format)
+    if _is_fresh(target, config.model_name):
+        logger.info(f"Using cached {export_format} model: {target}")
+        return target
+
+    from ultralytics import YOLO
+    logger.info(f"Exporting {config.model_name} to {export_format} (one-time)")
+    model = YOLO(config.model_name)
+    exported = model.export(format=export_format, imgsz=config.inference_image_size, dynamic=True)
+
+    if export_format == "openvino":
+        target_dir = os.path.dirname(target)
+        if os.path.exists(target_dir):
+            shutil.rmtree(target_dir)
+        shutil.copytree(exported, target_dir)
+        xml_files = [f for f in os.listdir(target_dir) if f.endswith(".xml")]
+        if xml_files and xml_files[0] != os.path.basename(target):
+            os.replace(os.path.join(target_dir, xml_files[0]), target)
+            bin_name = os.path.splitext(xml_files[0])[0] + ".bin"
+            if os.path.exists(os.path.join(target_dir, bin_name)):
+                os.replace(os.path.join(target_dir, bin_name), os.path.splitext(target)[0] + ".bin")
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(exported, target)
+
+    save_class_names(target, model.names)
+    logger.info(f"Cached {export_format} model at {target}")
+    return target
+
+
+def save_class_names(model_path: str, class_names) -> None:
+    """Write the class names next to an exported model"""
+    if isinstance(class_names, dict):
+        class_names = [class_names[i] for i in sorted(class_names)]
+    with open(os.path.splitext(model_path)[0] + ".names.json", "w", encoding="utf-8") as f:
+        json.dump(list(class_names), f)
+
+
+def load_class_names(model_path: str, metadata: Optional[Dict[str, str]] = None):
+    """Read class names from the sidecar file or ultralytics export metadata"""
+    sidecar = os.path.splitext(model_path)[0] + ".names.json"
+    if os.path.exists(sidecar):
+        with open(sidecar, encoding="utf-8") as f:
+            return json.load(f)
+    if metadata and "names" in metadata:
+        try:
+            return ast.literal_eval(metadata["names"])
+        except (ValueError, SyntaxError):
+            logger.warning("Could not parse class names from model metadata")
+    return COCO_CLASS_NAMES
+
+
+def class_aware_nms(xyxy: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray,
+                    conf: float, iou: float) -> np.ndarray:
+    """
+    Per-class non-maximum suppression
+
+    Args:
+        xyxy: (N, 4) boxes in pixels
+        confidences: (N,) scores
+        class_ids: (N,) class ids
+        conf: Confidence threshold
+        iou: IoU threshold
+
+    Returns:
+        Indices of the kept boxes, highest score first
+    """
+    if len(xyxy) == 0:
+        return np.empty(0, dtype=np.int64)
+    # Offset boxes by class so boxes of different classes never overlap
+    offsets = class_ids.astype(np.float32)[:, None] * (float(xyxy.max()) + 1.0)
+    shifted = xyxy + offsets
+    xywh = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+    keep = cv2.dnn.NMSBoxes(xywh.tolist(), confidences.astype(float).tolist(), conf, iou, top_k=MAX_DETECTIONS)
+    return np.asarray(keep, dtype=np.int64).reshape(-1)
+
+
+def _empty_raw() -> RawDetections:
+    return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
@@ -0,0 +1,391 @@
+import os
+import copy
+import json
+import time
+import queue
+import threading
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+import cv2
+import numpy as np
+from app.config import Config
+from app.vision import ObjectDetector
+from app.navigation import NavigationAssistant
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".m4v", ".webm", ".mpg", ".mpeg"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+# Progress is saved after this many written batches
+PROGRESS_EVERY = 10
+
+
+def discover_sources(inputs: List[str]) -> List[str]:
+    """
+    Expand input paths into batch sources
+
+    Video files are sources on their own. A directory holding images is one
+    source whose frames are its images in name order; other directories are
+    searched for videos and image directories.
+
+    Args:
+        inputs: Video files, image files or directories
+
+    Returns:
+        Absolute source paths in a stable order
+    """
+    sources = []
+    for path in inputs:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            sources.append(path)
+            continue
+        if not os.path.isdir(path):
+            logger.warning(f"Skipping missing input: {path}")
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            if any(os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS for f in files):
+                sources.append(root)
+            sources.extend(
+                os.path.join(root, f) for f in sorted(files)
+                if os.path.splitext(f)[1].lower() in VIDEO_EXTENSIONS
+            )
+    return list(dict.fromkeys(sources))
+
+
+def read_frames(source: str, start: int = 0, stride: int = 1) -> Iterator[Tuple[int, Optional[float], np.ndarray]]:
+    """
+    Decode frames of one source
+
+    Args:
+        source: Video file, image file or image directory
+        start: First frame index to yield (earlier frames are skipped)
+        stride: Yield every Nth frame
+
+    Yields:
+        (frame_index, timestamp_ms or None, frame)
+    """
+    stride = max(1, stride)
+    if os.path.isdir(source) or os.path.splitext(source)[1].lower() in IMAGE_EXTENSIONS:
+        images = [source] if os.path.isfile(source) else sorted(
+            os.path.join(source, f) for f in os.listdir(source)
+            if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS
+        )
+        for index in range(start, len(images)):
+            if index % stride:
+                continue
+            frame = cv2.imread(images[index])
+            if frame is None:
+                logger.warning(f"Could not read image {images[index]}")
+                continue
+            yield index, None, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        logger.error(f"Could not open video {source}")
+        return
+    try:
+        index = 0
+        # grab() skips frames without decoding them
+        while index < start and cap.grab():
+            index += 1
+        while True:
+            if index % stride:
+                if not cap.grab():
+                    break
+                index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, cap.get(cv2.CAP_PROP_POS_MSEC), frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def probe_frame_shape(sources: List[str]) -> Tuple[int, int, int]:
+    """
+    Largest frame shape across sources, read from headers without decoding
+
+    Args:
+        sources: Source paths as returned by discover_sources
+
+    Returns:
+        (height, width, 3) covering every frame
+    """
+    from PIL import Image
+    height, width = 1, 1
+    for source in sources:
+        if os.path.isdir(source) or os.path.splitext(source)[1].lower() in IMAGE_EXTENSIONS:
+            images = [source] if os.path.isfile(source) else [
+                os.path.join(source, f) for f in os.listdir(source)
+                if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS
+            ]
+            for path in images:
+                try:
+                    with Image.open(path) as image:
+                        width, height = max(width, image.width), max(height, image.height)
+                except OSError:
+                    continue
+        else:
+            cap = cv2.VideoCapture(source)
+            width = max(width, int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+            height = max(height, int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            cap.release()
+    return height, width, 3
+
+
+class BatchProcessor:
+    """
+    Offline detection over recorded videos and image directories.
+
+    A decoder thread reads frames into batches of config.batch_size, a pool
+    of worker threads (each with its own ObjectDetector, so native inference
+    runs in parallel) processes them, and the writer appends results to a
+    JSONL file in input order. With config.batch_pool set to "processes" the
+    worker threads instead dispatch frames to a ProcessInferencePool, which
+    also parallelizes the Python post-processing. A progress file next to the output records
+    how far every source got, so an interrupted run resumes where it left
+    off.
+    """
+
+    def __init__(self, config: Config, output_path: Optional[str] = None, workers: Optional[int] = None,
+                 stride: Optional[int] = None):
+        self.config = config
+        self.output_path = output_path or config.batch_output
+        self.progress_path = f"{self.output_path}.progress.json"
+        self.workers = workers or config.batch_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.pool = None
+        self.stride = stride or config.batch_frame_stride
+        self.progress: Dict[str, Dict] = {}
+        self.stop_event = threading.Event()
+        self.frames_done = 0
+        self._errors = []
+
+    def _load_progress(self):
+        """Restore progress and cut the output back to the last saved point"""
+        if not os.path.exists(self.progress_path):
+            self.progress = {}
+            if os.path.exists(self.output_path):
+                logger.warning(f"{self.output_path} exists without progress; starting over")
+                open(self.output_path, "w").close()
+            return
+        with open(self.progress_path) as f:
+            saved = json.load(f)
+        output_bytes = saved.get("output_bytes", 0)
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) < output_bytes:
+            logger.warning(f"{self.output_path} is shorter than its saved progress; starting over")
+            self.progress = {}
+            open(self.output_path, "w").close()
+            return
+        self.progress = saved.get("sources", {})
+        # Anything written after the last progress save is redone
+        with open(self.output_path, "r+b") as f:
+            f.truncate(output_bytes)
+
+    def _save_progress(self, output_file):
+        output_file.flush()
+        os.fsync(output_file.fileno())
+        payload = {"output_bytes": output_file.tell(), "sources": self.progress}
+        temporary = f"{self.progress_path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(payload, f)
+        os.replace(temporary, self.progress_path)
+
+    def _decode(self, sources: List[str], jobs: queue.Queue):
+        """Decoder thread: group frames of each source into batches"""
+        sequence = 0
+        try:
+            for source in sources:
+                state = self.progress.get(source, {})
+                if state.get("complete"):
+                    continue
+                batch = []
+                for index, timestamp, frame in read_frames(source, state.get("next_frame", 0), self.stride):
+                    if self.stop_event.is_set():
+                        return
+                    batch.append((index, timestamp, frame))
+                    if len(batch) >= max(1, self.config.batch_size):
+                        jobs.put((sequence, source, batch, False))
+                        sequence += 1
+                        batch = []
+                # The last batch of a source marks it complete
+                jobs.put((sequence, source, batch, True))
+                sequence += 1
+        finally:
+            for _ in range(self.workers):
+                jobs.put(None)
+
+    def _work(self, detector: ObjectDetector, jobs: queue.Queue, results: queue.Queue):
+        """Worker thread: run batched inference and build output records"""
+        navigation_assistant = NavigationAssistant(self.config)
+        while True:
+            job = jobs.get()
+            if job is None:
+                results.put(None)
+                return
+            sequence, source, batch, last = job
+            records = []
+            try:
+                frames = [frame for _, _, frame in batch]
+                detections = detector.detect_batch_array(frames) if frames else []
+                for (index, timestamp, frame), found in zip(batch, detections):
+                    instruction = navigation_assistant.analyze(found, frame.shape[1], frame.shape[0]).instruction
+                    records.append({
+                        "source": source,
+                        "frame": index,
+                        "timestamp_ms": timestamp,
+                        "width": frame.shape[1],
+                        "height": frame.shape[0],
+                        "detections": found.to_list(),
+                        "instruction": instruction
+                    })
+            except Exception as e:
+                logger.error(f"Batch failed for {source}: {e}")
+                self._errors.append(e)
+                self.stop_event.set()
+            results.put((sequence, source, batch[-1][0] if batch else None, last, records))
+
+    def _create_detectors(self, sources: List[str]) -> List:
+        """One detector per worker, splitting the cores between them"""
+        if self.config.batch_pool == "processes":
+            from app.process_pool import ProcessInferencePool
+            self.pool = ProcessInferencePool(self.config, self.workers, probe_frame_shape(sources))
+            self.pool.start()
+            # Two dispatching threads per process keep every worker busy
+            return [self.pool] * (self.workers * 2)
+        worker_config = copy.copy(self.config)
+        if not worker_config.inference_threads:
+            worker_config.inference_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        return [ObjectDetector(worker_config) for _ in range(self.workers)]
+
+    def run(self, inputs: List[str]) -> Dict:
+        """
+        Process all inputs, resuming from earlier progress
+
+        Args:
+            inputs: Video files, image files or directories
+
+        Returns:
+            Summary with frame count, elapsed time and throughput
+        """
+        sources = discover_sources(inputs)
+        if not sources:
+            raise ValueError("No videos or images found in the given inputs")
+        self._load_progress()
+        pending = [s for s in sources if not self.progress.get(s, {}).get("complete")]
+        logger.info(f"Batch run: {len(pending)}/{len(sources)} sources to process with {self.workers} workers")
+
+        start = time.perf_counter()
+        if pending:
+            try:
+                self._process(pending)
+            finally:
+                if self.pool is not None:
+                    self.pool.close()
+                    self.pool = None
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            "sources": len(sources),
+            "frames": self.frames_done,
+            "elapsed_s": elapsed,
+            "fps": self.frames_done / elapsed if elapsed > 0 else 0.0,
+            "output": self.output_path
+        }
+        logger.info(f"Batch run processed {summary['frames']} frames in {elapsed:.1f}s ({summary['fps']:.1f} fps)")
+        return summary
+
+    def _process(self, pending: List[str]):
+        """Run the decoder, workers and ordered writer over the pending sources"""
+        detectors = self._create_detectors(pending)
+        self.workers = len(detectors)
+        jobs = queue.Queue(maxsize=self.workers * 2)
+        results = queue.Queue()
+        threads = [threading.Thread(target=self._decode, args=(pending, jobs), name="visora-decode", daemon=True)]
+        for i, detector in enumerate(detectors):
+            threads.append(threading.Thread(
+                target=self._work, args=(detector, jobs, results), name=f"visora-batch{i}", daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+
+        finished_workers = 0
+        buffered = {}
+        next_sequence = 0
+        written = 0
+        with open(self.output_path, "a", encoding="utf-8") as output:
+            while finished_workers < self.workers:
+                item = results.get()
+                if item is None:
+                    finished_workers += 1
+                    continue
+                buffered[item[0]] = item
+                # Write in decode order so every source's frames stay sorted
+                while next_sequence in buffered and not self.stop_event.is_set():
+                    _, source, last_index, last, records = buffered.pop(next_sequence)
+                    for record in records:
+                        output.write(json.dumps(record) + "\n")
+                    state = self.progress.setdefault(source, {"next_frame": 0, "complete": False})
+                    if last_index is not None:
+                        state["next_frame"] = last_index + 1
+                    if last:
+                        state["complete"] = True
+                        logger.info(f"Finished {source}")
+                    self.frames_done += len(records)
+                    next_sequence += 1
+                    written += 1
+                    if last or written % PROGRESS_EVERY == 0:
+                        self._save_progress(output)
+            self._save_progress(output)
+
+        self.stop_event.set()
+        for thread in threads:
+            thread.join(timeout=2.0)
+        if self._errors:
+            raise self._errors[0]
+
+
+def export_parquet(jsonl_path: str, parquet_path: str) -> int:
+    """
+    Convert a batch JSONL file to Parquet with one row per detection
+
+    Requires pyarrow.
+
+    Args:
+        jsonl_path: Batch output in JSONL
+        parquet_path: Parquet file to write
+
+    Returns:
+        Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = {name: [] for name in (
+        "source", "frame", "timestamp_ms", "instruction", "label", "confidence",
+        "x1", "y1", "x2", "y2", "center_x", "center_y"
+    )}
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            # Frames without detections keep a row so their instruction is not lost
+            for detection in record["detections"] or [None]:
+                columns["source"].append(record["source"])
+                columns["frame"].append(record["frame"])
+                columns["timestamp_ms"].append(record["timestamp_ms"])
+                columns["instruction"].append(record["instruction"])
+                columns["label"].append(detection["label"] if detection else None)
+                columns["confidence"].append(detection["confidence"] if detection else None)
+                bbox = detection["bbox"] if detection else [None] * 4
+                for name, value in zip(("x1", "y1", "x2", "y2"), bbox):
+                    columns[name].append(value)
+                center = detection["center"] if detection else [None, None]
+                columns["center_x"].append(center[0])
+                columns["center_y"].append(center[1])
+    pq.write_table(pa.table(columns), parquet_path)
+    return len(columns["source"])
@@ -0,0 +1,127 @@
+import time
+import queue
+import threading
+import logging
+from concurrent.futures import Future
+from typing import List, Optional
+import numpy as np
+from app.config import Config
+from app.detections import Detections
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects frames from many callers into batched forward passes.
+
+    A background thread gathers up to config.batch_size frames, or waits at
+    most config.batch_timeout_ms after the first frame arrives, then runs one
+    ObjectDetector.detect_batch_array call. Each submit() returns a Future that
+    resolves to the Detections for that frame.
+    """
+
+    def __init__(self, config: Config, detector, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        self.config = config
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size or self.config.batch_size)
+        wait_ms = self.config.batch_timeout_ms if max_wait_ms is None else max_wait_ms
+        self.max_wait = max(0.0, wait_ms) / 1000.0
+        self.pending = queue.Queue()
+        self.stop_event = threading.Event()
+        self.worker = None
+        self.batches_run = 0
+        self.frames_run = 0
+
+    def start(self) -> None:
+        """Start the batching thread"""
+        if self.worker is not None and self.worker.is_alive():
+            return
+        self.stop_event.clear()
+        self.worker = threading.Thread(target=self._run, name="visora-batcher", daemon=True)
+        self.worker.start()
+        logger.info(f"Micro-batcher started (batch size {self.max_batch_size}, wait {self.max_wait * 1000:.0f} ms)")
+
+    def stop(self) -> None:
+        """Stop the batching thread and fail any frames still waiting"""
+        self.stop_event.set()
+        if self.worker is not None:
+            self.worker.join(timeout=2.0)
+            self.worker = None
+        while True:
+            try:
+                _, future = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    def submit(self, frame: np.ndarray) -> Future:
+        """
+        Queue a frame for batched detection
+
+        Args:
+            frame: Input image frame
+
+        Returns:
+            Future resolving to the Detections for the frame
+        """
+        future = Future()
+        if self.stop_event.is_set():
+            future.set_exception(RuntimeError("Micro-batcher stopped"))
+            return future
+        self.pending.put((frame, future))
+        return future
+
+    def detect(self, frame: np.ndarray, timeout: Optional[float] = None) -> Detections:
+        """
+        Submit a frame and wait for its detections
+
+        Args:
+            frame: Input image frame
+            timeout: Seconds to wait for the result
+
+        Returns:
+            Detections for the frame
+        """
+        return self.submit(frame).result(timeout=timeout)
+
+    def _collect(self) -> List:
+        """Block for the first frame, then gather more until full or timed out"""
+        try:
+            batch = [self.pending.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self.pending.get_nowait())
+                else:
+                    batch.append(self.pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            frames = [frame for frame, _ in batch]
+            try:
+                results = self.detector.detect_batch_array(frames)
+            except Exception as e:
+                logger.error(f"Batched detection failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches_run += 1
+            self.frames_run += len(batch)
+            for (_, future), detections in zip(batch, results):
+                future.set_result(detections)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.frames_run / self.batches_run if self.batches_run else 0.0
@@ -0,0 +1,357 @@
+import os
+import json
+import time
+import platform
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple, Union
+import cv2
+import numpy as np
+from app.config import Config
+from app.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Backend value for letting OpenCV pick (cv2.VideoCapture without an API preference)
+AUTO_BACKEND = -1
+
+# Camera backends worth probing on each platform, in order of preference;
+# auto detection is always tried last
+PLATFORM_BACKENDS = {
+    "Windows": (cv2.CAP_DSHOW, cv2.CAP_MSMF),
+    "Linux": (cv2.CAP_V4L2,),
+    "Darwin": (cv2.CAP_AVFOUNDATION,)
+}
+
+
+def backend_name(backend: int) -> str:
+    """Readable name of an OpenCV capture backend"""
+    if backend == AUTO_BACKEND:
+        return "auto"
+    try:
+        return cv2.videoio_registry.getBackendName(backend)
+    except (AttributeError, cv2.error):
+        return str(backend)
+
+
+def candidate_backends(source: Union[int, str], configured: Optional[int] = None) -> List[int]:
+    """
+    Backends to probe for a source on this platform
+
+    Backends built for other platforms, or missing from this OpenCV build,
+    are left out, so no time is spent on attempts that cannot succeed.
+
+    Args:
+        source: Camera index or video file / stream URL
+        configured: Backend from config.camera_backend, tried first if usable
+
+    Returns:
+        Backend codes in order of preference, ending with AUTO_BACKEND
+    """
+    registry = getattr(cv2, "videoio_registry", None)
+    if isinstance(source, int):
+        preferred = PLATFORM_BACKENDS.get(platform.system(), ())
+        available = set(registry.getCameraBackends()) if registry is not None else None
+    else:
+        # Files and streams are decoded by whatever OpenCV picks
+        preferred = ()
+        available = set(registry.getStreamBackends()) if registry is not None else None
+
+    backends = []
+    for backend in ([configured] if configured is not None else []) + list(preferred):
+        if backend in backends or (available is not None and backend not in available):
+            continue
+        backends.append(backend)
+    backends.append(AUTO_BACKEND)
+    return backends
+
+
+def open_capture(source: Union[int, str], backend: int, width: int, height: int):
+    """
+    Open a source with one backend and check that it delivers frames
+
+    Args:
+        source: Camera index or video file / stream URL
+        backend: OpenCV backend code or AUTO_BACKEND
+        width: Requested frame width
+        height: Requested frame height
+
+    Returns:
+        Tuple of (capture, first frame), or None if the backend failed
+    """
+    cap = None
+    try:
+        cap = cv2.VideoCapture(source) if backend == AUTO_BACKEND else cv2.VideoCapture(source, backend)
+        if not cap.isOpened():
+            logger.debug(f"Could not open camera {source} with backend {backend_name(backend)}")
+            cap.release()
+            return None
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        ret, frame = cap.read()
+        if not ret:
+            logger.debug(f"Camera {source} opened but could not read a frame with backend {backend_name(backend)}")
+            cap.release()
+            return None
+        return cap, frame
+    except Exception as e:
+        logger.debug(f"Error opening camera {source} with backend {backend_name(backend)}: {e}")
+        if cap is not None:
+            cap.release()
+        return None
+
+
+class CameraCache:
+    """
+    Backend and resolution that last opened each camera source.
+
+    Stored as JSON at config.camera_cache_file and replaced atomically, so
+    the next start can open the camera with the backend that worked, and ask
+    for the resolution it actually delivered, instead of probing again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable camera cache {path}: {e}")
+
+    def get(self, source: Union[int, str]) -> Optional[Dict]:
+        """Cached entry for a source: backend, requested [width, height] and delivered width and height"""
+        return self._entries.get(str(source))
+
+    def put(self, source: Union[int, str], backend: int, requested: Tuple[int, int], width: int,
+            height: int) -> None:
+        """Remember the backend a source opened with and the resolution it delivered when asked for requested"""
+        entry = {"backend": backend, "requested": list(requested), "width": width, "height": height}
+        with self._lock:
+            if self._entries.get(str(source)) == entry:
+                return
+            self._entries[str(source)] = entry
+            self._save()
+
+    def invalidate(self, source: Union[int, str]) -> None:
+        """Forget a source whose cached backend no longer works"""
+        with self._lock:
+            if self._entries.pop(str(source), None) is not None:
+                self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write camera cache {self.path}: {e}")
+
+
+def probe_camera(source: Union[int, str], backends: List[int], width: int, height: int):
+    """
+    Try several backends at once and keep the first that delivers a frame
+
+    Captures opened by the losing backends are released in the background.
+
+    Args:
+        source: Camera index or video file / stream URL
+        backends: Backend codes to try
+        width: Requested frame width
+        height: Requested frame height
+
+    Returns:
+        Tuple of (capture, first frame, backend), or None if every backend failed
+    """
+    if len(backends) == 1:
+        opened = open_capture(source, backends[0], width, height)
+        return (*opened, backends[0]) if opened is not None else None
+
+    executor = ThreadPoolExecutor(max_workers=len(backends), thread_name_prefix="visora-camera-probe")
+    futures = {executor.submit(open_capture, source, backend, width, height): backend for backend in backends}
+    winner = None
+    try:
+        for future in as_completed(futures):
+            opened = future.result()
+            if opened is not None:
+                winner = (*opened, futures[future])
+                break
+    finally:
+        for future in futures:
+            if winner is None or futures[future] != winner[2]:
+                future.add_done_callback(_release_opened)
+        executor.shutdown(wait=False)
+    return winner
+
+
+def _release_opened(future):
+    opened = future.result()
+    if opened is not None:
+        opened[0].release()
+
+
+def open_camera(config: Config, source: Union[int, str], configured_backend: Optional[int] = None,
+                cache: Optional[CameraCache] = None):
+    """
+    Open a camera quickly, trying the cached backend before probing
+
+    Args:
+        config: Configuration object
+        source: Camera index or video file / stream URL
+        configured_backend: Backend from config.camera_backend, if not auto
+        cache: Backend cache (default: config.camera_cache_file if config.camera_cache)
+
+    Returns:
+        Opened cv2.VideoCapture that has delivered a frame, or None if failed
+    """
+    if cache is None and config.camera_cache:
+        cache = CameraCache(config.camera_cache_file)
+    requested = (config.frame_width, config.frame_height)
+    start = time.perf_counter()
+    opened, how = None, "cached"
+
+    entry = cache.get(source) if cache is not None else None
+    if entry is not None:
+        # Ask for the mode the camera settled on last time, so the driver does not renegotiate it
+        if entry.get("requested") == list(requested):
+            width, height = entry["width"], entry["height"]
+        else:
+            width, height = requested
+        opened = open_capture(source, entry["backend"], width, height)
+        if opened is not None:
+            opened = (*opened, entry["backend"])
+        else:
+            logger.info(f"Cached backend {backend_name(entry['backend'])} no longer opens camera {source}")
+            cache.invalidate(source)
+
+    if opened is None:
+        how = "probed"
+        backends = candidate_backends(source, configured_backend)
+        logger.info(f"Probing camera {source} with backends: {', '.join(backend_name(b) for b in backends)}")
+        opened = probe_camera(source, backends, *requested)
+
+    elapsed = time.perf_counter() - start
+    REGISTRY.observe("camera_init", elapsed)
+    if opened is None:
+        logger.error(f"Failed to initialize camera {source} with all backends ({elapsed * 1000:.0f} ms)")
+        return None
+
+    cap, frame, backend = opened
+    height, width = frame.shape[:2]
+    logger.info(
+        f"Camera {source} initialized with backend {backend_name(backend)} at {width}x{height} "
+        f"in {elapsed * 1000:.0f} ms ({how})"
+    )
+    if cache is not None:
+        cache.put(source, backend, requested, width, height)
+    return cap
+
+
+class LatestFrameCamera:
+    """
+    Camera reader that always hands out the newest frame.
+
+    A reader thread calls cap.read() continuously, so OpenCV's internal
+    buffer never fills with stale frames, and keeps only the latest frame
+    with its capture timestamp. read() mirrors cv2.VideoCapture.read() but
+    waits for a frame newer than the last one returned; frames the consumer
+    was too slow to take are counted in dropped.
+    """
+
+    def __init__(self, capture, config: Config):
+        self.capture = capture
+        self.config = config
+        self.dropped = 0
+        self.finished = False
+        self.last_timestamp = 0.0
+        self._frame: Optional[np.ndarray] = None
+        self._timestamp = 0.0
+        self._seq = 0
+        self._last_seq = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        try:
+            # Not every backend honours this; the reader thread keeps frames fresh either way
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except cv2.error:
+            pass
+        self._thread = threading.Thread(target=self._read_loop, name="visora-camera", daemon=True)
+        self._thread.start()
+
+    def _read_loop(self):
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            ret, frame = self.capture.read()
+            timestamp = time.time()
+            if not ret:
+                logger.info("Camera reader: source ended")
+                break
+            REGISTRY.observe("capture_read", time.perf_counter() - start)
+            with self._condition:
+                self._frame = frame
+                self._timestamp = timestamp
+                self._seq += 1
+                self._condition.notify_all()
+        with self._condition:
+            self.finished = True
+            self._condition.notify_all()
+
+    def read_timestamped(self, timeout: float = 2.0) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Get the newest frame with its capture time
+
+        Args:
+            timeout: Seconds to wait for a frame newer than the last one read
+
+        Returns:
+            Tuple of (success, frame, capture timestamp from time.time())
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > self._last_seq or self.finished, timeout=timeout)
+            if self._seq <= self._last_seq:
+                return False, None, 0.0
+            if self._last_seq:
+                self.dropped += self._seq - self._last_seq - 1
+            self._last_seq = self._seq
+            self.last_timestamp = self._timestamp
+            return True, self._frame, self._timestamp
+
+    def read(self, image=None):
+        """
+        Get the newest frame (cv2.VideoCapture compatible)
+
+        Args:
+            image: Ignored; accepted for cv2.VideoCapture compatibility
+
+        Returns:
+            Tuple of (success, frame)
+        """
+        ret, frame, _ = self.read_timestamped()
+        return ret, frame
+
+    @property
+    def frames_captured(self) -> int:
+        return self._seq
+
+    def isOpened(self) -> bool:
+        return self.capture.isOpened() and not self.finished
+
+    def get(self, prop_id):
+        return self.capture.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.capture.set(prop_id, value)
+
+    def release(self) -> None:
+        """Stop the reader thread and release the camera"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.capture.release()
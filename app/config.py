@@ -5,15 +5,43 @@ import platform
 MODEL_NAME = "yolov8n.pt"  # Lightweight YOLOv8 model
 CONFIDENCE_THRESHOLD = 0.5
 IOU_THRESHOLD = 0.45
+INFERENCE_BACKEND = "torch"  # torch (ultralytics), onnx (onnxruntime) or openvino
+INFERENCE_THREADS = 0  # Intra-op threads for the backend; 0 keeps the library default
+INFERENCE_IMAGE_SIZE = 640  # Input size used when exporting the model
+MODEL_CACHE_DIR = ".visora_cache"  # Where exported models are cached
+QUANTIZATION = ""  # INT8 mode for the onnx backend: "", "dynamic" or "static"
+CALIBRATION_DIR = "calibration_frames"  # Local frames used for static INT8 calibration
+CALIBRATION_SAMPLES = 100  # Max calibration frames
 
 # Audio configuration
 AUDIO_RATE = 22050
 AUDIO_CHUNK = 1024
+SPEECH_MAX_AGE = 3.0  # Seconds a queued message stays relevant before it is dropped
+SPEECH_QUEUE_SIZE = 8  # Max pending messages; the least urgent is evicted beyond this
+PHRASE_CACHE = True  # Play announcements from pre-rendered clips when a player is available
+PHRASE_CACHE_DIR = os.path.join(".visora_cache", "speech")  # Where rendered clips are stored
+PHRASE_CACHE_DISK_MB = 50  # Disk budget for rendered clips (least recently used evicted)
+PHRASE_CACHE_MEMORY_MB = 16  # Decoded clip audio kept in memory
+PHRASE_CACHE_PREWARM = False  # Render the whole announcement vocabulary at startup
 
 # Camera configuration
 CAMERA_SOURCE = 0  # Default camera
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
+RENDER_VIDEO = True  # Draw and show the annotated video; turn off for audio-only use
+LATEST_FRAME_CAMERA = True  # Read the camera on its own thread and always process the newest frame
+SAFETY_LATENCY_BUDGET_MS = 500  # Warn when capture-to-announcement latency exceeds this
+
+# Tiled / region-of-interest inference for high-resolution sources
+TILING_MODE = "off"  # off, tiles (overlapping grid) or roi (walking-path crop)
+TILE_SIZE = 640  # Tile edge in pixels
+TILE_OVERLAP = 0.2  # Fraction of a tile shared with its neighbour
+TILE_INCLUDE_FULL_FRAME = True  # Also run a downscaled full-frame pass for large objects
+WALKING_ROI = "0.2,0.35,0.8,1.0"  # Walking-path region as x1,y1,x2,y2 frame fractions
+
+# Multi-camera configuration
+CAMERA_SOURCES = ""  # Comma-separated camera indices or video files; empty uses CAMERA_SOURCE
+SOURCE_WEIGHTS = ""  # Comma-separated scheduling weights matching CAMERA_SOURCES
 
 # Platform-specific camera backend
 if platform.system() == "Windows":
@@ -21,14 +49,77 @@ if platform.system() == "Windows":
 else:
     CAMERA_BACKEND = "auto"   # Auto for other platforms
 
+CAMERA_CACHE = True  # Remember the backend that opened each camera and try it first next time
+CAMERA_CACHE_FILE = os.path.join(".visora_cache", "camera.json")  # Where that is stored
+
 # Navigation configuration
 DIRECTION_SECTORS = 8  # Divide 360° into 8 sectors
 OBJECT_DISTANCE_THRESHOLD = 50  # Distance threshold in pixels
 
+# Tracking and announcement configuration
+TRACKER_IOU_THRESHOLD = 0.3  # Min IoU to associate a detection with a track
+TRACKER_MAX_AGE = 15  # Frames a track survives without a matching detection
+TRACKER_MIN_HITS = 2  # Detections before a track is extrapolated on skipped frames
+ANNOUNCEMENT_COOLDOWN = 5.0  # Seconds before the same tracked object is announced again
+
+# Motion gating configuration
+MOTION_GATING = False  # Skip inference when the scene has not changed
+MOTION_THRESHOLD = 0.02  # Mean absolute thumbnail difference (0-1) that counts as change
+MOTION_MAX_SKIP = 30  # Force inference at least every N gated frames
+MOTION_DOWNSCALE_WIDTH = 64  # Thumbnail width used for the change score
+
+# Batch inference configuration
+BATCH_SIZE = 4  # Max frames per forward pass in micro-batching mode
+BATCH_WORKERS = 0  # Inference workers in --mode batch; 0 uses half the cores
+BATCH_OUTPUT = "detections.jsonl"  # Output file of --mode batch
+BATCH_FRAME_STRIDE = 1  # Process every Nth frame of recorded videos
+BATCH_POOL = "threads"  # Batch mode workers: threads (one process) or processes (ProcessInferencePool)
+PROCESS_WORKERS = 0  # Inference processes; 0 uses half the cores
+PROCESS_START_METHOD = "spawn"  # spawn (portable) or fork (Linux, shares model weights copy-on-write)
+BATCH_TIMEOUT_MS = 20  # Max time to wait for a batch to fill
+
+# Adaptive inference cadence
+TARGET_FPS = 15  # Frame rate the real-time loops try to hold; 0 disables pacing
+INFERENCE_CPU_BUDGET = 0.8  # Max share of loop wall time spent in inference
+MAX_DETECTION_INTERVAL = 6  # Run detection at least every Nth frame
+
+# Pipeline configuration
+PIPELINE_QUEUE_SIZE = 2  # Max frames buffered between pipeline stages
+PIPELINE_STATS_INTERVAL = 5.0  # Seconds between per-stage stats reports
+FRAME_RING = False  # Decode camera frames into a shared-memory ring read without copies
+FRAME_RING_SLOTS = 6  # Preallocated frame slots in the ring (at least 6)
+
+# Metrics configuration
+METRICS_ENABLED = True  # Record per-stage latency histograms
+METRICS_WINDOW = 60.0  # Seconds covered by the rolling histograms
+METRICS_PORT = 0  # Local Prometheus-style /metrics endpoint; 0 disables it
+METRICS_JSON_PATH = ""  # File periodically rewritten with a JSON snapshot; empty disables it
+METRICS_DUMP_INTERVAL = 10.0  # Seconds between JSON snapshots
+
 # Streamlit configuration
 STREAMLIT_PORT = 8501
+UI_REFRESH_FPS = 10.0  # Max page updates per second; detection runs on its own thread
+VIDEO_STREAM = False  # Serve the annotated video as MJPEG instead of pushing frames through the page
+VIDEO_STREAM_HOST = "127.0.0.1"  # Interface the MJPEG endpoint binds to
+VIDEO_STREAM_PORT = 8502  # Port of the MJPEG endpoint
+VIDEO_STREAM_URL = ""  # Stream address given to browsers; empty uses http://localhost:<port>/stream.mjpg
+VIDEO_STREAM_QUALITY = 70  # JPEG quality (1-100)
+VIDEO_STREAM_WIDTH = 0  # Stream width in pixels (height keeps the aspect ratio); 0 keeps the frame size
+VIDEO_STREAM_FPS = 15.0  # Max encoded frames per second
 MAX_IMAGE_SIZE = (640, 480)
 
+def env_flag(name, default):
+    """Read a boolean environment variable ("1", "true", "yes", "on" are true)"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def parse_camera_source(value):
+    """Interpret a camera source as a device index if numeric, otherwise as a file path or URL"""
+    value = str(value).strip()
+    return int(value) if value.isdigit() else value
+
 class Config:
     """Configuration class for the application"""
     
@@ -36,13 +127,77 @@ class Config:
         self.model_name = os.getenv("MODEL_NAME", MODEL_NAME)
         self.confidence_threshold = float(os.getenv("CONFIDENCE_THRESHOLD", CONFIDENCE_THRESHOLD))
         self.iou_threshold = float(os.getenv("IOU_THRESHOLD", IOU_THRESHOLD))
+        self.speech_max_age = float(os.getenv("SPEECH_MAX_AGE", SPEECH_MAX_AGE))
+        self.speech_queue_size = int(os.getenv("SPEECH_QUEUE_SIZE", SPEECH_QUEUE_SIZE))
+        self.phrase_cache = env_flag("PHRASE_CACHE", PHRASE_CACHE)
+        self.phrase_cache_dir = os.getenv("PHRASE_CACHE_DIR", PHRASE_CACHE_DIR)
+        self.phrase_cache_disk_mb = float(os.getenv("PHRASE_CACHE_DISK_MB", PHRASE_CACHE_DISK_MB))
+        self.phrase_cache_memory_mb = float(os.getenv("PHRASE_CACHE_MEMORY_MB", PHRASE_CACHE_MEMORY_MB))
+        self.phrase_cache_prewarm = env_flag("PHRASE_CACHE_PREWARM", PHRASE_CACHE_PREWARM)
+        self.inference_backend = os.getenv("INFERENCE_BACKEND", INFERENCE_BACKEND).lower()
+        self.inference_threads = int(os.getenv("INFERENCE_THREADS", INFERENCE_THREADS))
+        self.inference_image_size = int(os.getenv("INFERENCE_IMAGE_SIZE", INFERENCE_IMAGE_SIZE))
+        self.model_cache_dir = os.getenv("MODEL_CACHE_DIR", MODEL_CACHE_DIR)
+        self.quantization = os.getenv("QUANTIZATION", QUANTIZATION).lower()
+        self.calibration_dir = os.getenv("CALIBRATION_DIR", CALIBRATION_DIR)
+        self.calibration_samples = int(os.getenv("CALIBRATION_SAMPLES", CALIBRATION_SAMPLES))
         self.camera_source = int(os.getenv("CAMERA_SOURCE", CAMERA_SOURCE))
+        self.tiling_mode = os.getenv("TILING_MODE", TILING_MODE).lower()
+        self.tile_size = int(os.getenv("TILE_SIZE", TILE_SIZE))
+        self.tile_overlap = float(os.getenv("TILE_OVERLAP", TILE_OVERLAP))
+        self.tile_include_full_frame = env_flag("TILE_INCLUDE_FULL_FRAME", TILE_INCLUDE_FULL_FRAME)
+        self.walking_roi = [float(v) for v in os.getenv("WALKING_ROI", WALKING_ROI).split(",")]
+        sources = os.getenv("CAMERA_SOURCES", CAMERA_SOURCES)
+        self.camera_sources = [parse_camera_source(s) for s in sources.split(",") if s.strip()] or [self.camera_source]
+        weights = os.getenv("SOURCE_WEIGHTS", SOURCE_WEIGHTS)
+        self.source_weights = [float(w) for w in weights.split(",") if w.strip()]
         self.camera_backend = os.getenv("CAMERA_BACKEND", CAMERA_BACKEND)
+        self.camera_cache = env_flag("CAMERA_CACHE", CAMERA_CACHE)
+        self.camera_cache_file = os.getenv("CAMERA_CACHE_FILE", CAMERA_CACHE_FILE)
         self.frame_width = int(os.getenv("FRAME_WIDTH", FRAME_WIDTH))
         self.frame_height = int(os.getenv("FRAME_HEIGHT", FRAME_HEIGHT))
+        self.render_video = env_flag("RENDER_VIDEO", RENDER_VIDEO)
+        self.latest_frame_camera = env_flag("LATEST_FRAME_CAMERA", LATEST_FRAME_CAMERA)
+        self.safety_latency_budget_ms = float(os.getenv("SAFETY_LATENCY_BUDGET_MS", SAFETY_LATENCY_BUDGET_MS))
         self.direction_sectors = int(os.getenv("DIRECTION_SECTORS", DIRECTION_SECTORS))
         self.object_distance_threshold = int(os.getenv("OBJECT_DISTANCE_THRESHOLD", OBJECT_DISTANCE_THRESHOLD))
         self.streamlit_port = int(os.getenv("STREAMLIT_PORT", STREAMLIT_PORT))
+        self.ui_refresh_fps = float(os.getenv("UI_REFRESH_FPS", UI_REFRESH_FPS))
+        self.video_stream = env_flag("VIDEO_STREAM", VIDEO_STREAM)
+        self.video_stream_host = os.getenv("VIDEO_STREAM_HOST", VIDEO_STREAM_HOST)
+        self.video_stream_port = int(os.getenv("VIDEO_STREAM_PORT", VIDEO_STREAM_PORT))
+        self.video_stream_url = os.getenv("VIDEO_STREAM_URL", VIDEO_STREAM_URL)
+        self.video_stream_quality = int(os.getenv("VIDEO_STREAM_QUALITY", VIDEO_STREAM_QUALITY))
+        self.video_stream_width = int(os.getenv("VIDEO_STREAM_WIDTH", VIDEO_STREAM_WIDTH))
+        self.video_stream_fps = float(os.getenv("VIDEO_STREAM_FPS", VIDEO_STREAM_FPS))
+        self.tracker_iou_threshold = float(os.getenv("TRACKER_IOU_THRESHOLD", TRACKER_IOU_THRESHOLD))
+        self.tracker_max_age = int(os.getenv("TRACKER_MAX_AGE", TRACKER_MAX_AGE))
+        self.tracker_min_hits = int(os.getenv("TRACKER_MIN_HITS", TRACKER_MIN_HITS))
+        self.announcement_cooldown = float(os.getenv("ANNOUNCEMENT_COOLDOWN", ANNOUNCEMENT_COOLDOWN))
+        self.motion_gating = env_flag("MOTION_GATING", MOTION_GATING)
+        self.motion_threshold = float(os.getenv("MOTION_THRESHOLD", MOTION_THRESHOLD))
+        self.motion_max_skip = int(os.getenv("MOTION_MAX_SKIP", MOTION_MAX_SKIP))
+        self.motion_downscale_width = int(os.getenv("MOTION_DOWNSCALE_WIDTH", MOTION_DOWNSCALE_WIDTH))
+        self.batch_size = int(os.getenv("BATCH_SIZE", BATCH_SIZE))
+        self.batch_workers = int(os.getenv("BATCH_WORKERS", BATCH_WORKERS))
+        self.batch_output = os.getenv("BATCH_OUTPUT", BATCH_OUTPUT)
+        self.batch_frame_stride = int(os.getenv("BATCH_FRAME_STRIDE", BATCH_FRAME_STRIDE))
+        self.batch_pool = os.getenv("BATCH_POOL", BATCH_POOL).lower()
+        self.process_workers = int(os.getenv("PROCESS_WORKERS", PROCESS_WORKERS))
+        self.process_start_method = os.getenv("PROCESS_START_METHOD", PROCESS_START_METHOD).lower()
+        self.batch_timeout_ms = float(os.getenv("BATCH_TIMEOUT_MS", BATCH_TIMEOUT_MS))
+        self.target_fps = float(os.getenv("TARGET_FPS", TARGET_FPS))
+        self.inference_cpu_budget = float(os.getenv("INFERENCE_CPU_BUDGET", INFERENCE_CPU_BUDGET))
+        self.max_detection_interval = int(os.getenv("MAX_DETECTION_INTERVAL", MAX_DETECTION_INTERVAL))
+        self.pipeline_queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", PIPELINE_QUEUE_SIZE))
+        self.pipeline_stats_interval = float(os.getenv("PIPELINE_STATS_INTERVAL", PIPELINE_STATS_INTERVAL))
+        self.frame_ring = env_flag("FRAME_RING", FRAME_RING)
+        self.frame_ring_slots = int(os.getenv("FRAME_RING_SLOTS", FRAME_RING_SLOTS))
+        self.metrics_enabled = env_flag("METRICS_ENABLED", METRICS_ENABLED)
+        self.metrics_window = float(os.getenv("METRICS_WINDOW", METRICS_WINDOW))
+        self.metrics_port = int(os.getenv("METRICS_PORT", METRICS_PORT))
+        self.metrics_json_path = os.getenv("METRICS_JSON_PATH", METRICS_JSON_PATH)
+        self.metrics_dump_interval = float(os.getenv("METRICS_DUMP_INTERVAL", METRICS_DUMP_INTERVAL))
         
     def __str__(self):
-        return f"Config(model={self.model_name}, confidence={self.confidence_threshold}, backend={self.camera_backend})"
\ No newline at end of file
+        return f"Config(model={self.model_name}, inference={self.inference_backend}, confidence={self.confidence_threshold}, backend={self.camera_backend})"
\ No newline at end of file
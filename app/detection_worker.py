@@ -0,0 +1,247 @@
+import time
+import threading
+import logging
+from typing import Dict, Hashable, List, NamedTuple, Optional
+import numpy as np
+from app.config import Config
+from app.vision import ObjectDetector
+from app.audio import AudioManager
+from app.navigation import NavigationAssistant
+from app.detections import Detections
+from app.scheduler import AdaptiveScheduler
+from app.tracking import ObjectTracker
+from app.motion import MotionGate
+from app.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Frames are only drawn while a viewer has polled within this many seconds
+VIEWER_TIMEOUT = 2.0
+# A viewer's frame buffer is dropped after it has not polled for this many seconds
+VIEWER_EXPIRY = 60.0
+# Detections listed (and considered for announcements) per frame
+SUMMARY_SIZE = 3
+
+
+class LiveSnapshot(NamedTuple):
+    """State of the detection loop as seen by a viewer"""
+    seq: int
+    frame: Optional[np.ndarray]
+    frame_seq: int  # seq at which the frame was drawn
+    objects: List[Dict]
+    instruction: str
+    fps: float
+    running: bool
+    error: str
+
+
+class DetectionWorker:
+    """
+    Real-time detection loop on a background thread.
+
+    Runs capture, detection, tracking and announcements independently of
+    the UI, so a slow browser cannot throttle detection and detection does
+    not push every frame to the browser. Viewers poll snapshot() at their
+    own rate. The worker draws annotated frames into a back buffer and swaps
+    it with the ready one; each viewer gets the newest ready frame copied into
+    a buffer of its own, so a frame a viewer is still displaying is never
+    touched until that same viewer polls again, however many viewers share
+    the worker. When no viewer has polled recently (or config.render_video
+    is off) frames are not drawn at all.
+    """
+
+    def __init__(self, config: Config, detector: ObjectDetector, audio_manager: AudioManager,
+                 navigation_assistant: NavigationAssistant):
+        self.config = config
+        self.detector = detector
+        self.audio_manager = audio_manager
+        self.navigation_assistant = navigation_assistant
+        self.capture = None
+        self.error = ""
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._back: Optional[np.ndarray] = None
+        self._ready: Optional[np.ndarray] = None
+        self._ready_seq = 0
+        self._viewers: Dict[Hashable, Dict] = {}  # viewer -> its frame buffer, frame seq, last poll
+        self._seq = 0
+        self._objects: List[Dict] = []
+        self._instruction = ""
+        self._fps = 0.0
+        self._last_poll = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """
+        Open the camera and start the detection thread
+
+        Returns:
+            True if the worker is running
+        """
+        if self.running:
+            return True
+        self.error = ""
+        self.capture = self.detector.initialize_camera()
+        if self.capture is None:
+            self.error = "Could not access the camera"
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="visora-live-detection", daemon=True)
+        self._thread.start()
+        logger.info("Live detection worker started")
+        return True
+
+    def stop(self) -> None:
+        """Stop the detection thread and release the camera"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        logger.info("Live detection worker stopped")
+
+    def snapshot(self, include_frame: bool = True, viewer: Hashable = None) -> LiveSnapshot:
+        """
+        Get the latest annotated frame and detection summary
+
+        The returned frame belongs to the viewer and stays valid until that
+        viewer's next call with include_frame. Pollers that only want the
+        summary pass include_frame=False, which also does not count as
+        someone watching.
+
+        Args:
+            include_frame: Take the newest annotated frame
+            viewer: Key identifying the consumer, e.g. a browser session
+
+        Returns:
+            LiveSnapshot; frame is None until a frame has been drawn
+        """
+        with self._lock:
+            frame, frame_seq = None, 0
+            if include_frame:
+                now = time.monotonic()
+                self._last_poll = now
+                state = self._viewers.get(viewer)
+                if state is None:
+                    # Forget viewers that went away; a frame they still hold stays theirs
+                    self._viewers = {
+                        key: value for key, value in self._viewers.items() if now - value['polled'] < VIEWER_EXPIRY
+                    }
+                    state = self._viewers[viewer] = {'frame': None, 'frame_seq': 0, 'polled': now}
+                state['polled'] = now
+                if self._ready is not None and self._ready_seq != state['frame_seq']:
+                    if state['frame'] is None or state['frame'].shape != self._ready.shape:
+                        state['frame'] = np.empty_like(self._ready)
+                    np.copyto(state['frame'], self._ready)
+                    state['frame_seq'] = self._ready_seq
+                frame, frame_seq = state['frame'], state['frame_seq']
+            return LiveSnapshot(
+                self._seq, frame, frame_seq, self._objects, self._instruction, self._fps, self.running, self.error
+            )
+
+    def _viewer_active(self) -> bool:
+        return time.monotonic() - self._last_poll < VIEWER_TIMEOUT
+
+    def _run(self):
+        # Run detection every Nth frame, with N adapted to the FPS/CPU budget;
+        # the tracker extrapolates boxes and keeps object identities in between
+        scheduler = AdaptiveScheduler(self.config)
+        tracker = ObjectTracker(self.config)
+        motion_gate = MotionGate(self.config) if self.config.motion_gating else None
+        detections = Detections.empty()
+        frames = 0
+        window_start = time.perf_counter()
+
+        try:
+            while not self._stop.is_set():
+                run_detection = scheduler.begin_frame()
+                if hasattr(self.capture, "read_timestamped"):
+                    # Threaded cameras time their own reads and stamp each frame
+                    ret, frame, captured_at = self.capture.read_timestamped()
+                else:
+                    with REGISTRY.timer("capture_read"):
+                        ret, frame = self.capture.read()
+                    captured_at = time.time()
+                if not ret:
+                    self.error = "Failed to read frame from camera"
+                    logger.error(self.error)
+                    break
+
+                # Detect objects, extrapolating tracked boxes on skipped frames;
+                # an unchanged scene keeps the cached detections as they are
+                if not run_detection:
+                    detections = tracker.predict()
+                elif motion_gate is None or motion_gate.should_infer(frame):
+                    inference_start = time.perf_counter()
+                    detections = tracker.update(self.detector.detect_objects_array(frame))
+                    inference_time = time.perf_counter() - inference_start
+                    scheduler.record_inference(inference_time)
+                    REGISTRY.observe("detect", inference_time)
+
+                rendered = False
+                if self.config.render_video and self._viewer_active():
+                    back = self._back
+                    if back is None or back.shape != frame.shape:
+                        back = np.empty_like(frame)
+                    with REGISTRY.timer("draw"):
+                        self._back = self.detector.renderer.render(frame, detections, rgb=True, out=back)
+                    rendered = True
+
+                objects, instruction = self._announce(detections, frame.shape[1], frame.shape[0], captured_at)
+
+                frames += 1
+                elapsed = time.perf_counter() - window_start
+                with self._lock:
+                    self._seq += 1
+                    if rendered:
+                        self._back, self._ready = self._ready, self._back
+                        self._ready_seq = self._seq
+                    self._objects = objects
+                    self._instruction = instruction
+                    if elapsed >= 1.0:
+                        self._fps = frames / elapsed
+                        frames, window_start = 0, time.perf_counter()
+
+                # Hold the target frame rate instead of a fixed delay
+                scheduler.end_frame()
+                scheduler.pace()
+        except Exception as e:
+            self.error = f"Error in real-time detection: {e}"
+            logger.error(self.error)
+        finally:
+            if self.capture is not None:
+                if getattr(self.capture, "dropped", 0):
+                    logger.info(f"Camera frames dropped while detection was busy: {self.capture.dropped}")
+                self.capture.release()
+                self.capture = None
+
+    def _announce(self, detections: Detections, width: int, height: int, captured_at: float):
+        """Announce the most important detections; returns the summary shown to viewers"""
+        if not detections:
+            return [], ""
+        # Direction, distance and priority of every object in one pass
+        analysis = self.navigation_assistant.analyze(detections, width, height)
+        items = detections.to_list()
+        objects = []
+        # Limit to the top detections to avoid audio overload
+        for index in analysis.priority[:SUMMARY_SIZE]:
+            detection = items[index]
+            direction, distance = analysis.directions[index], analysis.distance_labels[index]
+            objects.append({
+                'label': detection['label'],
+                'confidence': detection['confidence'],
+                'direction': direction,
+                'distance': distance
+            })
+            # Announce new objects, or tracked objects whose cooldown has expired
+            if self.navigation_assistant.should_announce(detection):
+                self.audio_manager.announce_object_direction(
+                    detection['label'], direction, distance, capture_time=captured_at
+                )
+        return objects, analysis.instruction
@@ -0,0 +1,177 @@
+import numpy as np
+from typing import List, Dict, Optional, Sequence
+
+# Default COCO class names, used when a model does not carry its own
+COCO_CLASS_NAMES = [
+    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train',
+    'truck', 'boat', 'traffic light', 'fire hydrant', 'stop sign',
+    'parking meter', 'bench', 'bird', 'cat', 'dog', 'horse', 'sheep',
+    'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack', 'umbrella',
+    'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard',
+    'sports ball', 'kite', 'baseball bat', 'baseball glove', 'skateboard',
+    'surfboard', 'tennis racket', 'bottle', 'wine glass', 'cup', 'fork',
+    'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange',
+    'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
+    'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv',
+    'laptop', 'mouse', 'remote', 'keyboard', 'cell phone', 'microwave',
+    'oven', 'toaster', 'sink', 'refrigerator', 'book', 'clock', 'vase',
+    'scissors', 'teddy bear', 'hair drier', 'toothbrush'
+]
+
+
+class Detections:
+    """
+    Struct-of-arrays container for the detections in one frame.
+
+    Holds the same information as the list-of-dicts returned by
+    ObjectDetector.detect_objects, but as parallel NumPy arrays so downstream
+    code can work on whole detection sets at once.
+    """
+
+    def __init__(self, boxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray, labels: Sequence[str],
+                 centers: Optional[np.ndarray] = None, track_ids: Optional[np.ndarray] = None):
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        self.class_ids = np.asarray(class_ids, dtype=np.int32).reshape(-1)
+        self.labels = np.asarray(labels, dtype=object).reshape(-1)
+        if centers is not None:
+            self.centers = np.asarray(centers, dtype=np.int32).reshape(-1, 2)
+        else:
+            # Truncate like int() so centers match the list-of-dicts API exactly
+            self.centers = np.empty((len(self.boxes), 2), dtype=np.int32)
+            self.centers[:, 0] = (self.boxes[:, 0] + self.boxes[:, 2]) / 2
+            self.centers[:, 1] = (self.boxes[:, 1] + self.boxes[:, 3]) / 2
+        self.areas = (
+            (self.boxes[:, 2] - self.boxes[:, 0]).astype(np.int64)
+            * (self.boxes[:, 3] - self.boxes[:, 1])
+        )
+        # Persistent ids assigned by ObjectTracker; None when not tracked
+        self.track_ids = None if track_ids is None else np.asarray(track_ids, dtype=np.int64).reshape(-1)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __bool__(self) -> bool:
+        return len(self.boxes) > 0
+
+    @classmethod
+    def empty(cls) -> "Detections":
+        """Create an empty detection set"""
+        return cls(
+            np.empty((0, 4), dtype=np.int32),
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.int32),
+            []
+        )
+
+    @classmethod
+    def from_list(cls, detections: List[Dict]) -> "Detections":
+        """
+        Build a detection set from the list-of-dicts form
+
+        Args:
+            detections: List of detected objects
+
+        Returns:
+            Equivalent Detections object
+        """
+        if not detections:
+            return cls.empty()
+        return cls(
+            [d['bbox'] for d in detections],
+            [d['confidence'] for d in detections],
+            [d['class_id'] for d in detections],
+            [d['label'] for d in detections],
+            centers=[d['center'] for d in detections],
+            track_ids=[d['track_id'] for d in detections] if all('track_id' in d for d in detections) else None
+        )
+
+    def select(self, index) -> "Detections":
+        """
+        Select a subset of detections
+
+        Args:
+            index: Boolean mask or integer index array
+
+        Returns:
+            New Detections object with the selected rows
+        """
+        return Detections(
+            self.boxes[index],
+            self.confidences[index],
+            self.class_ids[index],
+            self.labels[index],
+            centers=self.centers[index],
+            track_ids=None if self.track_ids is None else self.track_ids[index]
+        )
+
+    def to_list(self) -> List[Dict]:
+        """
+        Convert to the list-of-dicts form used by detect_objects
+
+        Returns:
+            List of detected objects with bounding boxes and labels
+        """
+        boxes = self.boxes.tolist()
+        centers = self.centers.tolist()
+        confidences = self.confidences.tolist()
+        class_ids = self.class_ids.tolist()
+        detections = [
+            {
+                'bbox': boxes[i],
+                'center': (centers[i][0], centers[i][1]),
+                'confidence': confidences[i],
+                'class_id': class_ids[i],
+                'label': self.labels[i]
+            }
+            for i in range(len(boxes))
+        ]
+        if self.track_ids is not None:
+            for detection, track_id in zip(detections, self.track_ids.tolist()):
+                detection['track_id'] = track_id
+        return detections
+
+
+def build_label_lookup(class_names, class_ids: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Build an object array mapping class id to label
+
+    Args:
+        class_names: Class names as a list or an id -> name dict
+        class_ids: Optional class ids that must be covered by the lookup
+
+    Returns:
+        Object array where entry i is the label for class id i
+    """
+    size = len(class_names)
+    if class_ids is not None and len(class_ids):
+        size = max(size, int(class_ids.max()) + 1)
+    lookup = np.empty(size, dtype=object)
+    for class_id in range(size):
+        if class_id < len(class_names):
+            lookup[class_id] = class_names[class_id]
+        else:
+            lookup[class_id] = f"Class {class_id}"
+    return lookup
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection-over-union of two sets of xyxy boxes
+
+    Args:
+        boxes_a: (N, 4) boxes
+        boxes_b: (M, 4) boxes
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
@@ -0,0 +1,335 @@
+import time
+import threading
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Callable, NamedTuple, Optional, Tuple
+import numpy as np
+from app.config import Config
+from app.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Header fields (int64) before the per-slot and per-reader arrays
+_LATEST_SLOT = 0
+_LATEST_SEQ = 1
+_HEADER_FIELDS = 2
+_ALIGNMENT = 64
+
+
+class FrameView(NamedTuple):
+    """A frame held in a ring slot; frame is a read-only view into shared memory"""
+    seq: int
+    timestamp: float
+    frame: np.ndarray
+
+
+class FrameRing:
+    """
+    Fixed ring of preallocated frame slots in shared memory.
+
+    The writer fills a free slot in place (begin_write/commit) and each slot
+    carries a sequence number and capture timestamp. Readers take views of
+    slots without copying; a slot a reader holds is never overwritten until
+    the reader releases it or acquires another, so a ring needs at least
+    readers + 2 slots. Only the small metadata updates take the lock, which
+    is a multiprocessing lock so the ring can be attached from other
+    processes by name.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], slots: int = 4, readers: int = 2, name: Optional[str] = None,
+                 lock=None, create: bool = True):
+        if slots < readers + 2:
+            raise ValueError(f"A ring with {readers} readers needs at least {readers + 2} slots")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.readers = readers
+        self.lock = lock if lock is not None else mp.Lock()
+        self.frame_bytes = int(np.prod(self.shape))
+        self.slot_bytes = -(-self.frame_bytes // _ALIGNMENT) * _ALIGNMENT
+        header_fields = _HEADER_FIELDS + slots + readers
+        self.header_bytes = -(-(header_fields * 8 + slots * 8) // _ALIGNMENT) * _ALIGNMENT
+        size = self.header_bytes + self.slot_bytes * slots
+        if create:
+            self.block = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.block = shared_memory.SharedMemory(name=name)
+        self.name = self.block.name
+        self._owner = create
+
+        buffer = self.block.buf
+        self._header = np.ndarray((header_fields,), dtype=np.int64, buffer=buffer)
+        self._slot_seq = self._header[_HEADER_FIELDS:_HEADER_FIELDS + slots]
+        self._held = self._header[_HEADER_FIELDS + slots:]
+        self._timestamps = np.ndarray((slots,), dtype=np.float64, buffer=buffer, offset=header_fields * 8)
+        self._frames = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=buffer, offset=self.header_bytes + i * self.slot_bytes)
+            for i in range(slots)
+        ]
+        # Readers get read-only views so one stage cannot scribble on another's frame
+        self._views = []
+        for frame in self._frames:
+            view = frame.view()
+            view.flags.writeable = False
+            self._views.append(view)
+        if create:
+            self._header[_LATEST_SLOT] = -1
+            self._header[_LATEST_SEQ] = 0
+            self._slot_seq[:] = 0
+            self._held[:] = -1
+        self._writing = -1
+
+    @classmethod
+    def attach(cls, name: str, shape: Tuple[int, ...], slots: int, readers: int, lock) -> "FrameRing":
+        """Attach to a ring created in another process"""
+        return cls(shape, slots, readers, name=name, lock=lock, create=False)
+
+    @property
+    def latest_seq(self) -> int:
+        """Sequence number of the newest frame (0 once the ring is closed)"""
+        header = self._header
+        return int(header[_LATEST_SEQ]) if header is not None else 0
+
+    def begin_write(self) -> np.ndarray:
+        """
+        Reserve a slot for the next frame
+
+        Returns:
+            Writable view of the slot; fill it in place, then call commit()
+        """
+        with self.lock:
+            latest = self._header[_LATEST_SLOT]
+            held = set(self._held.tolist())
+            start = (latest + 1) % self.slots
+            for step in range(self.slots):
+                slot = int((start + step) % self.slots)
+                if slot != latest and slot not in held:
+                    break
+            self._slot_seq[slot] = -1  # Being written: readers skip it
+        self._writing = slot
+        return self._frames[slot]
+
+    def commit(self, timestamp: Optional[float] = None) -> int:
+        """
+        Publish the slot reserved by begin_write
+
+        Args:
+            timestamp: Capture time (default time.time())
+
+        Returns:
+            Sequence number of the published frame
+        """
+        slot = self._writing
+        if slot < 0:
+            raise RuntimeError("commit() without begin_write()")
+        with self.lock:
+            seq = int(self._header[_LATEST_SEQ]) + 1
+            self._timestamps[slot] = time.time() if timestamp is None else timestamp
+            self._slot_seq[slot] = seq
+            self._header[_LATEST_SLOT] = slot
+            self._header[_LATEST_SEQ] = seq
+        self._writing = -1
+        return seq
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """Copy a frame into the ring (for producers that cannot decode in place)"""
+        np.copyto(self.begin_write(), frame)
+        return self.commit(timestamp)
+
+    def acquire_latest(self, reader: int, after_seq: int = 0) -> Optional[FrameView]:
+        """
+        Hold the newest frame for a reader
+
+        Any slot the reader held before is released.
+
+        Args:
+            reader: Reader index (0 .. readers - 1)
+            after_seq: Only return a frame newer than this sequence number
+
+        Returns:
+            FrameView or None if there is no newer frame
+        """
+        with self.lock:
+            slot = int(self._header[_LATEST_SLOT])
+            seq = int(self._header[_LATEST_SEQ])
+            if slot < 0 or seq <= after_seq:
+                return None
+            self._held[reader] = slot
+            return FrameView(seq, float(self._timestamps[slot]), self._views[slot])
+
+    def acquire(self, reader: int, seq: int) -> Optional[FrameView]:
+        """
+        Hold a specific frame for a reader if it has not been overwritten
+
+        Args:
+            reader: Reader index
+            seq: Sequence number of the wanted frame
+
+        Returns:
+            FrameView or None if the frame is gone
+        """
+        with self.lock:
+            matches = np.flatnonzero(self._slot_seq == seq)
+            if not len(matches):
+                return None
+            slot = int(matches[0])
+            self._held[reader] = slot
+            return FrameView(seq, float(self._timestamps[slot]), self._views[slot])
+
+    def release(self, reader: int) -> None:
+        """Let the writer reuse the slot a reader holds"""
+        with self.lock:
+            self._held[reader] = -1
+
+    def close(self) -> None:
+        """Detach from the shared memory, removing it if this ring created it"""
+        self._frames = self._views = []
+        self._header = self._slot_seq = self._held = self._timestamps = None
+        try:
+            self.block.close()
+        except BufferError:
+            # A caller still holds a frame view; the mapping goes away with it
+            logger.warning("Frame ring closed while frame views are still in use")
+        if self._owner:
+            self.block.unlink()
+
+
+class RingCapture:
+    """
+    Camera reader that decodes straight into a FrameRing.
+
+    A capture thread asks OpenCV to decode each frame into the next free ring
+    slot, so frames are neither allocated nor copied per read. read() mirrors
+    cv2.VideoCapture.read() for a single consumer and returns a view that
+    stays valid until the next read(); the pipeline's inference, hand-off and
+    render stages hold their own reader slots instead.
+    """
+
+    READ_READER = 0
+    INFERENCE_READER = 1
+    HANDOFF_READER = 2  # Holds the frame of the newest result until the render stage takes it
+    RENDER_READER = 3
+    READERS = 4
+
+    def __init__(self, capture, config: Config):
+        self.capture = capture
+        self.config = config
+        self.dropped = 0
+        self.finished = False
+        self.last_timestamp = 0.0
+        # Called with the duration of every camera read
+        self.on_frame: Optional[Callable[[float], None]] = None
+        self._last_seq = 0
+        self._stop = threading.Event()
+        self._new_frame = threading.Condition()
+
+        ret, frame = capture.read()
+        if not ret:
+            raise RuntimeError("Could not read a frame to size the frame ring")
+        self.ring = FrameRing(frame.shape, max(config.frame_ring_slots, self.READERS + 2), self.READERS)
+        self.ring.write(frame)
+        self._thread = threading.Thread(target=self._capture_loop, name="visora-ring-capture", daemon=True)
+        self._thread.start()
+        logger.info(f"Frame ring started: {self.ring.slots} slots of {frame.shape}")
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            slot = self.ring.begin_write()
+            start = time.perf_counter()
+            ret, frame = self.capture.read(slot)
+            timestamp = time.time()
+            if not ret:
+                logger.info("Frame ring: capture source ended")
+                break
+            if frame.shape != slot.shape:
+                logger.error(f"Frame size changed from {slot.shape} to {frame.shape}; stopping frame ring")
+                break
+            if frame is not slot:
+                # The backend allocated a new frame instead of decoding in place
+                np.copyto(slot, frame)
+            duration = time.perf_counter() - start
+            REGISTRY.observe("capture_read", duration)
+            if self.on_frame is not None:
+                self.on_frame(duration)
+            self.ring.commit(timestamp)
+            with self._new_frame:
+                self._new_frame.notify_all()
+        with self._new_frame:
+            self.finished = True
+            self._new_frame.notify_all()
+
+    def wait_for_frame(self, after_seq: int, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a frame newer than after_seq is committed
+
+        Args:
+            after_seq: Sequence number the caller has already seen
+            timeout: Seconds to wait
+
+        Returns:
+            True if a newer frame is available (False once released)
+        """
+        ring = self.ring
+        if ring is None:
+            return False
+        with self._new_frame:
+            self._new_frame.wait_for(lambda: ring.latest_seq > after_seq or self.finished, timeout=timeout)
+            return ring.latest_seq > after_seq
+
+    def read_timestamped(self, timeout: float = 2.0) -> Tuple[bool, Optional[np.ndarray], float]:
+        """
+        Get the newest frame with its capture time, waiting for one newer than the last read
+
+        Args:
+            timeout: Seconds to wait for a new frame
+
+        Returns:
+            Tuple of (success, frame view valid until the next read, capture timestamp)
+        """
+        ring = self.ring
+        if ring is None or not self.wait_for_frame(self._last_seq, timeout=timeout):
+            return False, None, 0.0
+        view = ring.acquire_latest(self.READ_READER, self._last_seq)
+        if view is None:
+            return False, None, 0.0
+        if self._last_seq:
+            self.dropped += view.seq - self._last_seq - 1
+        self._last_seq = view.seq
+        self.last_timestamp = view.timestamp
+        return True, view.frame, view.timestamp
+
+    def read(self, image=None):
+        """
+        Get the newest frame, waiting for one newer than the last read
+
+        Args:
+            image: Ignored; accepted for cv2.VideoCapture compatibility
+
+        Returns:
+            Tuple of (success, frame view valid until the next read)
+        """
+        ret, frame, _ = self.read_timestamped()
+        return ret, frame
+
+    def isOpened(self) -> bool:
+        return self.capture.isOpened() and not self.finished
+
+    def get(self, prop_id):
+        return self.capture.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.capture.set(prop_id, value)
+
+    def release(self) -> None:
+        """Stop the capture thread, release the camera and free the ring"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        self.capture.release()
+        if self.ring is not None:
+            ring, self.ring = self.ring, None
+            ring.close()
+        with self._new_frame:
+            self.finished = True
+            self._new_frame.notify_all()
@@ -4,12 +4,18 @@ This system helps visually impaired users navigate their environment
 using real-time object detection and audio guidance.
 """
 
+import time
 import logging
 import argparse
-from app.config import Config
+from app.config import Config, parse_camera_source
 from app.vision import ObjectDetector
 from app.audio import AudioManager
 from app.navigation import NavigationAssistant
+from app.pipeline import DetectionPipeline
+from app.scheduler import AdaptiveScheduler
+from app.tracking import ObjectTracker
+from app.motion import MotionGate
+from app.metrics import REGISTRY, start_metrics
 
 # Configure logging
 logging.basicConfig(
@@ -23,9 +29,34 @@ def main():
     parser = argparse.ArgumentParser(description="Visora - Vision Assistance System")
     parser.add_argument(
         "--mode",
-        choices=["web", "cli"],
+        choices=["web", "cli", "multi", "batch"],
         default="web",
-        help="Run mode: web (Streamlit interface) or cli (command line)"
+        help="Run mode: web (Streamlit interface), cli (command line), multi (several sources, one model) "
+             "or batch (offline processing of recorded videos and image directories)"
+    )
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        help="Camera indices or video files for multi mode (default: CAMERA_SOURCES)"
+    )
+    parser.add_argument(
+        "--inputs",
+        nargs="+",
+        help="Video files, images or directories for batch mode"
+    )
+    parser.add_argument("--output", help="JSONL output file for batch mode (default: BATCH_OUTPUT)")
+    parser.add_argument("--workers", type=int, help="Inference workers for batch mode (default: BATCH_WORKERS)")
+    parser.add_argument("--stride", type=int, help="Process every Nth video frame in batch mode")
+    parser.add_argument(
+        "--pool",
+        choices=["threads", "processes"],
+        help="Batch mode workers: threads or processes with shared-memory frames (default: BATCH_POOL)"
+    )
+    parser.add_argument("--parquet", help="Also export batch results to this Parquet file (requires pyarrow)")
+    parser.add_argument(
+        "--no-video",
+        action="store_true",
+        help="CLI mode: skip drawing and showing the annotated video (audio guidance only)"
     )
     
     args = parser.parse_args()
@@ -33,11 +64,22 @@ def main():
     try:
         logger.info("Starting Visora vision assistance system")
         config = Config()
+        if args.no_video:
+            config.render_video = False
         
         if args.mode == "web":
             # Import and run web interface
             from app.web_interface import main as web_main
             web_main()
+        elif args.mode == "multi":
+            sources = [parse_camera_source(s) for s in args.sources] if args.sources else None
+            run_multi_camera(config, sources)
+        elif args.mode == "batch":
+            if not args.inputs:
+                parser.error("--mode batch requires --inputs")
+            if args.pool:
+                config.batch_pool = args.pool
+            run_batch(config, args.inputs, args.output, args.workers, args.stride, args.parquet)
         else:
             # Run CLI version
             run_cli_version(config)
@@ -56,45 +98,69 @@ def run_cli_version(config: Config):
     detector = ObjectDetector(config)
     audio_manager = AudioManager(config)
     navigation_assistant = NavigationAssistant(config)
+    if config.phrase_cache_prewarm:
+        audio_manager.prewarm_phrases(
+            detector.class_names, navigation_assistant.direction_labels, navigation_assistant.distance_labels
+        )
     
+    metrics_exporter = start_metrics(config)
     logger.info("System components initialized")
     logger.info("Starting camera feed...")
     
-    # Initialize camera
+    # Initialize camera: cached or probed backend, wrapped in a frame ring or a
+    # latest-frame reader that stamps each frame with its capture time
     import cv2
-    cap = cv2.VideoCapture(config.camera_source)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.frame_width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.frame_height)
+    cap = detector.initialize_camera()
+    if cap is None:
+        logger.error("Could not access the camera")
+        audio_manager.shutdown()
+        if metrics_exporter is not None:
+            metrics_exporter.stop()
+        return
+    
+    pipeline = DetectionPipeline(
+        config, detector, cap,
+        scheduler=AdaptiveScheduler(config),
+        tracker=ObjectTracker(config),
+        motion_gate=MotionGate(config) if config.motion_gating else None
+    )
+    pipeline.start()
     
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                logger.error("Failed to read frame from camera")
-                break
+        while pipeline.running:
+            result = pipeline.get_result(timeout=0.1)
+            if result is None:
+                pipeline.log_stats_if_due()
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
+            frame, detections, captured_at = result
+            render_start = time.perf_counter()
                 
-            # Detect objects
-            detections = detector.detect_objects(frame)
-            
-            # Draw detections on frame
-            annotated_frame = detector.draw_detections(frame, detections)
-            
-            # Display frame (optional)
-            cv2.imshow("Visora - Vision Assistance", annotated_frame)
+            if config.render_video:
+                # Draw detections into the renderer's reusable buffer
+                with REGISTRY.timer("draw"):
+                    annotated_frame = detector.renderer.render(frame, detections)
+                
+                # Display frame
+                with REGISTRY.timer("display"):
+                    cv2.imshow("Visora - Vision Assistance", annotated_frame)
             
             # Provide audio guidance
             if detections:
-                # Get navigation instruction
-                instruction = navigation_assistant.get_navigation_instruction(
-                    detections, frame.shape[1], frame.shape[0]
-                )
+                # Get navigation instruction from one pass over all detections
+                analysis = navigation_assistant.analyze(detections, frame.shape[1], frame.shape[0])
+                instruction = analysis.instruction
                 
                 # Announce via audio
-                audio_manager.announce_navigation(instruction)
+                audio_manager.announce_navigation(instruction, capture_time=captured_at)
                 
                 # Print to console
                 print(f"Navigation: {instruction}")
                 
+            pipeline.record_render(time.perf_counter() - render_start)
+            pipeline.log_stats_if_due()
+                
             # Break on 'q' key press
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
@@ -102,9 +168,53 @@ def run_cli_version(config: Config):
     except Exception as e:
         logger.error(f"Error in CLI mode: {e}")
     finally:
+        pipeline.stop()
+        audio_manager.shutdown()
+        if metrics_exporter is not None:
+            metrics_exporter.stop()
         cap.release()
         cv2.destroyAllWindows()
         logger.info("Application shutdown complete")
 
+def run_multi_camera(config: Config, sources=None):
+    """Run several camera or video sources against one shared detector"""
+    from app.multi_camera import MultiCameraRunner
+    
+    logger.info("Running multi-camera version of the application")
+    detector = ObjectDetector(config)
+    metrics_exporter = start_metrics(config)
+    
+    def print_instruction(stream, frame, detections, instruction):
+        if detections:
+            print(f"[stream {stream.stream_id}] Navigation: {instruction}")
+    
+    runner = MultiCameraRunner(config, detector, sources, on_result=print_instruction)
+    if runner.start() == 0:
+        logger.error("No sources could be opened")
+        runner.stop()
+        return
+        
+    try:
+        while runner.running:
+            time.sleep(0.5)
+            runner.log_stats_if_due()
+    finally:
+        runner.stop()
+        if metrics_exporter is not None:
+            metrics_exporter.stop()
+        logger.info("Application shutdown complete")
+
+def run_batch(config: Config, inputs, output=None, workers=None, stride=None, parquet=None):
+    """Run detection over recorded videos and image directories"""
+    from app.batch import BatchProcessor, export_parquet
+    
+    processor = BatchProcessor(config, output, workers, stride)
+    summary = processor.run(inputs)
+    print(f"Processed {summary['frames']} frames from {summary['sources']} sources "
+          f"at {summary['fps']:.1f} fps -> {summary['output']}")
+    if parquet:
+        rows = export_parquet(summary['output'], parquet)
+        print(f"Wrote {rows} rows to {parquet}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
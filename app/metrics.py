@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds, from 0.1 ms to 5 s
+BUCKETS = [
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5, 5.0
+]
+# The rolling window is kept as this many rotating slices
+WINDOW_SLICES = 6
+
+
+class RollingHistogram:
+    """
+    Fixed-bucket latency histogram over a rolling time window.
+
+    The window is split into WINDOW_SLICES slices that are recycled as time
+    moves on, so recording is a bisect and a few increments with no
+    per-sample storage. Lifetime bucket counts, count and sum are kept as
+    well; only those are monotonic, as Prometheus expects of a histogram.
+    """
+
+    def __init__(self, window: float):
+        self.slice_length = max(window, 1.0) / WINDOW_SLICES
+        self._slices = [[0] * (len(BUCKETS) + 1) for _ in range(WINDOW_SLICES)]
+        self._slice_ids = [0] * WINDOW_SLICES
+        self._lifetime = [0] * (len(BUCKETS) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        slice_id = int(time.monotonic() / self.slice_length)
+        index = slice_id % WINDOW_SLICES
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            if self._slice_ids[index] != slice_id:
+                self._slices[index] = [0] * (len(BUCKETS) + 1)
+                self._slice_ids[index] = slice_id
+            self._slices[index][bucket] += 1
+            self._lifetime[bucket] += 1
+            self.count += 1
+            self.total += seconds
+
+    def window_counts(self) -> List[int]:
+        """Per-bucket counts over the rolling window (last entry is +Inf)"""
+        current = int(time.monotonic() / self.slice_length)
+        counts = [0] * (len(BUCKETS) + 1)
+        with self._lock:
+            for slice_id, values in zip(self._slice_ids, self._slices):
+                if current - slice_id < WINDOW_SLICES:
+                    counts = [a + b for a, b in zip(counts, values)]
+        return counts
+
+    def lifetime_counts(self) -> List[int]:
+        """Per-bucket counts since the histogram was created (last entry is +Inf)"""
+        with self._lock:
+            return list(self._lifetime)
+
+    def percentile(self, p: float, counts: Optional[List[int]] = None) -> float:
+        """
+        Estimate a percentile of the rolling window
+
+        Args:
+            p: Percentile as a fraction (0.95 for p95)
+            counts: Precomputed window counts
+
+        Returns:
+            Upper bound of the bucket holding the percentile, in seconds
+        """
+        counts = counts if counts is not None else self.window_counts()
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = p * total
+        seen = 0
+        for bound, count in zip(BUCKETS + [float("inf")], counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float("inf") else BUCKETS[-1]
+        return BUCKETS[-1]
+
+
+class _Timer:
+    """Context manager recording its duration into a histogram"""
+
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Process-wide collection of per-stage latency histograms"""
+
+    def __init__(self, window: float = 60.0, enabled: bool = True):
+        self.window = window
+        self.enabled = enabled
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config: Config) -> None:
+        """Apply the metrics settings from the configuration"""
+        self.enabled = config.metrics_enabled
+        if config.metrics_window != self.window:
+            self.window = config.metrics_window
+            with self._lock:
+                self._histograms = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Record one duration for a stage
+
+        Args:
+            stage: Stage name, e.g. "capture_read"
+            seconds: Duration in seconds
+        """
+        if not self.enabled:
+            return
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, RollingHistogram(self.window))
+        histogram.observe(seconds)
+
+    def timer(self, stage: str):
+        """
+        Time a block of code
+
+        Args:
+            stage: Stage name
+
+        Returns:
+            Context manager that records the block's duration
+        """
+        return _Timer(self, stage) if self.enabled else _NULL_TIMER
+
+    def snapshot(self) -> Dict:
+        """
+        Get rolling-window statistics for every stage
+
+        Returns:
+            Dictionary keyed by stage with count, rate and p50/p95/p99 in ms
+        """
+        stats = {}
+        for stage, histogram in sorted(self._histograms.items()):
+            counts = histogram.window_counts()
+            window_count = sum(counts)
+            stats[stage] = {
+                'window_count': window_count,
+                'per_second': window_count / self.window,
+                'p50_ms': histogram.percentile(0.50, counts) * 1000,
+                'p95_ms': histogram.percentile(0.95, counts) * 1000,
+                'p99_ms': histogram.percentile(0.99, counts) * 1000,
+                'total_count': histogram.count,
+                'mean_ms': histogram.total / histogram.count * 1000 if histogram.count else 0.0
+            }
+        return stats
+
+    def render_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format
+
+        visora_stage_seconds is a cumulative histogram since startup, so
+        rate() and histogram_quantile() work on it; the rolling window is
+        exported separately as gauges.
+        """
+        histograms = sorted(self._histograms.items())
+        lines = [
+            "# HELP visora_stage_seconds Per-stage latency since startup",
+            "# TYPE visora_stage_seconds histogram"
+        ]
+        for stage, histogram in histograms:
+            counts = histogram.lifetime_counts()
+            cumulative = 0
+            for bound, count in zip(BUCKETS, counts):
+                cumulative += count
+                lines.append(f'visora_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'visora_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {cumulative}')
+            lines.append(f'visora_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+            lines.append(f'visora_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+
+        window_counts = {stage: histogram.window_counts() for stage, histogram in histograms}
+        lines += [
+            f"# HELP visora_stage_window_seconds Per-stage latency percentiles over the last {self.window:g} s",
+            "# TYPE visora_stage_window_seconds gauge"
+        ]
+        for stage, histogram in histograms:
+            for quantile in (0.5, 0.95, 0.99):
+                value = histogram.percentile(quantile, window_counts[stage])
+                lines.append(f'visora_stage_window_seconds{{stage="{stage}",quantile="{quantile}"}} {value}')
+        lines += [
+            f"# HELP visora_stage_window_count Per-stage samples over the last {self.window:g} s",
+            "# TYPE visora_stage_window_count gauge"
+        ]
+        for stage, _ in histograms:
+            lines.append(f'visora_stage_window_count{{stage="{stage}"}} {sum(window_counts[stage])}')
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry used by all instrumented stages
+REGISTRY = MetricsRegistry()
+
+
+class MetricsExporter:
+    """
+    Serves REGISTRY on a local /metrics endpoint and/or dumps it to JSON.
+
+    The HTTP server binds to 127.0.0.1 on config.metrics_port (0 disables
+    it); config.metrics_json_path, if set, is rewritten every
+    config.metrics_dump_interval seconds.
+    """
+
+    def __init__(self, config: Config, registry: MetricsRegistry = REGISTRY):
+        self.config = config
+        self.registry = registry
+        self.server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self) -> None:
+        if self.config.metrics_port:
+            registry = self.registry
+
+            class _Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] == "/metrics":
+                        body = registry.render_prometheus().encode("utf-8")
+                        content_type = "text/plain; version=0.0.4"
+                    elif self.path.split("?")[0] == "/metrics.json":
+                        body = json.dumps(registry.snapshot()).encode("utf-8")
+                        content_type = "application/json"
+                    else:
+                        self.send_error(404)
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            try:
+                self.server = ThreadingHTTPServer(("127.0.0.1", self.config.metrics_port), _Handler)
+                self.server.daemon_threads = True
+                thread = threading.Thread(target=self.server.serve_forever, name="visora-metrics", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+                logger.info(f"Metrics available at http://127.0.0.1:{self.config.metrics_port}/metrics")
+            except OSError as e:
+                logger.error(f"Could not start metrics endpoint on port {self.config.metrics_port}: {e}")
+                self.server = None
+
+        if self.config.metrics_json_path:
+            thread = threading.Thread(target=self._dump_loop, name="visora-metrics-dump", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _dump_loop(self):
+        while not self._stop.wait(self.config.metrics_dump_interval):
+            self.dump()
+
+    def dump(self) -> None:
+        """Write the current snapshot to config.metrics_json_path atomically"""
+        path = self.config.metrics_json_path
+        payload = {'timestamp': time.time(), 'stages': self.registry.snapshot()}
+        try:
+            temporary = f"{path}.tmp"
+            with open(temporary, "w") as f:
+                json.dump(payload, f, indent=2)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {path}: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.config.metrics_json_path:
+            self.dump()
+
+
+_exporter: Optional[MetricsExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def start_metrics(config: Config) -> Optional[MetricsExporter]:
+    """
+    Configure REGISTRY and start the exporter once per process
+
+    Safe to call repeatedly, e.g. on every Streamlit rerun.
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        The running exporter, or None if nothing is exported
+    """
+    global _exporter
+    REGISTRY.configure(config)
+    if not config.metrics_enabled or not (config.metrics_port or config.metrics_json_path):
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = MetricsExporter(config)
+            _exporter.start()
+    return _exporter
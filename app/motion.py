@@ -0,0 +1,96 @@
+import logging
+from typing import Dict, Optional
+import cv2
+import numpy as np
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """
+    Cheap change detector that decides whether a frame needs inference.
+
+    Frames are reduced to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame that went through the model. If the mean
+    absolute difference stays below config.motion_threshold the cached
+    detections are reused. Inference is still forced every
+    config.motion_max_skip frames so slow drift is never missed.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.reference: Optional[np.ndarray] = None
+        self.last_score = 0.0
+        self.checks = 0
+        self.skipped = 0
+        self._since_inference = 0
+
+    def reset(self) -> None:
+        """Forget the reference frame so the next frame always runs inference"""
+        self.reference = None
+        self._since_inference = 0
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        thumb_width = max(8, self.config.motion_downscale_width)
+        thumb_height = max(1, int(round(height * thumb_width / width)))
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+
+    def score(self, frame: np.ndarray) -> float:
+        """
+        Compute the change score of a frame against the reference
+
+        Args:
+            frame: Input BGR or grayscale frame
+
+        Returns:
+            Mean absolute difference in [0, 1]; 1.0 when there is no reference
+        """
+        return self._score_thumbnail(self._thumbnail(frame))
+
+    def _score_thumbnail(self, thumbnail: np.ndarray) -> float:
+        if self.reference is None or self.reference.shape != thumbnail.shape:
+            return 1.0
+        return float(cv2.absdiff(thumbnail, self.reference).mean()) / 255.0
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """
+        Decide whether a frame has changed enough to need inference
+
+        The frame becomes the new reference whenever inference is requested.
+
+        Args:
+            frame: Input BGR or grayscale frame
+
+        Returns:
+            True if detection should run on this frame
+        """
+        self.checks += 1
+        thumbnail = self._thumbnail(frame)
+        self.last_score = self._score_thumbnail(thumbnail)
+
+        if self.last_score >= self.config.motion_threshold or self._since_inference >= self.config.motion_max_skip:
+            self.reference = thumbnail
+            self._since_inference = 0
+            return True
+
+        self._since_inference += 1
+        self.skipped += 1
+        return False
+
+    def stats(self) -> Dict:
+        """
+        Get gating statistics
+
+        Returns:
+            Dictionary with frames checked, inferences avoided and the avoided ratio
+        """
+        return {
+            'checked': self.checks,
+            'skipped': self.skipped,
+            'skip_ratio': self.skipped / self.checks if self.checks else 0.0,
+            'last_score': self.last_score
+        }
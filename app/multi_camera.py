@@ -0,0 +1,278 @@
+import time
+import threading
+import logging
+from typing import Callable, Dict, List, Optional, Union
+import cv2
+import numpy as np
+from app.config import Config
+from app.vision import ObjectDetector
+from app.navigation import NavigationAssistant
+from app.detections import Detections
+from app.pipeline import StageStats
+from app.motion import MotionGate
+from app.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class CameraStream:
+    """
+    One input source of a MultiCameraRunner.
+
+    A reader thread keeps only the newest frame so a slow scheduler never
+    works through a backlog. Navigation state and stats are per stream.
+    """
+
+    def __init__(self, config: Config, stream_id: int, source: Union[int, str], weight: float = 1.0):
+        self.config = config
+        self.stream_id = stream_id
+        self.source = source
+        self.weight = max(weight, 0.0)
+        self.capture = None
+        self.navigation_assistant = NavigationAssistant(config)
+        self.motion_gate = MotionGate(config) if config.motion_gating else None
+        self.stats = {
+            'capture': StageStats(f"stream{stream_id}-capture"),
+            'inference': StageStats(f"stream{stream_id}-inference")
+        }
+        self.dropped = 0
+        self.latest_detections = Detections.empty()
+        self.latest_instruction = ""
+        self.finished = False
+        self._current_weight = 0.0
+        self._lock = threading.Lock()
+        self._frame = None
+        self._frame_time = 0.0
+        self._thread = None
+
+    def open(self, detector: ObjectDetector) -> bool:
+        """
+        Open the source; camera indices use the detector's backend probing
+
+        Args:
+            detector: Shared detector providing initialize_camera
+
+        Returns:
+            True if the source was opened
+        """
+        if isinstance(self.source, int):
+            # The stream has its own reader thread, and frames are kept past the
+            # next read, so they cannot be ring views
+            self.capture = detector.initialize_camera(self.source, frame_ring=False, latest_frame=False)
+        else:
+            self.capture = cv2.VideoCapture(self.source)
+            if not self.capture.isOpened():
+                self.capture.release()
+                self.capture = None
+        if self.capture is None:
+            logger.error(f"Stream {self.stream_id}: could not open source {self.source}")
+            self.finished = True
+            return False
+        logger.info(f"Stream {self.stream_id}: opened source {self.source}")
+        return True
+
+    def start(self, stop_event: threading.Event) -> None:
+        """Start the reader thread"""
+        self._thread = threading.Thread(
+            target=self._read_loop, args=(stop_event,), name=f"visora-stream{self.stream_id}", daemon=True
+        )
+        self._thread.start()
+
+    def join(self, timeout: float = 2.0) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def release(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def _read_loop(self, stop_event: threading.Event):
+        while not stop_event.is_set():
+            start = time.perf_counter()
+            ret, frame = self.capture.read()
+            if not ret:
+                logger.info(f"Stream {self.stream_id}: source {self.source} ended")
+                break
+            duration = time.perf_counter() - start
+            self.stats['capture'].record(duration)
+            REGISTRY.observe("capture_read", duration)
+            with self._lock:
+                if self._frame is not None:
+                    self.dropped += 1
+                self._frame = frame
+                self._frame_time = time.time()
+        self.finished = True
+
+    def take_frame(self):
+        """
+        Take the newest unprocessed frame, if any
+
+        Returns:
+            Tuple of (frame, capture_timestamp) or None
+        """
+        with self._lock:
+            if self._frame is None:
+                return None
+            frame, timestamp = self._frame, self._frame_time
+            self._frame = None
+            return frame, timestamp
+
+    @property
+    def has_frame(self) -> bool:
+        with self._lock:
+            return self._frame is not None
+
+
+class MultiCameraRunner:
+    """
+    Serves several camera or video sources from one shared ObjectDetector.
+
+    A single scheduler thread owns the model, so there is one copy of the
+    weights and no inference threads competing for cores. Streams with a
+    fresh frame are picked by smooth weighted round-robin, and up to
+    config.batch_size of them are run through one batched forward pass.
+    """
+
+    def __init__(self, config: Config, detector: ObjectDetector, sources: Optional[List[Union[int, str]]] = None,
+                 weights: Optional[List[float]] = None,
+                 on_result: Optional[Callable[[CameraStream, np.ndarray, Detections, str], None]] = None):
+        self.config = config
+        self.detector = detector
+        sources = sources if sources is not None else self.config.camera_sources
+        weights = weights if weights is not None else self.config.source_weights
+        if weights and len(weights) != len(sources):
+            logger.warning("Source weights do not match sources; using equal weights")
+            weights = []
+        self.streams = [
+            CameraStream(config, i, source, weights[i] if weights else 1.0)
+            for i, source in enumerate(sources)
+        ]
+        self.on_result = on_result
+        self.stop_event = threading.Event()
+        self._scheduler = None
+        self._last_report = time.perf_counter()
+
+    def start(self) -> int:
+        """
+        Open all sources and start the reader and scheduler threads
+
+        Returns:
+            Number of sources opened successfully
+        """
+        self.stop_event.clear()
+        opened = 0
+        for stream in self.streams:
+            if stream.open(self.detector):
+                stream.start(self.stop_event)
+                opened += 1
+        self._scheduler = threading.Thread(target=self._schedule_loop, name="visora-scheduler", daemon=True)
+        self._scheduler.start()
+        logger.info(f"Multi-camera runner started with {opened}/{len(self.streams)} sources")
+        return opened
+
+    def stop(self) -> None:
+        """Stop all threads and release every source"""
+        self.stop_event.set()
+        if self._scheduler is not None:
+            self._scheduler.join(timeout=2.0)
+            self._scheduler = None
+        for stream in self.streams:
+            stream.join()
+            stream.release()
+        logger.info("Multi-camera runner stopped")
+
+    @property
+    def running(self) -> bool:
+        if self.stop_event.is_set():
+            return False
+        return any(not stream.finished or stream.has_frame for stream in self.streams)
+
+    def _pick_streams(self) -> List[CameraStream]:
+        """Pick up to batch_size ready streams by smooth weighted round-robin"""
+        ready = [s for s in self.streams if s.weight > 0 and s.has_frame]
+        picked = []
+        while ready and len(picked) < max(1, self.config.batch_size):
+            total = sum(s.weight for s in ready)
+            for stream in ready:
+                stream._current_weight += stream.weight
+            best = max(ready, key=lambda s: s._current_weight)
+            best._current_weight -= total
+            picked.append(best)
+            ready.remove(best)
+        return picked
+
+    def _schedule_loop(self):
+        while not self.stop_event.is_set():
+            picked = self._pick_streams()
+            batch = []
+            for stream in picked:
+                item = stream.take_frame()
+                if item is None:
+                    continue
+                if stream.motion_gate is not None and not stream.motion_gate.should_infer(item[0]):
+                    # Unchanged scene: the stream keeps its cached detections
+                    continue
+                batch.append((stream, item[0]))
+            if not batch:
+                if all(stream.finished and not stream.has_frame for stream in self.streams):
+                    break
+                if not picked:
+                    time.sleep(0.002)
+                continue
+
+            start = time.perf_counter()
+            frames = [frame for _, frame in batch]
+            if len(frames) == 1:
+                results = [self.detector.detect_objects_array(frames[0])]
+            else:
+                results = self.detector.detect_batch_array(frames)
+            per_frame = (time.perf_counter() - start) / len(frames)
+            REGISTRY.observe("detect", per_frame)
+
+            for (stream, frame), detections in zip(batch, results):
+                stream.stats['inference'].record(per_frame)
+                instruction = stream.navigation_assistant.get_navigation_instruction(
+                    detections, frame.shape[1], frame.shape[0]
+                )
+                stream.latest_detections = detections
+                stream.latest_instruction = instruction
+                if self.on_result is not None:
+                    try:
+                        self.on_result(stream, frame, detections, instruction)
+                    except Exception as e:
+                        logger.error(f"Stream {stream.stream_id}: result callback failed: {e}")
+
+    def report(self) -> Dict[int, Dict]:
+        """
+        Collect per-stream capture/inference FPS and drop counts
+
+        Returns:
+            Dictionary keyed by stream id
+        """
+        report = {}
+        for stream in self.streams:
+            report[stream.stream_id] = {
+                'source': stream.source,
+                'capture': stream.stats['capture'].snapshot(),
+                'inference': stream.stats['inference'].snapshot(),
+                'dropped': stream.dropped,
+                'motion': stream.motion_gate.stats() if stream.motion_gate is not None else None,
+                'instruction': stream.latest_instruction
+            }
+        return report
+
+    def log_stats_if_due(self) -> None:
+        """Log a stats line per stream once every configured interval"""
+        now = time.perf_counter()
+        if now - self._last_report < self.config.pipeline_stats_interval:
+            return
+        self._last_report = now
+        for stream_id, stats in self.report().items():
+            logger.info(
+                f"Stream {stream_id} ({stats['source']}): capture {stats['capture']['fps']:.1f} fps, "
+                f"inference {stats['inference']['fps']:.1f} fps/{stats['inference']['latency_ms']:.1f} ms, "
+                f"dropped {stats['dropped']}"
+                + (f", motion skipped {stats['motion']['skip_ratio']:.0%}" if stats['motion'] else "")
+            )
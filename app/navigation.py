@@ -1,10 +1,43 @@
-import math
+import time
 import logging
-from typing import Tuple, List, Dict
+from collections import OrderedDict
+import numpy as np
+from typing import Tuple, List, Dict, Union, Optional
 from app.config import Config
+from app.detections import Detections
 
 logger = logging.getLogger(__name__)
 
+# Lookup images kept per (width, height, sectors, threshold); one per active resolution is typical
+LOOKUP_CACHE_SIZE = 4
+# Lookup image packing: distance bucket in the top two bits, sector index below
+SECTOR_MASK = 0x3F
+BUCKET_SHIFT = 6
+
+class NavigationAnalysis:
+    """
+    Direction, distance and priority of every detection in a frame.
+
+    Produced by NavigationAssistant.analyze in one vectorized pass; all
+    arrays are aligned with the analyzed detections.
+    """
+    
+    def __init__(self, detections: Detections, sector_indices: np.ndarray, distance_buckets: np.ndarray,
+                 distances: np.ndarray, directions: np.ndarray, distance_labels: np.ndarray,
+                 priority: np.ndarray, instruction: str):
+        self.detections = detections
+        self.sector_indices = sector_indices  # Index into direction_labels (0 for "center")
+        self.distance_buckets = distance_buckets  # Index into distance_labels
+        self.distances = distances  # Pixel distance from the frame center
+        self.areas = detections.areas
+        self.directions = directions
+        self.distance_labels = distance_labels
+        self.priority = priority  # Detection indices, most important first
+        self.instruction = instruction
+        
+    def __len__(self) -> int:
+        return len(self.detections)
+
 class NavigationAssistant:
     """Navigation assistant for providing directional guidance"""
     
@@ -14,6 +47,121 @@ class NavigationAssistant:
             "center", "front-right", "right", "back-right",
             "back", "back-left", "left", "front-left"
         ]
+        self.distance_labels = ["very close", "close", "moderate distance", "far away"]
+        # Last announcement time per tracked object (or per label when untracked)
+        self.last_announced = {}
+        self._lookup_tables = OrderedDict()
+        
+    def should_announce(self, detection: Dict, now: Optional[float] = None) -> bool:
+        """
+        Check the announcement cooldown for a detection and start a new one if it has expired
+        
+        Cooldowns are keyed by track id, so two different people each get
+        announced; detections without a track id fall back to their label.
+        
+        Args:
+            detection: Detected object, optionally carrying a 'track_id'
+            now: Current time in seconds (default time.time())
+            
+        Returns:
+            True if the detection should be announced now
+        """
+        now = time.time() if now is None else now
+        track_id = detection.get('track_id')
+        key = ('track', track_id) if track_id is not None else ('label', detection['label'])
+        
+        last = self.last_announced.get(key)
+        if last is not None and now - last <= self.config.announcement_cooldown:
+            return False
+            
+        self.last_announced[key] = now
+        # Forget objects whose cooldown has long expired so the dict stays small
+        if len(self.last_announced) > 256:
+            cutoff = now - self.config.announcement_cooldown
+            self.last_announced = {k: t for k, t in self.last_announced.items() if t > cutoff}
+        return True
+        
+    def _classify(self, offset_x: np.ndarray, offset_y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sector index and distance bucket for offsets from the frame center
+        
+        Args:
+            offset_x: X offsets in pixels
+            offset_y: Y offsets in pixels (image coordinates, pointing down)
+            
+        Returns:
+            Tuple of (sector_indices, distance_buckets) arrays
+        """
+        threshold = self.config.object_distance_threshold
+        distances = np.hypot(offset_x, offset_y)
+        distance_buckets = np.searchsorted([threshold, threshold * 2, threshold * 4], distances, side='right')
+        
+        # Angle in degrees (0° is right, counter-clockwise); negative y because image coordinates go down
+        angles = np.degrees(np.arctan2(-offset_y, offset_x)) % 360
+        sector_size = 360 / self.config.direction_sectors
+        sector_indices = ((angles + sector_size / 2) // sector_size).astype(np.int64) % self.config.direction_sectors
+        sector_indices[(np.abs(offset_x) < threshold) & (np.abs(offset_y) < threshold)] = 0
+        return sector_indices, distance_buckets
+        
+    def lookup_table(self, frame_width: int, frame_height: int) -> Optional[np.ndarray]:
+        """
+        Get the cached sector/distance lookup image for a frame size
+        
+        Each pixel holds (distance_bucket << 6) | sector_index for an object
+        centered there, so classifying a center is a single array read.
+        
+        Args:
+            frame_width: Width of the frame
+            frame_height: Height of the frame
+            
+        Returns:
+            (height, width) uint8 array, or None if the sector count does not fit the packing
+        """
+        if self.config.direction_sectors > SECTOR_MASK + 1:
+            return None
+        key = (frame_width, frame_height, self.config.direction_sectors, self.config.object_distance_threshold)
+        table = self._lookup_tables.get(key)
+        if table is not None:
+            self._lookup_tables.move_to_end(key)
+            return table
+            
+        offset_x = (np.arange(frame_width) - frame_width // 2).astype(np.float64)[None, :]
+        offset_y = (np.arange(frame_height) - frame_height // 2).astype(np.float64)[:, None]
+        offset_x, offset_y = np.broadcast_arrays(offset_x, offset_y)
+        sectors, buckets = self._classify(offset_x, offset_y)
+        table = ((buckets << BUCKET_SHIFT) | sectors).astype(np.uint8)
+        
+        self._lookup_tables[key] = table
+        if len(self._lookup_tables) > LOOKUP_CACHE_SIZE:
+            self._lookup_tables.popitem(last=False)
+        logger.debug(f"Built navigation lookup table for {frame_width}x{frame_height}")
+        return table
+        
+    def classify_centers(self, centers: np.ndarray, frame_width: int, frame_height: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sector index and distance bucket for N object centers
+        
+        Centers inside the frame are read from the lookup table; any outside
+        it fall back to the trigonometric path.
+        
+        Args:
+            centers: (N, 2) integer pixel centers
+            frame_width: Width of the frame
+            frame_height: Height of the frame
+            
+        Returns:
+            Tuple of (sector_indices, distance_buckets) arrays
+        """
+        centers = np.asarray(centers).reshape(-1, 2)
+        table = self.lookup_table(frame_width, frame_height)
+        x = centers[:, 0].astype(np.int64)
+        y = centers[:, 1].astype(np.int64)
+        inside = (x >= 0) & (x < frame_width) & (y >= 0) & (y < frame_height)
+        if table is None or not inside.all():
+            offsets = centers - (frame_width // 2, frame_height // 2)
+            return self._classify(offsets[:, 0].astype(np.float64), offsets[:, 1].astype(np.float64))
+        codes = table[y, x]
+        return (codes & SECTOR_MASK).astype(np.int64), (codes >> BUCKET_SHIFT).astype(np.int64)
         
     def calculate_direction(self, center_x: int, center_y: int, frame_width: int, frame_height: int) -> Tuple[str, str]:
         """
@@ -28,87 +176,70 @@ class NavigationAssistant:
         Returns:
             Tuple of (direction_label, distance_description)
         """
-        # Calculate center of frame
-        frame_center_x = frame_width // 2
-        frame_center_y = frame_height // 2
-        
-        # Calculate offset from center
-        offset_x = center_x - frame_center_x
-        offset_y = center_y - frame_center_y
-        
-        # Calculate distance from center
-        distance = math.sqrt(offset_x**2 + offset_y**2)
-        
-        # Determine distance description
-        if distance < self.config.object_distance_threshold:
-            distance_desc = "very close"
-        elif distance < self.config.object_distance_threshold * 2:
-            distance_desc = "close"
-        elif distance < self.config.object_distance_threshold * 4:
-            distance_desc = "moderate distance"
-        else:
-            distance_desc = "far away"
+        sectors, buckets = self.classify_centers(np.array([[center_x, center_y]]), frame_width, frame_height)
+        direction_label = self.direction_labels[int(sectors[0])]
+        distance_desc = self.distance_labels[int(buckets[0])]
+        
+        return direction_label, distance_desc
+        
+    def analyze(self, detections: Union[List[Dict], Detections], frame_width: int, frame_height: int) -> NavigationAnalysis:
+        """
+        Compute direction, distance and priority for all detections at once
+        
+        Same geometry as calculate_direction, read for every center from the
+        cached lookup table in one NumPy pass. Persons come first in the priority ranking, closest first,
+        followed by other objects from largest to smallest.
+        
+        Args:
+            detections: List of detected objects or a Detections object
+            frame_width: Width of the frame
+            frame_height: Height of the frame
             
-        # Handle special case for center
-        if abs(offset_x) < self.config.object_distance_threshold and abs(offset_y) < self.config.object_distance_threshold:
-            return "center", distance_desc
+        Returns:
+            NavigationAnalysis aligned with the detections
+        """
+        if not isinstance(detections, Detections):
+            detections = Detections.from_list(detections)
             
-        # Calculate angle in degrees (0° is right, counter-clockwise)
-        angle = math.degrees(math.atan2(-offset_y, offset_x))  # Negative y because image coordinates go down
-        angle = angle % 360  # Normalize to 0-360
+        sector_indices, distance_buckets = self.classify_centers(detections.centers, frame_width, frame_height)
+        offsets = detections.centers.reshape(-1, 2) - (frame_width // 2, frame_height // 2)
+        distances = np.hypot(offsets[:, 0], offsets[:, 1])
         
-        # Divide circle into sectors
-        sector_size = 360 / self.config.direction_sectors
-        sector_index = int((angle + sector_size / 2) // sector_size) % self.config.direction_sectors
+        persons = detections.labels == 'person'
+        # lexsort sorts by the last key first: persons, then distance for persons, area for the rest
+        priority = np.lexsort((np.where(persons, distances, -detections.areas), ~persons))
         
-        direction_label = self.direction_labels[sector_index]
+        directions = np.asarray(self.direction_labels, dtype=object)[sector_indices]
+        distance_labels = np.asarray(self.distance_labels, dtype=object)[distance_buckets]
         
-        return direction_label, distance_desc
+        if not len(detections):
+            instruction = "No objects detected"
+        else:
+            top = int(priority[0])
+            if not persons[top]:
+                instruction = f"Largest object is {detections.labels[top]} at {directions[top]}"
+            elif sector_indices[top] == 0:
+                instruction = "Person directly ahead"
+            else:
+                instruction = f"Person detected at {directions[top]}"
+                
+        return NavigationAnalysis(
+            detections, sector_indices, distance_buckets, distances,
+            directions, distance_labels, priority, instruction
+        )
         
-    def get_navigation_instruction(self, detections: List[Dict], frame_width: int, frame_height: int) -> str:
+    def get_navigation_instruction(self, detections: Union[List[Dict], Detections], frame_width: int, frame_height: int) -> str:
         """
         Generate navigation instruction based on detected objects
         
         Args:
-            detections: List of detected objects
+            detections: List of detected objects or a Detections object
             frame_width: Width of the frame
             frame_height: Height of the frame
             
         Returns:
             Navigation instruction
         """
-        if not detections:
+        if not len(detections):
             return "No objects detected"
-            
-        # Prioritize person detection for navigation
-        persons = [d for d in detections if d['label'] == 'person']
-        if persons:
-            # Get closest person
-            closest_person = min(persons, key=lambda p: 
-                                math.sqrt((p['center'][0] - frame_width//2)**2 + 
-                                         (p['center'][1] - frame_height//2)**2))
-            
-            direction, distance = self.calculate_direction(
-                closest_person['center'][0],
-                closest_person['center'][1],
-                frame_width,
-                frame_height
-            )
-            
-            if direction == "center":
-                return "Person directly ahead"
-            else:
-                return f"Person detected at {direction}"
-                
-        # If no persons, prioritize large objects
-        largest_object = max(detections, key=lambda d: 
-                            (d['bbox'][2] - d['bbox'][0]) * (d['bbox'][3] - d['bbox'][1]))
-        
-        direction, distance = self.calculate_direction(
-            largest_object['center'][0],
-            largest_object['center'][1],
-            frame_width,
-            frame_height
-        )
-        
-        return f"Largest object is {largest_object['label']} at {direction}"
\ No newline at end of file
+        return self.analyze(detections, frame_width, frame_height).instruction
\ No newline at end of file
@@ -0,0 +1,315 @@
+import time
+import queue
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.config import Config
+from app.vision import ObjectDetector
+from app.scheduler import AdaptiveScheduler
+from app.tracking import ObjectTracker
+from app.motion import MotionGate
+from app.metrics import REGISTRY
+from app.frame_ring import RingCapture
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """Thread-safe throughput counter for a single pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._count = 0
+        self._busy_time = 0.0
+        self._window_start = time.perf_counter()
+        self.total = 0
+
+    def record(self, duration: float) -> None:
+        """
+        Record one processed item
+
+        Args:
+            duration: Time spent processing the item in seconds
+        """
+        with self._lock:
+            self._count += 1
+            self._busy_time += duration
+            self.total += 1
+
+    def snapshot(self, reset: bool = True) -> Dict:
+        """
+        Get FPS and mean processing time since the last snapshot
+
+        Args:
+            reset: Start a new measurement window after reading
+
+        Returns:
+            Dictionary with fps, mean latency in ms and total item count
+        """
+        with self._lock:
+            now = time.perf_counter()
+            elapsed = max(now - self._window_start, 1e-6)
+            stats = {
+                'fps': self._count / elapsed,
+                'latency_ms': (self._busy_time / self._count * 1000) if self._count else 0.0,
+                'total': self.total
+            }
+            if reset:
+                self._count = 0
+                self._busy_time = 0.0
+                self._window_start = now
+            return stats
+
+
+def put_latest(target: queue.Queue, item) -> bool:
+    """
+    Put an item on a bounded queue, evicting the oldest entry when full
+
+    Args:
+        target: Bounded queue to put the item on
+        item: Item to enqueue
+
+    Returns:
+        True if an older item was dropped to make room
+    """
+    dropped = False
+    while True:
+        try:
+            target.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                target.get_nowait()
+                dropped = True
+            except queue.Empty:
+                pass
+
+
+class DetectionPipeline:
+    """
+    Staged capture -> inference pipeline connected by bounded queues.
+
+    Capture and inference each run on their own thread. The consumer (render and
+    announce stage) pulls results with get_result() on the calling thread, which
+    keeps OpenCV GUI calls on the main thread. When a downstream stage falls
+    behind, the oldest queued item is dropped so the newest frame always wins.
+
+    With a RingCapture the camera already decodes on its own thread into a
+    shared-memory ring: inference reads the newest slot in place and only
+    sequence numbers travel to the render stage, which looks the frame up in
+    the ring again. The newest result's slot stays held until the render
+    stage takes it; an older queued result whose frame has been overwritten
+    is dropped rather than drawn over a different frame.
+    """
+
+    def __init__(self, config: Config, detector: ObjectDetector, capture,
+                 scheduler: Optional[AdaptiveScheduler] = None, tracker: Optional[ObjectTracker] = None,
+                 motion_gate: Optional[MotionGate] = None):
+        self.config = config
+        self.detector = detector
+        self.capture = capture
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self.motion_gate = motion_gate
+        self.ring_capture = capture if isinstance(capture, RingCapture) else None
+        queue_size = max(1, self.config.pipeline_queue_size)
+        self.frame_queue = queue.Queue(maxsize=queue_size)
+        self.result_queue = queue.Queue(maxsize=queue_size)
+        self.stats = {
+            'capture': StageStats('capture'),
+            'inference': StageStats('inference'),
+            'render': StageStats('render')
+        }
+        self.dropped = {'capture': 0, 'inference': 0}
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+        self._last_report = time.perf_counter()
+
+    def start(self) -> None:
+        """Start the capture and inference threads"""
+        self.stop_event.clear()
+        self.threads = [threading.Thread(target=self._inference_loop, name="visora-inference", daemon=True)]
+        if self.ring_capture is not None:
+            self.ring_capture.on_frame = self.stats['capture'].record
+        else:
+            self.threads.append(threading.Thread(target=self._capture_loop, name="visora-capture", daemon=True))
+        for thread in self.threads:
+            thread.start()
+        logger.info("Detection pipeline started")
+
+    def stop(self) -> None:
+        """Signal all stages to stop and wait for the worker threads"""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        self.threads = []
+        logger.info("Detection pipeline stopped")
+
+    @property
+    def running(self) -> bool:
+        return not self.stop_event.is_set()
+
+    def _capture_loop(self):
+        """Read frames from the camera and hand the newest one to inference"""
+        # Threaded cameras stamp each frame when it is captured and time their own reads
+        timestamped = hasattr(self.capture, "read_timestamped")
+        while not self.stop_event.is_set():
+            start = time.perf_counter()
+            if timestamped:
+                ret, frame, timestamp = self.capture.read_timestamped()
+            else:
+                ret, frame = self.capture.read()
+                timestamp = time.time()
+            if not ret:
+                logger.error("Failed to read frame from camera")
+                self.stop_event.set()
+                break
+            duration = time.perf_counter() - start
+            self.stats['capture'].record(duration)
+            if not timestamped:
+                REGISTRY.observe("capture_read", duration)
+            if put_latest(self.frame_queue, (frame, timestamp)):
+                self.dropped['capture'] += 1
+
+    def _next_frame(self, last_seq: int):
+        """
+        Get the next frame for inference
+
+        Args:
+            last_seq: Ring sequence number of the previous frame (ring mode only)
+
+        Returns:
+            Tuple of (frame, capture_timestamp, ring sequence or None), or None on timeout
+        """
+        if self.ring_capture is None:
+            try:
+                frame, timestamp = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                return None
+            return frame, timestamp, None
+
+        ring = self.ring_capture.ring
+        if not self.ring_capture.wait_for_frame(last_seq, timeout=0.1):
+            if self.ring_capture.finished:
+                logger.error("Failed to read frame from camera")
+                self.stop_event.set()
+            return None
+        view = ring.acquire_latest(RingCapture.INFERENCE_READER, last_seq)
+        if view is None:
+            return None
+        if last_seq:
+            self.dropped['capture'] += view.seq - last_seq - 1
+        return view.frame, view.timestamp, view.seq
+
+    def _inference_loop(self):
+        """Run detection on queued frames and publish the results"""
+        detections = []
+        last_seq = 0
+        while not self.stop_event.is_set():
+            item = self._next_frame(last_seq)
+            if item is None:
+                continue
+            frame, timestamp, seq = item
+            if seq is not None:
+                last_seq = seq
+            run_detection = self.scheduler is None or self.scheduler.begin_frame()
+            if run_detection and (self.motion_gate is None or self.motion_gate.should_infer(frame)):
+                start = time.perf_counter()
+                if self.tracker is not None:
+                    detections = self.tracker.update(self.detector.detect_objects_array(frame)).to_list()
+                else:
+                    detections = self.detector.detect_objects(frame)
+                duration = time.perf_counter() - start
+                self.stats['inference'].record(duration)
+                REGISTRY.observe("detect", duration)
+                if self.scheduler is not None:
+                    self.scheduler.record_inference(duration)
+            elif not run_detection and self.tracker is not None:
+                # Skipped frames extrapolate tracked boxes
+                detections = self.tracker.predict().to_list()
+            # Frames gated out by motion (or skipped without a tracker) reuse the last detections
+            if self.scheduler is not None:
+                self.scheduler.end_frame()
+            # In ring mode only the sequence number is handed on; the frame stays in the ring,
+            # held for the render stage so it cannot be overwritten before it is drawn
+            if seq is not None:
+                self.ring_capture.ring.acquire(RingCapture.HANDOFF_READER, seq)
+            result = (None, detections, timestamp, seq) if seq is not None else (frame, detections, timestamp, None)
+            if put_latest(self.result_queue, result):
+                self.dropped['inference'] += 1
+
+    def get_result(self, timeout: float = 0.1) -> Optional[Tuple[np.ndarray, List[Dict], float]]:
+        """
+        Get the next inference result
+
+        In ring mode the frame is a read-only view into the ring that stays
+        valid until the next call.
+
+        Args:
+            timeout: Seconds to wait for a result
+
+        Returns:
+            Tuple of (frame, detections, capture_timestamp) or None on timeout,
+            or if the result's frame has already been overwritten
+        """
+        try:
+            frame, detections, timestamp, seq = self.result_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if seq is not None:
+            view = self.ring_capture.ring.acquire(RingCapture.RENDER_READER, seq)
+            if view is None:
+                # Never pair these detections with a newer frame
+                self.dropped['inference'] += 1
+                return None
+            frame = view.frame
+        return frame, detections, timestamp
+
+    def record_render(self, duration: float) -> None:
+        """
+        Record time spent in the render/announce stage
+
+        Args:
+            duration: Time spent rendering one result in seconds
+        """
+        self.stats['render'].record(duration)
+
+    def report(self) -> Dict:
+        """
+        Collect per-stage FPS, latency, queue depth and drop counts
+
+        Returns:
+            Dictionary of stage statistics
+        """
+        report = {name: stats.snapshot() for name, stats in self.stats.items()}
+        report['capture']['queue_depth'] = self.frame_queue.qsize()
+        # Frames a threaded camera replaced before the capture stage took them count as dropped too
+        camera_dropped = getattr(self.capture, "dropped", 0) if self.ring_capture is None else 0
+        report['capture']['dropped'] = self.dropped['capture'] + camera_dropped
+        report['inference']['queue_depth'] = self.result_queue.qsize()
+        report['inference']['dropped'] = self.dropped['inference']
+        if self.scheduler is not None:
+            report['inference']['interval'] = self.scheduler.interval
+        if self.motion_gate is not None:
+            report['inference']['motion_skip_ratio'] = self.motion_gate.stats()['skip_ratio']
+        return report
+
+    def log_stats_if_due(self) -> None:
+        """Log a stats line once every configured interval"""
+        now = time.perf_counter()
+        if now - self._last_report < self.config.pipeline_stats_interval:
+            return
+        self._last_report = now
+        report = self.report()
+        logger.info(
+            "Pipeline stats: " + ", ".join(
+                f"{name} {stats['fps']:.1f} fps/{stats['latency_ms']:.1f} ms"
+                + (f" (queue {stats['queue_depth']}, dropped {stats['dropped']})" if 'queue_depth' in stats else "")
+                for name, stats in report.items()
+            )
+            + (f", detection interval {report['inference']['interval']}" if 'interval' in report['inference'] else "")
+            + (f", motion skipped {report['inference']['motion_skip_ratio']:.0%}"
+               if 'motion_skip_ratio' in report['inference'] else "")
+        )
@@ -0,0 +1,286 @@
+import os
+import copy
+import queue
+import threading
+import logging
+import itertools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from app.config import Config
+from app.detections import Detections
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by the native thread pools of torch, OpenMP and BLAS
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Detector created in the parent before forking, shared copy-on-write with the workers
+_FORK_DETECTOR = None
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a shared memory block created by the pool
+
+    Workers share the parent's resource tracker, so attaching does not
+    transfer ownership; on Python 3.13+ tracking is skipped altogether.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(config: Config, threads: int, block_name: str, tasks, results):
+    """Worker process: load a detector and run it on frames in shared memory"""
+    try:
+        import cv2
+        cv2.setNumThreads(1)  # OpenCV threads would compete with the inference threads
+        if _FORK_DETECTOR is not None:
+            detector = _FORK_DETECTOR
+            if config.inference_backend == "torch":
+                # torch rebuilds its intra-op pool after fork with its default size
+                import torch
+                torch.set_num_threads(threads)
+        else:
+            from app.vision import ObjectDetector
+            detector = ObjectDetector(config)
+        block = attach_shared_memory(block_name)
+    except Exception as e:
+        results.put(("error", os.getpid(), f"{type(e).__name__}: {e}"))
+        return
+    results.put(("ready", os.getpid(), None))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            task_id, offset, shape = task
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=block.buf, offset=offset)
+            try:
+                detections = detector.detect_objects_array(frame)
+                results.put(("result", task_id, detections))
+            except Exception as e:
+                results.put(("failed", task_id, f"{type(e).__name__}: {e}"))
+            del frame
+    finally:
+        block.close()
+
+
+class ProcessInferencePool:
+    """
+    Runs ObjectDetector inference in several worker processes.
+
+    Frames are copied once into preallocated slots of a shared memory block
+    and only the slot offset and shape are sent to a worker, so no image is
+    pickled. Each worker holds its own model (or, with the fork start method,
+    shares the parent's copy-on-write) and gets cpu_count / workers native
+    threads so the processes do not oversubscribe the cores: the budget is
+    passed to each backend's own setting (torch threads, ONNX Runtime
+    intra-op threads, OpenVINO INFERENCE_NUM_THREADS) through
+    config.inference_threads, and the OpenMP/BLAS variables are set in the
+    environment the workers are started with. Results are released in
+    submission order per stream.
+    """
+
+    def __init__(self, config: Config, workers: Optional[int] = None,
+                 max_frame_shape: Optional[Tuple[int, int, int]] = None):
+        self.config = config
+        self.workers = workers or config.process_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.threads_per_worker = config.inference_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        height, width, channels = max_frame_shape or (config.frame_height, config.frame_width, 3)
+        self.slot_bytes = height * width * channels
+        self.slot_count = self.workers * 2
+        self.block = None
+        self.processes = []
+        self._context = mp.get_context(config.process_start_method)
+        self._tasks = None
+        self._results = None
+        self._free_slots = queue.Queue()
+        self._task_ids = itertools.count()
+        self._in_flight: Dict[int, Tuple[Hashable, int, int, Future]] = {}
+        self._stream_sequences: Dict[Hashable, itertools.count] = {}
+        self._completed: Dict[Hashable, Dict[int, Tuple[Future, object, bool]]] = {}
+        self._next_release: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._collector = None
+        self._running = False
+
+    def start(self, timeout: float = 120.0) -> None:
+        """
+        Allocate the shared frame slots and start the workers
+
+        Args:
+            timeout: Seconds to wait for every worker to load its model
+        """
+        global _FORK_DETECTOR
+        self.block = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slot_count)
+        for slot in range(self.slot_count):
+            self._free_slots.put(slot)
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+
+        worker_config = copy.copy(self.config)
+        worker_config.inference_threads = self.threads_per_worker
+        try:
+            if self._context.get_start_method() == "fork" and _FORK_DETECTOR is None:
+                from app.vision import ObjectDetector
+                _FORK_DETECTOR = ObjectDetector(worker_config)
+
+            # Native thread pools read these once, when their library loads, so they
+            # must be in the environment the workers start with, not set inside them
+            saved_env = {name: os.environ.get(name) for name in THREAD_ENV_VARS}
+            os.environ.update({name: str(self.threads_per_worker) for name in THREAD_ENV_VARS})
+            try:
+                for i in range(self.workers):
+                    process = self._context.Process(
+                        target=_worker_main,
+                        args=(worker_config, self.threads_per_worker, self.block.name, self._tasks, self._results),
+                        name=f"visora-infer{i}",
+                        daemon=True
+                    )
+                    process.start()
+                    self.processes.append(process)
+            finally:
+                for name, value in saved_env.items():
+                    if value is None:
+                        os.environ.pop(name, None)
+                    else:
+                        os.environ[name] = value
+
+            for _ in range(self.workers):
+                try:
+                    kind, pid, error = self._results.get(timeout=timeout)
+                except queue.Empty:
+                    raise RuntimeError("Inference workers did not start in time")
+                if kind == "error":
+                    raise RuntimeError(f"Inference worker {pid} failed to start: {error}")
+        except Exception:
+            self.close()
+            raise
+
+        self._running = True
+        self._collector = threading.Thread(target=self._collect, name="visora-pool-collector", daemon=True)
+        self._collector.start()
+        logger.info(
+            f"Process inference pool started: {self.workers} workers x {self.threads_per_worker} threads, "
+            f"{self.slot_count} shared frame slots ({self._context.get_start_method()})"
+        )
+
+    def submit(self, frame: np.ndarray, stream_id: Hashable = 0) -> Future:
+        """
+        Queue a frame for detection in a worker process
+
+        Blocks while every shared frame slot is in use.
+
+        Args:
+            frame: Input BGR frame (uint8)
+            stream_id: Stream the frame belongs to; results are ordered per stream
+
+        Returns:
+            Future resolving to the Detections for the frame
+        """
+        if not self._running:
+            raise RuntimeError("Process inference pool is not running")
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(
+                f"Frame of {frame.shape} exceeds the shared slot size; create the pool with a larger max_frame_shape"
+            )
+        slot = self._free_slots.get()
+        offset = slot * self.slot_bytes
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=self.block.buf, offset=offset)[...] = frame
+
+        future = Future()
+        task_id = next(self._task_ids)
+        with self._lock:
+            sequence = next(self._stream_sequences.setdefault(stream_id, itertools.count()))
+            self._next_release.setdefault(stream_id, 0)
+            self._in_flight[task_id] = (stream_id, sequence, slot, future)
+        self._tasks.put((task_id, offset, frame.shape))
+        return future
+
+    def detect_batch_array(self, frames: List[np.ndarray], stream_id: Hashable = 0) -> List[Detections]:
+        """
+        Detect objects in several frames across the workers
+
+        Same interface as ObjectDetector.detect_batch_array, so the pool can
+        stand in for a detector.
+
+        Args:
+            frames: List of input image frames
+            stream_id: Stream the frames belong to
+
+        Returns:
+            One Detections object per input frame, in input order
+        """
+        futures = [self.submit(frame, stream_id) for frame in frames]
+        return [future.result() for future in futures]
+
+    def _collect(self):
+        """Hand results back to their futures, in order per stream"""
+        while self._running:
+            try:
+                kind, task_id, payload = self._results.get(timeout=0.5)
+            except queue.Empty:
+                if any(not process.is_alive() for process in self.processes):
+                    self._fail_all(RuntimeError("An inference worker exited unexpectedly"))
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                entry = self._in_flight.pop(task_id, None)
+                if entry is None:
+                    continue
+                stream_id, sequence, slot, future = entry
+                self._free_slots.put(slot)
+                completed = self._completed.setdefault(stream_id, {})
+                completed[sequence] = (future, payload, kind == "result")
+                releasable = []
+                while self._next_release[stream_id] in completed:
+                    releasable.append(completed.pop(self._next_release[stream_id]))
+                    self._next_release[stream_id] += 1
+            for future, payload, ok in releasable:
+                if ok:
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(f"Detection failed in worker: {payload}"))
+
+    def _fail_all(self, error: Exception):
+        with self._lock:
+            pending = [entry[3] for entry in self._in_flight.values()]
+            pending += [future for completed in self._completed.values() for future, _, _ in completed.values()]
+            self._in_flight.clear()
+            self._completed.clear()
+        if pending:
+            logger.error(f"{error}; failing {len(pending)} pending frames")
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory"""
+        self._running = False
+        if self._tasks is not None:
+            for _ in self.processes:
+                self._tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        if self._collector is not None:
+            self._collector.join(timeout=2.0)
+            self._collector = None
+        self._fail_all(RuntimeError("Process inference pool closed"))
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+        logger.info("Process inference pool stopped")
@@ -0,0 +1,313 @@
+"""
+INT8 quantization of the exported detector and an FP32-vs-INT8 comparison report.
+
+Usage:
+    python -m app.quantization --mode static --calibration-dir frames/ --report-dir frames/ --output report.json
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+from app.config import Config
+from app.detections import box_iou
+from app.backends import (
+    OnnxRuntimeBackend, UltralyticsBackend, cached_artifact_path, export_model, letterbox,
+    load_class_names, save_class_names
+)
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("dynamic", "static")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def list_images(directory: str, limit: Optional[int] = None) -> List[str]:
+    """
+    List image files in a directory in a stable order
+
+    Args:
+        directory: Folder containing frames
+        limit: Maximum number of files to return
+
+    Returns:
+        Sorted list of image paths
+    """
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"Image directory not found: {directory}")
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit] if limit else paths
+
+
+class FolderCalibrationReader:
+    """onnxruntime CalibrationDataReader feeding letterboxed frames from a folder"""
+
+    def __init__(self, config: Config, input_name: str, directory: str, limit: int):
+        self.image_size = config.inference_image_size
+        self.input_name = input_name
+        self.paths = list_images(directory, limit)
+        if not self.paths:
+            raise ValueError(f"No calibration images found in {directory}")
+        self._iterator = iter(self.paths)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        for path in self._iterator:
+            frame = cv2.imread(path)
+            if frame is None:
+                logger.warning(f"Skipping unreadable calibration image: {path}")
+                continue
+            # Same letterboxing as the ONNX backend so calibration sees real inputs
+            tensor, _, _ = letterbox(frame, self.image_size)
+            return {self.input_name: tensor[None]}
+        return None
+
+    def rewind(self) -> None:
+        self._iterator = iter(self.paths)
+
+
+def calibration_signature(config: Config, calibration_dir: str) -> Dict:
+    """
+    Describe the calibration set a static INT8 model is built from
+
+    Args:
+        config: Application configuration
+        calibration_dir: Folder of frames for static calibration
+
+    Returns:
+        Folder, sample limit and the name, size and mtime of every frame used
+    """
+    paths = list_images(calibration_dir, config.calibration_samples)
+    return {
+        'calibration_dir': os.path.abspath(calibration_dir),
+        'calibration_samples': config.calibration_samples,
+        'images': [[os.path.basename(path), os.path.getsize(path), os.stat(path).st_mtime_ns] for path in paths]
+    }
+
+
+def _calibration_sidecar(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".calibration.json"
+
+
+def _load_calibration_signature(model_path: str) -> Optional[Dict]:
+    try:
+        with open(_calibration_sidecar(model_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def quantize_model(config: Config, mode: Optional[str] = None, calibration_dir: Optional[str] = None) -> str:
+    """
+    Produce an INT8 ONNX model from config.model_name, reusing a cached copy
+
+    A cached static model is only reused if it was calibrated on the same
+    frames with the same sample limit (recorded in a .calibration.json
+    sidecar), or if the calibration folder is not available to check.
+
+    Args:
+        config: Application configuration
+        mode: "dynamic" (weights only) or "static" (weights and activations, calibrated)
+        calibration_dir: Folder of frames for static calibration
+
+    Returns:
+        Path of the quantized ONNX model
+    """
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    mode = mode or config.quantization
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}', expected one of {QUANTIZATION_MODES}")
+
+    fp32_path = export_model(config, "onnx")
+    target = cached_artifact_path(config, "onnx", suffix=f"-int8-{mode}")
+    signature = None
+    if mode == "static":
+        calibration_dir = calibration_dir or config.calibration_dir
+        if os.path.isdir(calibration_dir):
+            signature = calibration_signature(config, calibration_dir)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(fp32_path):
+        if mode == "static" and signature is None:
+            # Deployments may ship the calibrated model without its frames
+            logger.warning(f"Calibration frames not found in {calibration_dir}; using cached INT8 model as is")
+        if signature is None or _load_calibration_signature(target) == signature:
+            logger.info(f"Using cached INT8 model: {target}")
+            return target
+        logger.info(f"Calibration frames or sample limit changed since {target} was built; recalibrating")
+
+    logger.info(f"Quantizing {fp32_path} to INT8 ({mode})")
+    if mode == "dynamic":
+        quantize_dynamic(fp32_path, target, weight_type=QuantType.QUInt8)
+    else:
+        import onnxruntime as ort
+        input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        reader = FolderCalibrationReader(config, input_name, calibration_dir, config.calibration_samples)
+        quantize_static(
+            fp32_path,
+            target,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True
+        )
+
+    save_class_names(target, load_class_names(fp32_path))
+    if signature is not None:
+        with open(_calibration_sidecar(target), "w", encoding="utf-8") as f:
+            json.dump(signature, f)
+    logger.info(f"Cached INT8 model at {target}")
+    return target
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size in MB, if psutil is available"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _agreement(reference, candidate, iou_threshold: float) -> Dict[str, int]:
+    """Greedily match candidate boxes to same-class reference boxes"""
+    ref_boxes, _, ref_classes = reference
+    cand_boxes, _, cand_classes = candidate
+    if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+        return {'matched': 0, 'reference': len(ref_boxes), 'candidate': len(cand_boxes)}
+    ious = box_iou(ref_boxes, cand_boxes)
+    ious[ref_classes.astype(int)[:, None] != cand_classes.astype(int)[None, :]] = 0
+    matched = 0
+    while True:
+        i, j = np.unravel_index(np.argmax(ious), ious.shape)
+        if ious[i, j] < iou_threshold:
+            break
+        matched += 1
+        ious[i, :] = 0
+        ious[:, j] = 0
+    return {'matched': matched, 'reference': len(ref_boxes), 'candidate': len(cand_boxes)}
+
+
+def _time_backend(backend, frames: List[np.ndarray], conf: float, iou: float):
+    outputs, latencies = [], []
+    backend.predict(frames[:1], conf, iou)  # warm-up
+    for frame in frames:
+        start = time.perf_counter()
+        outputs.append(backend.predict([frame], conf, iou)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return outputs, np.asarray(latencies)
+
+
+def _latency_summary(latencies: np.ndarray) -> Dict[str, float]:
+    return {
+        'mean_ms': float(latencies.mean()),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95))
+    }
+
+
+def compare_models(config: Config, image_dir: str, mode: Optional[str] = None, limit: Optional[int] = None,
+                   match_iou: float = 0.5) -> Dict:
+    """
+    Compare the INT8 model against the FP32 torch model on the same images
+
+    Args:
+        config: Application configuration
+        image_dir: Folder of evaluation frames
+        mode: Quantization mode to evaluate
+        limit: Maximum number of images
+        match_iou: IoU needed for two same-class boxes to count as agreeing
+
+    Returns:
+        Report with latency, memory, model size and detection agreement
+    """
+    paths = list_images(image_dir, limit)
+    frames = [frame for frame in (cv2.imread(p) for p in paths) if frame is not None]
+    if not frames:
+        raise ValueError(f"No readable images found in {image_dir}")
+    conf, iou = config.confidence_threshold, config.iou_threshold
+    int8_path = quantize_model(config, mode)
+
+    # Load INT8 first so its RSS delta is not hidden by torch's larger footprint
+    rss_before = _rss_mb()
+    int8_backend = OnnxRuntimeBackend(config, model_path=int8_path)
+    rss_int8 = _rss_mb()
+    fp32_backend = UltralyticsBackend(config)
+    rss_fp32 = _rss_mb()
+
+    fp32_outputs, fp32_latency = _time_backend(fp32_backend, frames, conf, iou)
+    int8_outputs, int8_latency = _time_backend(int8_backend, frames, conf, iou)
+
+    totals = {'matched': 0, 'reference': 0, 'candidate': 0}
+    for reference, candidate in zip(fp32_outputs, int8_outputs):
+        for key, value in _agreement(reference, candidate, match_iou).items():
+            totals[key] += value
+    recall = totals['matched'] / totals['reference'] if totals['reference'] else 1.0
+    precision = totals['matched'] / totals['candidate'] if totals['candidate'] else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    def _delta(after, before):
+        return None if after is None or before is None else round(after - before, 1)
+
+    model_size_mb = os.path.getsize(config.model_name) / 1e6 if os.path.exists(config.model_name) else None
+    return {
+        'images': len(frames),
+        'quantization': mode or config.quantization,
+        'fp32': {
+            'model': config.model_name,
+            'model_size_mb': model_size_mb,
+            'load_rss_mb': _delta(rss_fp32, rss_int8),
+            'latency': _latency_summary(fp32_latency),
+            'detections': totals['reference']
+        },
+        'int8': {
+            'model': int8_path,
+            'model_size_mb': os.path.getsize(int8_path) / 1e6,
+            'load_rss_mb': _delta(rss_int8, rss_before),
+            'latency': _latency_summary(int8_latency),
+            'detections': totals['candidate']
+        },
+        'agreement': {
+            'match_iou': match_iou,
+            'matched': totals['matched'],
+            'precision': precision,
+            'recall': recall,
+            'f1': f1
+        },
+        'speedup': float(np.median(fp32_latency) / max(np.median(int8_latency), 1e-9))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the Visora detector to INT8 and compare it with FP32")
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, default="dynamic", help="Quantization mode")
+    parser.add_argument("--calibration-dir", help="Frames used for static calibration (default: CALIBRATION_DIR)")
+    parser.add_argument("--report-dir", help="Frames used for the comparison report (default: calibration dir)")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of report images")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = Config()
+    if args.calibration_dir:
+        config.calibration_dir = args.calibration_dir
+
+    quantize_model(config, args.mode)
+    report = compare_models(config, args.report_dir or config.calibration_dir, args.mode, args.limit)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+import cv2
+import numpy as np
+from app.detections import Detections
+
+logger = logging.getLogger(__name__)
+
+# Annotation style (BGR)
+BOX_COLOR = (0, 255, 0)
+BOX_THICKNESS = 2
+LABEL_COLOR = (0, 255, 0)
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_SCALE = 0.5
+LABEL_THICKNESS = 2
+LABEL_OFFSET = 10  # Label baseline sits this many pixels above the box
+CENTER_COLOR = (0, 0, 255)
+CENTER_RADIUS = 5
+
+
+class LabelSprites:
+    """
+    Cache of rasterized label text.
+
+    Each string is drawn once with cv2.putText into a small coverage mask
+    (newer OpenCV releases antialias text) that is blended into frames
+    afterwards. A label is split into its class name (one sprite per class)
+    and the confidence (at most 101 sprites for 0.00 - 1.00), so the cache
+    stays small however many frames are drawn; the digits can land a pixel
+    away from where a single putText call would put them.
+    """
+
+    def __init__(self):
+        self._sprites: Dict[str, Tuple[np.ndarray, np.ndarray, int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> Tuple[np.ndarray, np.ndarray, int, int, int]:
+        """
+        Get the sprite for a string
+
+        Args:
+            text: Text to rasterize
+
+        Returns:
+            Tuple of (coverage 0-1, 1 - coverage, x offset, y offset, advance); the
+            offsets place the mask relative to the text origin and the advance is
+            where text drawn after it starts
+        """
+        sprite = self._sprites.get(text)
+        if sprite is None:
+            sprite = self._rasterize(text)
+            with self._lock:
+                self._sprites[text] = sprite
+        return sprite
+
+    @staticmethod
+    def _draw(text: str) -> Tuple[np.ndarray, int, int]:
+        """Draw text onto a fresh canvas; returns the canvas and the origin used"""
+        (width, height), baseline = cv2.getTextSize(text, LABEL_FONT, LABEL_SCALE, LABEL_THICKNESS)
+        pad = LABEL_THICKNESS + 2
+        canvas = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+        cv2.putText(canvas, text, (pad, pad + height), LABEL_FONT, LABEL_SCALE, 255, LABEL_THICKNESS)
+        return canvas, pad, pad + height
+
+    @classmethod
+    def _rasterize(cls, text: str) -> Tuple[np.ndarray, np.ndarray, int, int, int]:
+        canvas, origin_x, origin_y = cls._draw(text)
+        # Where a following glyph starts when putText draws both in one string
+        followed, _, _ = cls._draw(text + "0")
+        digit, _, _ = cls._draw("0")
+        advance = int(np.nonzero(followed)[1].max() - np.nonzero(digit)[1].max())
+
+        ys, xs = np.nonzero(canvas)
+        if not len(xs):
+            empty = np.zeros((0, 0), dtype=np.float32)
+            return empty, empty, 0, 0, advance
+        coverage = canvas[ys.min():ys.max() + 1, xs.min():xs.max() + 1] / np.float32(255)
+        return coverage, 1 - coverage, int(xs.min()) - origin_x, int(ys.min()) - origin_y, advance
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+
+# Sprites are immutable, so every renderer shares one cache
+SPRITES = LabelSprites()
+
+
+class AnnotationRenderer:
+    """
+    Draws detections into a reusable output buffer.
+
+    The frame is copied (or converted to RGB) into a buffer that is kept
+    between calls, boxes and center points are drawn into it in place and
+    labels are blitted from cached sprites. The returned image is only valid
+    until the next render() unless an output array is passed in.
+    """
+
+    def __init__(self, sprites: LabelSprites = SPRITES):
+        self.sprites = sprites
+        self._buffer: Optional[np.ndarray] = None
+        # Solid color images the sprites are blended from, grown as needed
+        self._tiles: Dict[Tuple[int, int, int], np.ndarray] = {}
+
+    def render(self, frame: np.ndarray, detections: Union[List[Dict], Detections], rgb: bool = False,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Draw bounding boxes, labels and center points
+
+        Args:
+            frame: Input BGR frame (left untouched)
+            detections: List of detected objects or a Detections object
+            rgb: Produce an RGB image, e.g. for Streamlit, instead of BGR
+            out: Array to draw into; defaults to the renderer's reusable buffer
+
+        Returns:
+            Annotated frame
+        """
+        if out is None:
+            if self._buffer is None or self._buffer.shape != frame.shape:
+                self._buffer = np.empty_like(frame)
+            out = self._buffer
+        if rgb:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=out)
+            box_color, label_color, center_color = BOX_COLOR[::-1], LABEL_COLOR[::-1], CENTER_COLOR[::-1]
+        else:
+            np.copyto(out, frame)
+            box_color, label_color, center_color = BOX_COLOR, LABEL_COLOR, CENTER_COLOR
+
+        if isinstance(detections, Detections):
+            items = zip(detections.boxes.tolist(), detections.labels, detections.confidences.tolist(),
+                        detections.centers.tolist())
+        else:
+            items = ((d['bbox'], d['label'], d['confidence'], d['center']) for d in detections)
+
+        for bbox, label, confidence, center in items:
+            cv2.rectangle(out, (bbox[0], bbox[1]), (bbox[2], bbox[3]), box_color, BOX_THICKNESS)
+            x, y = int(bbox[0]), int(bbox[1]) - LABEL_OFFSET
+            x = self._blit(out, self.sprites.get(f"{label} "), x, y, label_color)
+            self._blit(out, self.sprites.get(f"{confidence:.2f}"), x, y, label_color)
+            cv2.circle(out, (int(center[0]), int(center[1])), CENTER_RADIUS, center_color, -1)
+        return out
+
+    def _color_tile(self, color: Tuple[int, int, int], height: int, width: int) -> np.ndarray:
+        """Solid color image of at least the given size that sprites are blended from"""
+        tile = self._tiles.get(color)
+        if tile is None or tile.shape[0] < height or tile.shape[1] < width:
+            tile = np.full((max(height, 32), max(width, 256), 3), color, dtype=np.uint8)
+            self._tiles[color] = tile
+        return tile[:height, :width]
+
+    def _blit(self, out: np.ndarray, sprite: Tuple[np.ndarray, np.ndarray, int, int, int], x: int, y: int,
+              color: Tuple[int, int, int]) -> int:
+        """Blend a sprite with its text origin at (x, y) into the image, clipped; returns the next origin x"""
+        coverage, inverse, dx, dy, advance = sprite
+        top, left = y + dy, x + dx
+        bottom, right = top + coverage.shape[0], left + coverage.shape[1]
+        height, width = out.shape[:2]
+        clip_top, clip_left = max(top, 0), max(left, 0)
+        clip_bottom, clip_right = min(bottom, height), min(right, width)
+        if clip_top < clip_bottom and clip_left < clip_right:
+            if (clip_top, clip_left, clip_bottom, clip_right) != (top, left, bottom, right):
+                rows = slice(clip_top - top, clip_bottom - top)
+                cols = slice(clip_left - left, clip_right - left)
+                coverage, inverse = coverage[rows, cols], inverse[rows, cols]
+            region = out[clip_top:clip_bottom, clip_left:clip_right]
+            tile = self._color_tile(color, clip_bottom - clip_top, clip_right - clip_left)
+            # Same blend cv2.putText applies to antialiased text, written in place
+            cv2.blendLinear(tile, region, coverage, inverse, dst=region)
+        return x + advance
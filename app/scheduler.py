@@ -0,0 +1,122 @@
+import time
+import logging
+from typing import Dict
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveScheduler:
+    """
+    Decides which frames get full inference and paces the real-time loops.
+
+    Detection runs on every Nth frame; frames in between reuse the previous
+    detections. N is re-chosen after every inference from moving averages of
+    inference time and the rest of the per-frame work, as the smallest
+    interval that both reaches config.target_fps and keeps the share of wall
+    time spent in inference within config.inference_cpu_budget.
+    """
+
+    def __init__(self, config: Config, smoothing: float = 0.2):
+        self.config = config
+        self.smoothing = smoothing
+        self.interval = 1
+        self.frames = 0
+        self.inferences = 0
+        self.skipped = 0
+        self._frames_since_inference = 0
+        self._inference_time = None
+        self._other_time = None
+        self._frame_start = None
+        self._detect_this_frame = False
+        self._inference_this_frame = 0.0
+
+    @property
+    def frame_budget(self) -> float:
+        """Target seconds per frame, or 0 when pacing is disabled"""
+        return 1.0 / self.config.target_fps if self.config.target_fps > 0 else 0.0
+
+    def begin_frame(self) -> bool:
+        """
+        Start timing a frame and decide whether it should run detection
+
+        Returns:
+            True if full inference should run on this frame
+        """
+        self._frame_start = time.perf_counter()
+        self._inference_this_frame = 0.0
+        self.frames += 1
+        self._detect_this_frame = (
+            self._inference_time is None or self._frames_since_inference >= self.interval - 1
+        )
+        if self._detect_this_frame:
+            self._frames_since_inference = 0
+        else:
+            self._frames_since_inference += 1
+            self.skipped += 1
+        return self._detect_this_frame
+
+    def record_inference(self, duration: float) -> None:
+        """
+        Record the time spent in detection for the current frame
+
+        Args:
+            duration: Inference time in seconds
+        """
+        self.inferences += 1
+        self._inference_this_frame += duration
+        self._inference_time = self._ema(self._inference_time, duration)
+
+    def end_frame(self) -> None:
+        """Finish timing the current frame and adapt the detection interval"""
+        if self._frame_start is None:
+            return
+        other = max(time.perf_counter() - self._frame_start - self._inference_this_frame, 0.0)
+        self._other_time = self._ema(self._other_time, other)
+        if self._detect_this_frame and self._inference_time is not None:
+            self._adapt()
+
+    def pace(self) -> None:
+        """Sleep off whatever is left of the frame budget to hold the target FPS"""
+        if self._frame_start is None or self.frame_budget <= 0:
+            return
+        remaining = self.frame_budget - (time.perf_counter() - self._frame_start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _ema(self, current, sample: float) -> float:
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def _adapt(self):
+        inference = self._inference_time
+        other = self._other_time or 0.0
+        max_interval = max(1, self.config.max_detection_interval)
+        chosen = max_interval
+        for interval in range(1, max_interval + 1):
+            work = other + inference / interval
+            period = max(work, self.frame_budget)
+            fps_ok = self.frame_budget <= 0 or work <= self.frame_budget
+            cpu_ok = (inference / interval) / period <= self.config.inference_cpu_budget
+            if fps_ok and cpu_ok:
+                chosen = interval
+                break
+        if chosen != self.interval:
+            logger.debug(f"Detection interval {self.interval} -> {chosen} "
+                         f"(inference {inference * 1000:.1f} ms, other {other * 1000:.1f} ms)")
+            self.interval = chosen
+
+    def stats(self) -> Dict:
+        """
+        Get scheduler statistics
+
+        Returns:
+            Dictionary with current interval, timing estimates and skip counts
+        """
+        return {
+            'interval': self.interval,
+            'frames': self.frames,
+            'inferences': self.inferences,
+            'skipped': self.skipped,
+            'inference_ms': (self._inference_time or 0.0) * 1000,
+            'other_ms': (self._other_time or 0.0) * 1000
+        }
@@ -0,0 +1,193 @@
+import io
+import os
+import wave
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Pause inserted between concatenated clips, standing in for word gaps and commas
+CLIP_GAP_SECONDS = 0.06
+
+
+class PhraseClipCache:
+    """
+    Disk and memory cache of pre-synthesized speech clips.
+
+    Each phrase piece (a label, a direction, a distance, or a whole fixed
+    instruction) is rendered once to a WAV file by the TTS engine. Announcements
+    are then built by concatenating the cached PCM of their pieces, so playback
+    starts from a buffer instead of a synthesis call. Disk use is capped at
+    config.phrase_cache_disk_mb and decoded audio in memory at
+    config.phrase_cache_memory_mb, both evicting least recently used entries.
+    """
+
+    def __init__(self, config: Config, voice_signature: str = ""):
+        self.config = config
+        self.directory = config.phrase_cache_dir
+        self.voice_signature = voice_signature
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def clip_path(self, text: str) -> str:
+        """Path of the cached clip for a phrase piece"""
+        digest = hashlib.sha1(f"{self.voice_signature}|{text}".encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def has(self, text: str) -> bool:
+        return os.path.exists(self.clip_path(text))
+
+    def missing(self, parts: Sequence[str]) -> list:
+        """Phrase pieces that have no clip on disk yet"""
+        return [part for part in parts if not self.has(part)]
+
+    def synthesize(self, engine, texts: Sequence[str]) -> int:
+        """
+        Render phrase pieces to clips with the given pyttsx3 engine
+
+        Must run on the thread that owns the engine.
+
+        Args:
+            engine: Initialized pyttsx3 engine
+            texts: Phrase pieces to render
+
+        Returns:
+            Number of clips written
+        """
+        texts = [text for text in dict.fromkeys(texts) if not self.has(text)]
+        if not texts:
+            return 0
+        for text in texts:
+            engine.save_to_file(text, self.clip_path(text))
+        engine.runAndWait()
+        self._enforce_disk_limit()
+        return sum(1 for text in texts if self.has(text))
+
+    def _enforce_disk_limit(self):
+        limit = self.config.phrase_cache_disk_mb * 1024 * 1024
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".wav"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def _load(self, text: str) -> Optional[Tuple[tuple, bytes]]:
+        """Decoded (wave params, PCM frames) for a piece, from memory or disk"""
+        with self._lock:
+            if text in self._memory:
+                self._memory.move_to_end(text)
+                return self._memory[text]
+        path = self.clip_path(text)
+        try:
+            with wave.open(path, "rb") as clip:
+                params = (clip.getnchannels(), clip.getsampwidth(), clip.getframerate())
+                frames = clip.readframes(clip.getnframes())
+            os.utime(path)  # Mark as recently used for disk eviction
+        except (OSError, EOFError, wave.Error):
+            return None
+        with self._lock:
+            self._memory[text] = (params, frames)
+            self._memory_bytes += len(frames)
+            limit = self.config.phrase_cache_memory_mb * 1024 * 1024
+            while self._memory_bytes > limit and len(self._memory) > 1:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+        return params, frames
+
+    def compose(self, parts: Sequence[str]) -> Optional[Tuple[tuple, bytes]]:
+        """
+        Concatenate the cached clips of several phrase pieces
+
+        Args:
+            parts: Phrase pieces in speaking order
+
+        Returns:
+            (wave params, PCM frames) or None if any piece is missing or formats differ
+        """
+        clips = []
+        for part in parts:
+            clip = self._load(part)
+            if clip is None:
+                return None
+            clips.append(clip)
+        params = clips[0][0]
+        if any(clip_params != params for clip_params, _ in clips):
+            logger.debug("Cached clips have mismatched formats; falling back to TTS")
+            return None
+        channels, sample_width, rate = params
+        gap = b"\x00" * (int(rate * CLIP_GAP_SECONDS) * channels * sample_width)
+        return params, gap.join(frames for _, frames in clips)
+
+
+class ClipPlayer:
+    """
+    Plays PCM buffers through simpleaudio, or winsound on Windows.
+
+    available is False when neither is installed; callers then fall back to
+    live TTS.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._play_object = None
+        try:
+            import simpleaudio
+            self._simpleaudio = simpleaudio
+            self._backend = "simpleaudio"
+        except ImportError:
+            try:
+                import winsound
+                self._winsound = winsound
+                self._backend = "winsound"
+            except ImportError:
+                logger.info("No audio playback library available; phrase clips disabled")
+
+    @property
+    def available(self) -> bool:
+        return self._backend is not None
+
+    def play(self, clip: Tuple[tuple, bytes]) -> None:
+        """
+        Play a clip and block until it finishes or stop() is called
+
+        Args:
+            clip: (wave params, PCM frames) as returned by PhraseClipCache.compose
+        """
+        (channels, sample_width, rate), frames = clip
+        if self._backend == "simpleaudio":
+            self._play_object = self._simpleaudio.play_buffer(frames, channels, sample_width, rate)
+            self._play_object.wait_done()
+            self._play_object = None
+        elif self._backend == "winsound":
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as out:
+                out.setnchannels(channels)
+                out.setsampwidth(sample_width)
+                out.setframerate(rate)
+                out.writeframes(frames)
+            self._winsound.PlaySound(buffer.getvalue(), self._winsound.SND_MEMORY)
+
+    def stop(self) -> None:
+        """Cut off the clip that is playing"""
+        if self._backend == "simpleaudio":
+            play_object = self._play_object
+            if play_object is not None:
+                play_object.stop()
+        elif self._backend == "winsound":
+            self._winsound.PlaySound(None, 0)
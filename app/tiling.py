@@ -0,0 +1,134 @@
+import logging
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from app.detections import box_iou
+
+logger = logging.getLogger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+# A cut-off box this much inside a larger same-class box is a tile-edge fragment
+CONTAINMENT_THRESHOLD = 0.85
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: float) -> List[Region]:
+    """
+    Split a frame into overlapping square tiles that cover it completely
+
+    Args:
+        width: Frame width in pixels
+        height: Frame height in pixels
+        tile_size: Tile edge in pixels
+        overlap: Fraction of a tile shared with its neighbour (0-0.9)
+
+    Returns:
+        List of (x1, y1, x2, y2) tile regions
+    """
+    stride = max(1, int(tile_size * (1.0 - min(max(overlap, 0.0), 0.9))))
+
+    def _starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        starts = list(range(0, length - tile_size, stride))
+        starts.append(length - tile_size)  # Last tile flush with the edge
+        return starts
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in _starts(height)
+        for x in _starts(width)
+    ]
+
+
+def roi_region(width: int, height: int, fractions: Sequence[float]) -> Region:
+    """
+    Convert a fractional (x1, y1, x2, y2) region into pixels
+
+    Args:
+        width: Frame width in pixels
+        height: Frame height in pixels
+        fractions: Region corners as fractions of the frame size
+
+    Returns:
+        (x1, y1, x2, y2) region in pixels
+    """
+    x1, y1, x2, y2 = [min(max(f, 0.0), 1.0) for f in fractions]
+    return int(x1 * width), int(y1 * height), max(int(x2 * width), int(x1 * width) + 1), max(int(y2 * height), int(y1 * height) + 1)
+
+
+def touches_crop_edge(xyxy: np.ndarray, region: Region, width: int, height: int, margin: int = 2) -> np.ndarray:
+    """
+    Flag boxes that touch a crop border lying inside the frame
+
+    Such boxes may be cut-off fragments of an object that continues in a
+    neighbouring tile.
+
+    Args:
+        xyxy: (N, 4) boxes in full-frame pixels
+        region: Crop (x1, y1, x2, y2) the boxes came from
+        width: Frame width in pixels
+        height: Frame height in pixels
+        margin: Distance in pixels that counts as touching
+
+    Returns:
+        (N,) boolean mask
+    """
+    x1, y1, x2, y2 = region
+    truncated = np.zeros(len(xyxy), dtype=bool)
+    if x1 > 0:
+        truncated |= xyxy[:, 0] <= x1 + margin
+    if y1 > 0:
+        truncated |= xyxy[:, 1] <= y1 + margin
+    if x2 < width:
+        truncated |= xyxy[:, 2] >= x2 - margin
+    if y2 < height:
+        truncated |= xyxy[:, 3] >= y2 - margin
+    return truncated
+
+
+def merge_detections(xyxy: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray,
+                     iou_threshold: float, truncated: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Cross-tile NMS over detections gathered from several crops
+
+    Boxes cut off at an internal tile border are dropped first when they lie
+    almost entirely inside a larger same-class box from another crop; the
+    rest go through the usual same-class IoU suppression.
+
+    Args:
+        xyxy: (N, 4) boxes in full-frame pixels
+        confidences: (N,) scores
+        class_ids: (N,) class ids
+        iou_threshold: IoU above which same-class boxes are duplicates
+        truncated: Optional (N,) mask of boxes touching an internal crop border
+
+    Returns:
+        Indices of the kept boxes, highest score first
+    """
+    if len(xyxy) == 0:
+        return np.empty(0, dtype=np.int64)
+    same_class = class_ids[:, None] == class_ids[None, :]
+    ious = box_iou(xyxy, xyxy)
+
+    candidates = np.arange(len(xyxy))
+    if truncated is not None and truncated.any():
+        areas = np.prod(np.clip(xyxy[:, 2:] - xyxy[:, :2], 0, None), axis=1)
+        intersections = ious * (areas[:, None] + areas[None, :]) / (1.0 + ious)
+        # Fraction of box i that lies inside box j
+        inside = intersections / np.maximum(areas[:, None], 1e-9)
+        fragment = (
+            truncated[:, None] & same_class & (inside >= CONTAINMENT_THRESHOLD)
+            & (areas[None, :] > areas[:, None])
+        )
+        candidates = candidates[~fragment.any(axis=1)]
+
+    order = candidates[np.argsort(-confidences[candidates], kind='stable')]
+    duplicate = (ious >= iou_threshold) & same_class
+    suppressed = np.zeros(len(xyxy), dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= duplicate[i]
+    return np.asarray(keep, dtype=np.int64)
@@ -0,0 +1,169 @@
+import logging
+from typing import List
+import numpy as np
+from app.config import Config
+from app.detections import Detections, box_iou
+
+logger = logging.getLogger(__name__)
+
+
+class KalmanBoxTrack:
+    """
+    Constant-velocity Kalman filter over one box.
+
+    State is [cx, cy, w, h, vx, vy, vw, vh] in pixels and pixels per frame;
+    measurements are [cx, cy, w, h].
+    """
+
+    # Shared model matrices: one frame per step
+    F = np.eye(8)
+    F[:4, 4:] = np.eye(4)
+    H = np.eye(4, 8)
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.5, 0.5, 0.25, 0.25])
+    R = np.diag([4.0, 4.0, 16.0, 16.0])
+
+    def __init__(self, track_id: int, box: np.ndarray, confidence: float, class_id: int, label: str):
+        self.track_id = track_id
+        self.confidence = confidence
+        self.class_id = class_id
+        self.label = label
+        self.x = np.zeros(8)
+        self.x[:4] = _xyxy_to_cxcywh(box)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1000.0, 1000.0, 1000.0, 1000.0])
+        self.hits = 1
+        self.age = 0
+        self.time_since_update = 0
+        self.matched = True  # Matched (or created) at the last tracker update
+
+    def predict(self) -> None:
+        """Advance the state by one frame"""
+        self.x = self.F @ self.x
+        # Keep the box size positive when shrinking fast
+        self.x[2:4] = np.maximum(self.x[2:4], 1.0)
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        self.age += 1
+        self.time_since_update += 1
+
+    def update(self, box: np.ndarray, confidence: float) -> None:
+        """Correct the state with a matched detection"""
+        residual = _xyxy_to_cxcywh(box) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ residual
+        self.P = (np.eye(8) - K @ self.H) @ self.P
+        self.confidence = confidence
+        self.hits += 1
+        self.time_since_update = 0
+        self.matched = True
+
+    @property
+    def box(self) -> np.ndarray:
+        cx, cy, w, h = self.x[:4]
+        return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+
+class ObjectTracker:
+    """
+    SORT-style multi-object tracker that gives detections persistent ids.
+
+    update() associates new detections with predicted tracks by same-class
+    IoU; predict() extrapolates the live tracks one frame ahead so loops
+    that skip inference still get moving boxes. Tracks that went unmatched
+    at the last update, or have fewer than config.tracker_min_hits
+    detections, are kept for re-association but not reported by predict(),
+    so objects that have left the scene are not drawn or announced.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.tracks: List[KalmanBoxTrack] = []
+        self._next_id = 1
+
+    def reset(self) -> None:
+        """Drop all tracks"""
+        self.tracks = []
+
+    def update(self, detections: Detections) -> Detections:
+        """
+        Associate a new set of detections with the existing tracks
+
+        Args:
+            detections: Detections from the current frame
+
+        Returns:
+            The same detections with track_ids filled in
+        """
+        for track in self.tracks:
+            track.predict()
+
+        track_ids = np.zeros(len(detections), dtype=np.int64)
+        unmatched_tracks = set(range(len(self.tracks)))
+        unmatched_detections = set(range(len(detections)))
+
+        if self.tracks and len(detections):
+            track_boxes = np.array([track.box for track in self.tracks])
+            track_classes = np.array([track.class_id for track in self.tracks])
+            ious = box_iou(detections.boxes, track_boxes)
+            ious[detections.class_ids[:, None] != track_classes[None, :]] = 0
+            # Greedy matching, best IoU first
+            while ious.size:
+                d, t = np.unravel_index(np.argmax(ious), ious.shape)
+                if ious[d, t] < self.config.tracker_iou_threshold:
+                    break
+                self.tracks[t].update(detections.boxes[d], float(detections.confidences[d]))
+                track_ids[d] = self.tracks[t].track_id
+                unmatched_tracks.discard(t)
+                unmatched_detections.discard(d)
+                ious[d, :] = 0
+                ious[:, t] = 0
+
+        for t in unmatched_tracks:
+            self.tracks[t].matched = False
+
+        for d in sorted(unmatched_detections):
+            track = KalmanBoxTrack(
+                self._next_id,
+                detections.boxes[d],
+                float(detections.confidences[d]),
+                int(detections.class_ids[d]),
+                detections.labels[d]
+            )
+            self._next_id += 1
+            self.tracks.append(track)
+            track_ids[d] = track.track_id
+
+        self.tracks = [t for t in self.tracks if t.time_since_update <= self.config.tracker_max_age]
+        return Detections(
+            detections.boxes,
+            detections.confidences,
+            detections.class_ids,
+            detections.labels,
+            centers=detections.centers,
+            track_ids=track_ids
+        )
+
+    def predict(self) -> Detections:
+        """
+        Extrapolate all live tracks one frame ahead without a measurement
+
+        Returns:
+            Predicted boxes of the confirmed tracks matched at the last update
+        """
+        for track in self.tracks:
+            track.predict()
+        self.tracks = [t for t in self.tracks if t.time_since_update <= self.config.tracker_max_age]
+        visible = [t for t in self.tracks if t.matched and t.hits >= self.config.tracker_min_hits]
+        if not visible:
+            return Detections.empty()
+        return Detections(
+            np.array([track.box for track in visible]),
+            [track.confidence for track in visible],
+            [track.class_id for track in visible],
+            [track.label for track in visible],
+            track_ids=[track.track_id for track in visible]
+        )
+
+
+def _xyxy_to_cxcywh(box: np.ndarray) -> np.ndarray:
+    x1, y1, x2, y2 = np.asarray(box, dtype=np.float64)
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
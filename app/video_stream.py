@@ -0,0 +1,200 @@
+import time
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+import cv2
+import numpy as np
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = "visoraframe"
+# Seconds a client waits for a new frame before the connection is dropped
+CLIENT_TIMEOUT = 10.0
+
+
+class MJPEGStreamer:
+    """
+    Serves the annotated video as an MJPEG stream next to the web app.
+
+    One encoder thread takes the newest frame from the source at
+    config.video_stream_fps, scales it to config.video_stream_width and
+    JPEG-encodes it once at config.video_stream_quality. Every client gets
+    the same encoded bytes, so the cost does not grow with viewers, and a
+    slow client only skips frames. No frames are taken (or drawn by the
+    source) while nobody is connected.
+
+    Endpoints: /stream.mjpg (multipart stream) and /frame.jpg (latest frame).
+    """
+
+    def __init__(self, config: Config, source: Callable, rgb: bool = True):
+        """
+        Args:
+            config: Configuration object
+            source: Callable returning an object with frame and frame_seq,
+                e.g. DetectionWorker.snapshot
+            rgb: Frames from the source are RGB rather than BGR
+        """
+        self.config = config
+        self.source = source
+        self.rgb = rgb
+        self.server = None
+        self.clients = 0
+        self._jpeg: Optional[bytes] = None
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._scaled: Optional[np.ndarray] = None
+        self._converted: Optional[np.ndarray] = None
+
+    @property
+    def url(self) -> str:
+        """Address browsers load the stream from"""
+        if self.config.video_stream_url:
+            return self.config.video_stream_url
+        return f"http://localhost:{self.config.video_stream_port}/stream.mjpg"
+
+    def start(self) -> bool:
+        """
+        Start the HTTP server and the encoder thread
+
+        Returns:
+            True if the endpoint is listening
+        """
+        streamer = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/stream.mjpg":
+                    streamer._serve_stream(self)
+                elif path == "/frame.jpg":
+                    streamer._serve_frame(self)
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((self.config.video_stream_host, self.config.video_stream_port), _Handler)
+        except OSError as e:
+            logger.error(f"Could not start video stream on port {self.config.video_stream_port}: {e}")
+            return False
+        self.server.daemon_threads = True
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self.server.serve_forever, name="visora-video-http", daemon=True),
+            threading.Thread(target=self._encode_loop, name="visora-video-encoder", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Video stream available at {self.url}")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._threads = []
+
+    def encode(self, frame: np.ndarray) -> Optional[bytes]:
+        """
+        Scale and JPEG-encode one frame with the stream settings
+
+        Args:
+            frame: Annotated frame from the source
+
+        Returns:
+            JPEG bytes or None if encoding failed
+        """
+        width = self.config.video_stream_width
+        if width and width != frame.shape[1]:
+            height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+            if self._scaled is None or self._scaled.shape[:2] != (height, width):
+                self._scaled = np.empty((height, width, frame.shape[2]), dtype=frame.dtype)
+            frame = cv2.resize(frame, (width, height), dst=self._scaled, interpolation=cv2.INTER_AREA)
+        if self.rgb:
+            if self._converted is None or self._converted.shape != frame.shape:
+                self._converted = np.empty_like(frame)
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=self._converted)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.config.video_stream_quality])
+        return encoded.tobytes() if ok else None
+
+    def _encode_loop(self):
+        interval = 1.0 / max(self.config.video_stream_fps, 1.0)
+        last_frame_seq = None
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            if self.clients:
+                snapshot = self.source()
+                if snapshot.frame is not None and snapshot.frame_seq != last_frame_seq:
+                    last_frame_seq = snapshot.frame_seq
+                    jpeg = self.encode(snapshot.frame)
+                    if jpeg is not None:
+                        with self._condition:
+                            self._jpeg = jpeg
+                            self._seq += 1
+                            self._condition.notify_all()
+            self._stop.wait(max(0.0, interval - (time.perf_counter() - started)))
+
+    def _next_jpeg(self, after_seq: int):
+        """Wait for a frame newer than after_seq; returns (seq, jpeg) or (after_seq, None)"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > after_seq or self._stop.is_set(), timeout=CLIENT_TIMEOUT)
+            if self._seq > after_seq and not self._stop.is_set():
+                return self._seq, self._jpeg
+            return after_seq, None
+
+    def _serve_stream(self, handler: BaseHTTPRequestHandler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+        handler.send_header("Cache-Control", "no-cache, private")
+        handler.send_header("Pragma", "no-cache")
+        handler.end_headers()
+        with self._condition:
+            self.clients += 1
+        seq = 0
+        try:
+            while True:
+                seq, jpeg = self._next_jpeg(seq)
+                if jpeg is None:
+                    break
+                handler.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode("ascii")
+                )
+                handler.wfile.write(jpeg)
+                handler.wfile.write(b"\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._condition:
+                self.clients -= 1
+
+    def _serve_frame(self, handler: BaseHTTPRequestHandler):
+        with self._condition:
+            self.clients += 1
+            # Reuse the current frame if there is one, otherwise wait for the first
+            after_seq = self._seq - 1 if self._jpeg is not None else 0
+        try:
+            _, jpeg = self._next_jpeg(after_seq)
+        finally:
+            with self._condition:
+                self.clients -= 1
+        if jpeg is None:
+            handler.send_error(503, "No frame available")
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "image/jpeg")
+        handler.send_header("Content-Length", str(len(jpeg)))
+        handler.send_header("Cache-Control", "no-cache, private")
+        handler.end_headers()
+        handler.wfile.write(jpeg)
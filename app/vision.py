@@ -1,9 +1,12 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import logging
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Union
 from app.config import Config
+from app.detections import Detections, COCO_CLASS_NAMES, build_label_lookup
+from app.backends import create_backend
+from app.tiling import tile_grid, roi_region, touches_crop_edge, merge_detections
+from app.renderer import AnnotationRenderer
 
 logger = logging.getLogger(__name__)
 
@@ -14,33 +17,18 @@ class ObjectDetector:
         self.config = config
         self.model = None
         self.class_names = []
+        self._label_lookup = None
+        self.renderer = AnnotationRenderer()
         self._load_model()
         
     def _load_model(self):
-        """Load the YOLO model"""
+        """Load the YOLO model through the configured inference backend"""
         try:
-            logger.info(f"Loading YOLO model: {self.config.model_name}")
-            self.model = YOLO(self.config.model_name)
-            # Get class names from the model
-            if hasattr(self.model, 'names'):
-                self.class_names = self.model.names
-            else:
-                # Default COCO class names
-                self.class_names = [
-                    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train',
-                    'truck', 'boat', 'traffic light', 'fire hydrant', 'stop sign',
-                    'parking meter', 'bench', 'bird', 'cat', 'dog', 'horse', 'sheep',
-                    'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack', 'umbrella',
-                    'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard',
-                    'sports ball', 'kite', 'baseball bat', 'baseball glove', 'skateboard',
-                    'surfboard', 'tennis racket', 'bottle', 'wine glass', 'cup', 'fork',
-                    'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange',
-                    'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
-                    'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv',
-                    'laptop', 'mouse', 'remote', 'keyboard', 'cell phone', 'microwave',
-                    'oven', 'toaster', 'sink', 'refrigerator', 'book', 'clock', 'vase',
-                    'scissors', 'teddy bear', 'hair drier', 'toothbrush'
-                ]
+            logger.info(f"Loading YOLO model: {self.config.model_name} ({self.config.inference_backend} backend)")
+            self.model = create_backend(self.config)
+            # Get class names from the model, falling back to COCO
+            self.class_names = self.model.class_names or COCO_CLASS_NAMES
+            self._label_lookup = build_label_lookup(self.class_names)
             logger.info("Model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
@@ -56,79 +44,40 @@ class ObjectDetector:
         }
         return backend_map.get(self.config.camera_backend, None)
             
-    def initialize_camera(self, camera_source=None) -> Optional[cv2.VideoCapture]:
+    def initialize_camera(self, camera_source=None, frame_ring: Optional[bool] = None,
+                          latest_frame: Optional[bool] = None):
         """
-        Initialize camera with better error handling and backend selection
+        Open the camera with the cached or fastest working backend
         
         Args:
             camera_source: Camera source index (default from config)
+            frame_ring: Wrap the camera in a RingCapture (default config.frame_ring);
+                its read() returns views that are only valid until the next read
+            latest_frame: Otherwise wrap it in a LatestFrameCamera that reads on its
+                own thread (default config.latest_frame_camera)
             
         Returns:
-            cv2.VideoCapture object or None if failed
+            cv2.VideoCapture (or RingCapture / LatestFrameCamera) object or None if failed
         """
         if camera_source is None:
             camera_source = self.config.camera_source
+        if frame_ring is None:
+            frame_ring = self.config.frame_ring
+        if latest_frame is None:
+            latest_frame = self.config.latest_frame_camera
             
-        # Try configured backend first
-        backends_to_try = []
-        backend_code = self._get_backend_code()
-        
-        if backend_code is not None:
-            backends_to_try.append(backend_code)
-            
-        # Add other common backends as fallbacks
-        backends_to_try.extend([
-            cv2.CAP_DSHOW,    # DirectShow (Windows)
-            cv2.CAP_MSMF,     # Microsoft Media Foundation (Windows)
-            -1                # Auto detection
-        ])
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_backends = []
-        for backend in backends_to_try:
-            if backend not in seen:
-                seen.add(backend)
-                unique_backends.append(backend)
-        
-        for backend in unique_backends:
-            cap = None
-            try:
-                logger.info(f"Trying to initialize camera {camera_source} with backend {backend}")
-                
-                if backend == -1:
-                    cap = cv2.VideoCapture(camera_source)
-                else:
-                    cap = cv2.VideoCapture(camera_source, backend)
-                
-                if cap.isOpened():
-                    # Set frame properties
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.config.frame_width)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.config.frame_height)
-                    
-                    # Test if we can read a frame
-                    ret, frame = cap.read()
-                    if ret:
-                        logger.info(f"Camera initialized successfully with backend {backend}")
-                        return cap
-                    else:
-                        logger.warning(f"Camera opened but could not read frame with backend {backend}")
-                        cap.release()
-                        cap = None
-                else:
-                    logger.warning(f"Could not open camera with backend {backend}")
-                    if cap:
-                        cap.release()
-                        cap = None
-                    
-            except Exception as e:
-                logger.error(f"Error initializing camera with backend {backend}: {e}")
-                if cap:
-                    cap.release()
-                    cap = None
-                    
-        logger.error("Failed to initialize camera with all backends")
-        return None
+        # Cached backend first, otherwise a parallel probe of the backends usable on this platform
+        from app.camera import open_camera
+        cap = open_camera(self.config, camera_source, self._get_backend_code())
+        if cap is None:
+            return None
+        if frame_ring:
+            from app.frame_ring import RingCapture
+            return RingCapture(cap, self.config)
+        if latest_frame:
+            from app.camera import LatestFrameCamera
+            return LatestFrameCamera(cap, self.config)
+        return cap
             
     def detect_objects(self, frame: np.ndarray) -> List[Dict]:
         """
@@ -140,87 +89,178 @@ class ObjectDetector:
         Returns:
             List of detected objects with bounding boxes and labels
         """
+        return self.detect_objects_array(frame).to_list()
+        
+    def detect_objects_array(self, frame: np.ndarray) -> Detections:
+        """
+        Detect objects in a frame and return them in columnar form
+        
+        Args:
+            frame: Input image frame
+            
+        Returns:
+            Detections object holding boxes, confidences, labels, centers and areas
+        """
         if self.model is None:
             raise RuntimeError("Model not loaded")
             
+        if self.config.tiling_mode in ("tiles", "roi"):
+            return self.detect_objects_tiled(frame)
+            
         try:
             # Run object detection
-            results = self.model(
-                frame,
+            results = self.model.predict(
+                [frame],
                 conf=self.config.confidence_threshold,
                 iou=self.config.iou_threshold
             )
             
-            detections = []
             if results and len(results) > 0:
-                result = results[0]
-                boxes = result.boxes
-                
-                if boxes is not None:
-                    for i in range(len(boxes)):
-                        box = boxes.xyxy[i].cpu().numpy().astype(int)
-                        confidence = float(boxes.conf[i].cpu().numpy())
-                        class_id = int(boxes.cls[i].cpu().numpy())
-                        
-                        # Calculate center point
-                        center_x = int((box[0] + box[2]) / 2)
-                        center_y = int((box[1] + box[3]) / 2)
-                        
-                        detection = {
-                            'bbox': box.tolist(),
-                            'center': (center_x, center_y),
-                            'confidence': confidence,
-                            'class_id': class_id,
-                            'label': self.class_names[class_id] if class_id < len(self.class_names) else f"Class {class_id}"
-                        }
-                        detections.append(detection)
-                        
-            return detections
+                return self._to_detections(*results[0])
+            return Detections.empty()
         except Exception as e:
             logger.error(f"Detection failed: {e}")
-            return []
+            return Detections.empty()
             
-    def draw_detections(self, frame: np.ndarray, detections: List[Dict]) -> np.ndarray:
+    def _crop_regions(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Regions of the frame to run through the model for the configured tiling mode"""
+        height, width = frame.shape[:2]
+        if self.config.tiling_mode == "roi":
+            regions = [roi_region(width, height, self.config.walking_roi)]
+        elif width <= self.config.tile_size and height <= self.config.tile_size:
+            # Small frames gain nothing from tiling
+            return [(0, 0, width, height)]
+        else:
+            regions = tile_grid(width, height, self.config.tile_size, self.config.tile_overlap)
+        if self.config.tile_include_full_frame:
+            regions.insert(0, (0, 0, width, height))
+        return regions
+        
+    def detect_objects_tiled(self, frame: np.ndarray) -> Detections:
         """
-        Draw bounding boxes and labels on the frame
+        Detect objects on overlapping tiles or the walking-path region of a large frame
+        
+        All crops are batched through the model in one call, mapped back to
+        full-frame pixels and merged with cross-tile NMS.
         
         Args:
             frame: Input image frame
-            detections: List of detected objects
             
         Returns:
-            Frame with drawn detections
+            Detections object in full-frame coordinates
         """
-        annotated_frame = frame.copy()
-        
-        for detection in detections:
-            bbox = detection['bbox']
-            label = detection['label']
-            confidence = detection['confidence']
-            center = detection['center']
-            
-            # Draw bounding box
-            cv2.rectangle(
-                annotated_frame,
-                (bbox[0], bbox[1]),
-                (bbox[2], bbox[3]),
-                (0, 255, 0),
-                2
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+            
+        try:
+            regions = self._crop_regions(frame)
+            # Crops are views into the frame; no pixel data is copied here
+            crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+            results = self.model.predict(
+                crops,
+                conf=self.config.confidence_threshold,
+                iou=self.config.iou_threshold
             )
             
-            # Draw label
-            label_text = f"{label} {confidence:.2f}"
-            cv2.putText(
-                annotated_frame,
-                label_text,
-                (bbox[0], bbox[1] - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                2
+            height, width = frame.shape[:2]
+            boxes, confidences, class_ids, truncated = [], [], [], []
+            for region, (xyxy, conf, cls) in zip(regions, results):
+                if len(xyxy) == 0:
+                    continue
+                x1, y1 = region[0], region[1]
+                shifted = np.asarray(xyxy, dtype=np.float32) + np.array([x1, y1, x1, y1], dtype=np.float32)
+                boxes.append(shifted)
+                confidences.append(np.asarray(conf, dtype=np.float32))
+                class_ids.append(np.asarray(cls).astype(np.int32))
+                truncated.append(touches_crop_edge(shifted, region, width, height))
+            if not boxes:
+                return Detections.empty()
+                
+            boxes = np.concatenate(boxes)
+            confidences = np.concatenate(confidences)
+            class_ids = np.concatenate(class_ids)
+            truncated = np.concatenate(truncated)
+            keep = merge_detections(boxes, confidences, class_ids, self.config.iou_threshold, truncated)
+            return self._to_detections(boxes[keep], confidences[keep], class_ids[keep])
+        except Exception as e:
+            logger.error(f"Tiled detection failed: {e}")
+            return Detections.empty()
+            
+    def detect_batch(self, frames: List[np.ndarray]) -> List[List[Dict]]:
+        """
+        Detect objects in several frames with a single forward pass
+        
+        Args:
+            frames: List of input image frames
+            
+        Returns:
+            One list of detected objects per input frame, in input order
+        """
+        return [detections.to_list() for detections in self.detect_batch_array(frames)]
+        
+    def detect_batch_array(self, frames: List[np.ndarray]) -> List[Detections]:
+        """
+        Detect objects in several frames and return columnar results
+        
+        Args:
+            frames: List of input image frames
+            
+        Returns:
+            One Detections object per input frame, in input order
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+        if not frames:
+            return []
+            
+        try:
+            results = self.model.predict(
+                list(frames),
+                conf=self.config.confidence_threshold,
+                iou=self.config.iou_threshold
             )
+            return [self._to_detections(*result) for result in results]
+        except Exception as e:
+            logger.error(f"Batch detection failed: {e}")
+            return [Detections.empty() for _ in frames]
+            
+    def _to_detections(self, xyxy: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray) -> Detections:
+        """
+        Convert raw backend output for one image into a Detections object
+        
+        Args:
+            xyxy: (N, 4) boxes in pixels
+            confidences: (N,) confidence scores
+            class_ids: (N,) class ids
+            
+        Returns:
+            Detections object for the image
+        """
+        if len(xyxy) == 0:
+            return Detections.empty()
+            
+        xyxy = xyxy.astype(np.int32)
+        confidences = confidences.astype(np.float32)
+        class_ids = class_ids.astype(np.int32)
+        
+        if class_ids.max() >= len(self._label_lookup):
+            self._label_lookup = build_label_lookup(self.class_names, class_ids)
+        labels = self._label_lookup[class_ids]
+        
+        return Detections(xyxy, confidences, class_ids, labels)
             
-            # Draw center point
-            cv2.circle(annotated_frame, center, 5, (0, 0, 255), -1)
+    def draw_detections(self, frame: np.ndarray, detections: Union[List[Dict], Detections]) -> np.ndarray:
+        """
+        Draw bounding boxes and labels on a copy of the frame
+        
+        Real-time loops should call self.renderer.render() instead, which
+        reuses its output buffer and can produce RGB directly.
+        
+        Args:
+            frame: Input image frame
+            detections: List of detected objects or a Detections object
             
-        return annotated_frame
\ No newline at end of file
+        Returns:
+            Frame with drawn detections
+        """
+        return self.renderer.render(frame, detections, out=np.empty_like(frame))
@@ -3,11 +3,16 @@ import cv2
 import numpy as np
 from PIL import Image
 import time
+import uuid
 import logging
+from typing import Optional
 from app.config import Config
 from app.vision import ObjectDetector
 from app.audio import AudioManager
 from app.navigation import NavigationAssistant
+from app.detection_worker import DetectionWorker
+from app.video_stream import MJPEGStreamer
+from app.metrics import REGISTRY, start_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +20,18 @@ class WebInterface:
     """Streamlit web interface for the vision assistance system"""
     
     def __init__(self):
-        self.config = Config()
+        self.config = None
         self.detector = None
         self.audio_manager = None
         self.navigation_assistant = None
         self.initialize_components()
         
     def initialize_components(self):
-        """Initialize all system components"""
+        """Get the process-wide components, loading them on the first run only"""
         try:
-            self.detector = ObjectDetector(self.config)
-            self.audio_manager = AudioManager(self.config)
-            self.navigation_assistant = NavigationAssistant(self.config)
-            logger.info("All components initialized successfully")
+            self.config, self.detector, self.audio_manager, self.navigation_assistant = load_components()
         except Exception as e:
+            self.config = Config()
             logger.error(f"Failed to initialize components: {e}")
             st.error(f"Failed to initialize system components: {e}")
             
@@ -265,8 +268,15 @@ class WebInterface:
                 help="Minimum confidence for object detection"
             )
             
+            show_video = st.checkbox(
+                "Show Video Feed",
+                self.config.render_video,
+                help="Turn off for audio-only use; frames are then not drawn at all"
+            )
+            
             # Update config
             self.config.confidence_threshold = confidence_threshold
+            self.config.render_video = show_video
             
             st.markdown("---")
             st.header("🧭 Navigation Guide")
@@ -348,17 +358,16 @@ class WebInterface:
             # Detect objects
             detections = self.detector.detect_objects(frame)
             
-            # Draw detections
-            annotated_frame = self.detector.draw_detections(frame, detections)
-            
-            # Convert back to RGB for display
-            annotated_frame_rgb = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
+            # Draw detections straight into an RGB image for display
+            annotated_frame_rgb = self.detector.renderer.render(frame, detections, rgb=True)
             
             # Display the annotated image
             st.image(annotated_frame_rgb, caption="Detected Objects", width='stretch')
             
             # Display detection results
             if detections:
+                # Direction and distance of every object in one pass
+                analysis = self.navigation_assistant.analyze(detections, frame.shape[1], frame.shape[0])
                 st.markdown('<div class="detection-box"><h4>Detected Objects:</h4>', unsafe_allow_html=True)
                 for i, detection in enumerate(detections):
                     st.markdown(f'''
@@ -371,13 +380,7 @@ class WebInterface:
                     </div>
                     ''', unsafe_allow_html=True)
                     
-                    # Calculate and announce direction
-                    direction, distance = self.navigation_assistant.calculate_direction(
-                        detection['center'][0],
-                        detection['center'][1],
-                        frame.shape[1],
-                        frame.shape[0]
-                    )
+                    direction, distance = analysis.directions[i], analysis.distance_labels[i]
                     
                     # Update the direction info
                     st.markdown(f'''
@@ -401,32 +404,39 @@ class WebInterface:
             st.markdown(f'<div class="status-error">Error processing image: {e}</div>', unsafe_allow_html=True)
             
     def run_real_time_detection(self):
-        """Run real-time object detection using webcam with continuous audio feedback"""
+        """Show the background detection worker's output, polling it at the UI refresh rate"""
         # Check if components were initialized
         if self.detector is None or self.navigation_assistant is None or self.audio_manager is None:
             st.markdown('<div class="status-error">❌ System components not properly initialized.</div>', unsafe_allow_html=True)
             return
             
-        st.markdown('<div class="announcement">🔄 Starting real-time detection...</div>', unsafe_allow_html=True)
-        
-        # Initialize cap variable
-        cap = None
+        # The worker shares the cached config, so sidebar changes reach it in place
+        worker = get_detection_worker(self.config, self.detector, self.audio_manager, self.navigation_assistant)
+        
+        if 'detection_active' not in st.session_state:
+            st.session_state.detection_active = True
+        
+        # Start/stop buttons
+        start_column, stop_column = st.columns(2)
+        if stop_column.button("⏹️ Stop Detection"):
+            st.session_state.detection_active = False
+            worker.stop()
+        if start_column.button("▶️ Start Detection"):
+            st.session_state.detection_active = True
+            
+        if not st.session_state.detection_active:
+            st.markdown('<div class="status-success">⏹️ Real-time detection stopped</div>', unsafe_allow_html=True)
+            return
         
         # Create placeholders for video feed and detections
+        status_placeholder = st.empty()
         video_placeholder = st.empty()
         detections_placeholder = st.empty()
-        status_placeholder = st.empty()
-        
-        # Stop button
-        stop_button = st.button("⏹️ Stop Detection")
         
-        try:
+        if not worker.running:
             # Initialize camera with improved error handling
             status_placeholder.markdown('<div class="announcement">🔄 Initializing camera...</div>', unsafe_allow_html=True)
-            cap = self.detector.initialize_camera()
-            
-            # Check if camera opened successfully
-            if cap is None:
+            if not worker.start():
                 status_placeholder.markdown('''
                 <div class="status-error">
                     ❌ Could not access the camera. Please check:<br>
@@ -438,94 +448,95 @@ class WebInterface:
                 ''', unsafe_allow_html=True)
                 return
                 
-            status_placeholder.markdown('<div class="status-success">✅ Camera connected successfully!</div>', unsafe_allow_html=True)
-            
-            last_announcement_time = 0
-            announcement_interval = 2  # seconds - more frequent announcements
-            
-            # Track recently announced objects to avoid repetition
-            recently_announced = {}
-            
-            while not stop_button:
-                ret, frame = cap.read()
-                if not ret:
-                    status_placeholder.markdown('<div class="status-error">❌ Failed to read frame from camera</div>', unsafe_allow_html=True)
-                    break
-                    
-                # Detect objects
-                detections = self.detector.detect_objects(frame)
-                
-                # Draw detections
-                annotated_frame = self.detector.draw_detections(frame, detections)
-                
-                # Convert to RGB for display
-                annotated_frame_rgb = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
-                
-                # Display video feed
-                video_placeholder.image(annotated_frame_rgb, channels="RGB", width='stretch')
-                
-                # Process detections for audio feedback
-                if detections:
-                    detections_html = '''
-                    <div class="detection-box">
-                        <h4>🎯 Detected Objects:</h4>
-                        <div class="detection-list">
-                    '''
-                    
-                    current_time = time.time()
-                    
-                    # Process each detection for audio feedback
-                    for detection in detections[:3]:  # Limit to top 3 detections to avoid audio overload
-                        label = detection['label']
-                        confidence = detection['confidence']
-                        
-                        detections_html += f'<div class="object-item"><strong>{label}</strong> ({confidence:.2f})</div>'
-                        
-                        # Check if we should announce this object
-                        should_announce = False
-                        
-                        # Announce if this is a new object or if enough time has passed since last announcement
-                        if label not in recently_announced:
-                            should_announce = True
-                        elif current_time - recently_announced[label] > 5:  # 5 seconds cooldown
-                            should_announce = True
-                            
-                        if should_announce:
-                            # Calculate and announce direction
-                            direction, distance = self.navigation_assistant.calculate_direction(
-                                detection['center'][0],
-                                detection['center'][1],
-                                frame.shape[1],
-                                frame.shape[0]
-                            )
-                            
-                            # Announce via audio immediately
-                            self.audio_manager.announce_object_direction(label, direction, distance)
-                            
-                            # Update last announcement time
-                            recently_announced[label] = current_time
-                    
-                    detections_html += "</div></div>"
-                    detections_placeholder.markdown(detections_html, unsafe_allow_html=True)
-                else:
-                    detections_placeholder.markdown('<div class="detection-box"><h4>🎯 Detected Objects:</h4><p style="text-align: center; padding: 1rem;">No objects detected</p></div>', unsafe_allow_html=True)
-                    
-                # Check if stop button was pressed (Streamlit specific)
-                # In Streamlit, we need to check the session state
-                if 'stop_detection' in st.session_state and st.session_state.stop_detection:
-                    break
-                    
-                # Small delay to prevent excessive CPU usage
-                time.sleep(0.05)  # 50ms delay for smoother operation
-                
-        except Exception as e:
-            logger.error(f"Error in real-time detection: {e}")
-            st.markdown(f'<div class="status-error">Error in real-time detection: {e}</div>', unsafe_allow_html=True)
-        finally:
-            if cap is not None:
-                cap.release()
+        status_placeholder.markdown('<div class="status-success">✅ Camera connected successfully!</div>', unsafe_allow_html=True)
+        streamer = get_video_streamer(self.config, worker) if self.config.video_stream else None
+        if not self.config.render_video:
+            video_placeholder.markdown('<div class="announcement">🔈 Video feed hidden, audio guidance only</div>', unsafe_allow_html=True)
+        elif streamer is not None:
+            # The browser pulls the encoded feed itself; the page only shows the summary
+            video_placeholder.markdown(f'<img src="{streamer.url}" style="width: 100%;" alt="Live video feed">', unsafe_allow_html=True)
+        
+        # Detection runs on the worker thread; this loop only redraws the page,
+        # at most ui_refresh_fps times a second and only when something changed
+        refresh_interval = 1.0 / max(self.config.ui_refresh_fps, 1.0)
+        push_frames = self.config.render_video and streamer is None
+        # The worker is shared by every session, each with its own frame buffer
+        viewer = st.session_state.setdefault('viewer_id', uuid.uuid4().hex)
+        last_seq, last_frame_seq = -1, -1
+        while True:
+            snapshot = worker.snapshot(include_frame=push_frames, viewer=viewer)
+            if not snapshot.running:
+                if snapshot.error:
+                    status_placeholder.markdown(f'<div class="status-error">❌ {snapshot.error}</div>', unsafe_allow_html=True)
+                break
+            if snapshot.frame is not None and snapshot.frame_seq != last_frame_seq:
+                last_frame_seq = snapshot.frame_seq
+                with REGISTRY.timer("display"):
+                    video_placeholder.image(snapshot.frame, channels="RGB", width='stretch')
+            if snapshot.seq != last_seq:
+                last_seq = snapshot.seq
+                detections_placeholder.markdown(self._detections_html(snapshot.objects), unsafe_allow_html=True)
+            time.sleep(refresh_interval)
                 
         st.markdown('<div class="status-success">⏹️ Real-time detection stopped</div>', unsafe_allow_html=True)
+        
+    @staticmethod
+    def _detections_html(objects):
+        """Render the worker's detection summary as HTML"""
+        if not objects:
+            return '<div class="detection-box"><h4>🎯 Detected Objects:</h4><p style="text-align: center; padding: 1rem;">No objects detected</p></div>'
+        items = "".join(
+            f'<div class="object-item"><strong>{item["label"]}</strong> ({item["confidence"]:.2f})</div>'
+            for item in objects
+        )
+        return f'<div class="detection-box"><h4>🎯 Detected Objects:</h4><div class="detection-list">{items}</div></div>'
+
+@st.cache_resource
+def load_components():
+    """
+    Load the model, speech engine and navigation assistant once per process
+
+    Streamlit reruns the script on every widget change; caching keeps a rerun
+    from reloading the YOLO weights or reinitializing the speech engine.
+    Settings changed in the sidebar are written to the returned Config, which
+    the components read at use time. A failed load is not cached and is
+    retried on the next run.
+
+    Returns:
+        Tuple of (config, detector, audio_manager, navigation_assistant)
+    """
+    config = Config()
+    detector = ObjectDetector(config)
+    audio_manager = AudioManager(config)
+    navigation_assistant = NavigationAssistant(config)
+    start_metrics(config)
+    if config.phrase_cache_prewarm:
+        audio_manager.prewarm_phrases(
+            detector.class_names, navigation_assistant.direction_labels, navigation_assistant.distance_labels
+        )
+    logger.info("All components initialized successfully")
+    return config, detector, audio_manager, navigation_assistant
+
+@st.cache_resource
+def get_video_streamer(_config, _worker) -> Optional[MJPEGStreamer]:
+    """
+    Process-wide MJPEG endpoint fed by the detection worker
+
+    Returns:
+        The running streamer, or None if the port could not be opened
+    """
+    streamer = MJPEGStreamer(_config, _worker.snapshot)
+    return streamer if streamer.start() else None
+
+@st.cache_resource
+def get_detection_worker(_config, _detector, _audio_manager, _navigation_assistant) -> DetectionWorker:
+    """
+    Process-wide detection worker
+
+    Cached so it outlives Streamlit reruns and is shared by every session,
+    since there is only one camera to read.
+    """
+    return DetectionWorker(_config, _detector, _audio_manager, _navigation_assistant)
 
 def main():
     """Main entry point for the Streamlit app"""
@@ -0,0 +1,309 @@
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+import cv2
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.config import Config
+from app.detections import Detections, COCO_CLASS_NAMES
+from app.navigation import NavigationAssistant
+from app.renderer import AnnotationRenderer
+
+STAGES = ["detect", "draw", "navigate", "announce"]
+
+def load_video_frames(path, count, width, height):
+    """Decode up to count frames of a recorded video into memory"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if width and height and (frame.shape[1], frame.shape[0]) != (width, height):
+            frame = cv2.resize(frame, (width, height))
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"Could not read frames from {path}")
+    return frames
+
+def synthetic_frames(count, width, height, seed=0):
+    """Deterministic frames with moving shapes, so every run sees the same input"""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        for j in range(6):
+            x = int((width * (j + 1) / 7 + 7 * i * (1 if j % 2 else -1)) % width)
+            y = int(height * (0.3 + 0.1 * (j % 4)))
+            cv2.rectangle(frame, (x, y), (min(x + width // 8, width - 1), min(y + height // 4, height - 1)),
+                          (40 * j % 255, 200, 255 - 30 * j), -1)
+        frames.append(frame)
+    return frames
+
+def synthetic_detections(frame, count, rng):
+    """Random detections standing in for the model when --skip-detect is used"""
+    height, width = frame.shape[:2]
+    x1 = rng.integers(0, width - 40, count)
+    y1 = rng.integers(0, height - 40, count)
+    boxes = np.stack([x1, y1, x1 + rng.integers(20, 120, count), y1 + rng.integers(20, 120, count)], axis=1)
+    boxes[:, 2] = np.minimum(boxes[:, 2], width - 1)
+    boxes[:, 3] = np.minimum(boxes[:, 3], height - 1)
+    class_ids = rng.integers(0, 10, count)
+    labels = [COCO_CLASS_NAMES[c] for c in class_ids]
+    return Detections(boxes, rng.uniform(0.5, 1.0, count), class_ids, labels).to_list()
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+def summarize(samples):
+    """Latency percentiles in ms for one stage"""
+    if not samples:
+        return None
+    values = np.asarray(samples) * 1000
+    return {
+        'count': len(values),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99))
+    }
+
+class HotPath:
+    """The detect -> draw -> navigate -> announce sequence of the real-time loops"""
+
+    def __init__(self, config, skip_detect, with_audio, synthetic_count):
+        from app.vision import ObjectDetector
+        self.config = config
+        self.audio_manager = None
+        self.navigation_assistant = NavigationAssistant(config)
+        self.renderer = AnnotationRenderer()
+        self.rng = np.random.default_rng(1)
+        self.synthetic_count = synthetic_count
+        self.skipped = {}
+        self._work = None
+
+        if skip_detect:
+            self.skipped['detect'] = "disabled with --skip-detect"
+            # Only the detect stage needs a model, so skip loading one
+            self.detector = ObjectDetector.__new__(ObjectDetector)
+            self.detector.config = config
+            self.detector.model = None
+        else:
+            self.detector = ObjectDetector(config)
+
+        if with_audio:
+            try:
+                from app.audio import AudioManager
+                self.audio_manager = AudioManager(config)
+            except Exception as e:
+                self.skipped['announce'] = f"audio unavailable: {e}"
+        else:
+            self.skipped['announce'] = "disabled with --no-audio"
+
+    def stages(self, frame):
+        """
+        Yield (stage, callable) pairs for one frame, in hot-path order
+
+        Each callable runs one stage; later stages use the earlier results.
+        """
+        state = {}
+
+        def detect():
+            if self.detector.model is None:
+                state['detections'] = synthetic_detections(frame, self.synthetic_count, self.rng)
+            else:
+                state['detections'] = self.detector.detect_objects(frame)
+
+        def draw():
+            self.renderer.render(frame, state['detections'])
+
+        def navigate():
+            state['instruction'] = self.navigation_assistant.get_navigation_instruction(
+                state['detections'], frame.shape[1], frame.shape[0]
+            )
+
+        def announce():
+            self.audio_manager.announce_navigation(state['instruction'])
+
+        yield "detect", detect
+        yield "draw", draw
+        yield "navigate", navigate
+        if self.audio_manager is not None:
+            yield "announce", announce
+
+    def prepare(self, frame):
+        """
+        Copy a source frame into the reusable working buffer
+
+        Source frames are reused across passes, so stages run on a pristine
+        copy and nothing drawn in one pass can leak into the next. Called
+        outside the timed and traced regions.
+        """
+        if self._work is None or self._work.shape != frame.shape:
+            self._work = np.empty_like(frame)
+        np.copyto(self._work, frame)
+        return self._work
+
+    def run_frame(self, frame, timings):
+        """Run one frame, appending each measured stage's duration to timings"""
+        for stage, run in self.stages(self.prepare(frame)):
+            start = time.perf_counter()
+            run()
+            if stage not in self.skipped:
+                timings[stage].append(time.perf_counter() - start)
+
+    def close(self):
+        if self.audio_manager is not None:
+            self.audio_manager.shutdown()
+
+def measure_allocations(hot_path, frames):
+    """
+    Python heap allocated per call of each stage, traced over a few frames
+
+    Uses the tracemalloc peak, so memory allocated and freed within a stage
+    counts. Native allocations inside the inference libraries are not seen.
+    """
+    allocations = {stage: [] for stage in STAGES}
+    tracemalloc.start()
+    try:
+        for frame in frames:
+            for stage, run in hot_path.stages(hot_path.prepare(frame)):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                run()
+                if stage not in hot_path.skipped:
+                    allocations[stage].append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        stage: float(np.mean(values)) / 1024 if values else None
+        for stage, values in allocations.items()
+    }
+
+def compare_with_baseline(report, baseline, tolerance):
+    """
+    List stages whose p95 latency regressed beyond the tolerance
+
+    Args:
+        report: Current benchmark report
+        baseline: Stored report to compare against
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        List of human-readable regression messages
+    """
+    regressions = []
+    for stage, current in report['stages'].items():
+        previous = baseline.get('stages', {}).get(stage)
+        if not current or not previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{stage}: p95 {current['p95_ms']:.2f} ms vs baseline {previous['p95_ms']:.2f} ms"
+            )
+    if baseline.get('fps') and report['fps'] < baseline['fps'] / (1 + tolerance):
+        regressions.append(f"fps: {report['fps']:.1f} vs baseline {baseline['fps']:.1f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detect -> navigate -> announce hot path")
+    parser.add_argument("--video", help="Recorded video to use instead of synthetic frames")
+    parser.add_argument("--frames", type=int, default=200, help="Frames to measure")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured warm-up frames")
+    parser.add_argument("--width", type=int, default=640, help="Frame width")
+    parser.add_argument("--height", type=int, default=480, help="Frame height")
+    parser.add_argument("--skip-detect", action="store_true", help="Use synthetic detections instead of the model")
+    parser.add_argument("--detections", type=int, default=8, help="Synthetic detections per frame with --skip-detect")
+    parser.add_argument("--no-audio", action="store_true", help="Skip the audio enqueue stage")
+    parser.add_argument("--allocation-frames", type=int, default=20, help="Frames traced for allocations (0 disables)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare against a stored JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against the baseline")
+    args = parser.parse_args()
+
+    config = Config()
+    total = args.frames + args.warmup
+    if args.video:
+        frames = load_video_frames(args.video, total, args.width, args.height)
+    else:
+        frames = synthetic_frames(min(total, 120), args.width, args.height)
+
+    hot_path = HotPath(config, args.skip_detect, not args.no_audio, args.detections)
+    try:
+        timings = {stage: [] for stage in STAGES}
+        for i in range(args.warmup):
+            hot_path.run_frame(frames[i % len(frames)], {stage: [] for stage in STAGES})
+
+        start = time.perf_counter()
+        for i in range(args.frames):
+            hot_path.run_frame(frames[(args.warmup + i) % len(frames)], timings)
+        elapsed = time.perf_counter() - start
+
+        allocations = {}
+        if args.allocation_frames > 0:
+            allocations = measure_allocations(hot_path, frames[:args.allocation_frames])
+    finally:
+        hot_path.close()
+
+    stages = {}
+    for stage in STAGES:
+        stages[stage] = summarize(timings[stage])
+        if stages[stage] is not None:
+            stages[stage]['alloc_kib_per_call'] = allocations.get(stage)
+    report = {
+        'meta': {
+            'source': args.video or "synthetic",
+            'frames': args.frames,
+            'resolution': [frames[0].shape[1], frames[0].shape[0]],
+            'backend': config.inference_backend,
+            'model': config.model_name,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'skipped': hot_path.skipped
+        },
+        'stages': stages,
+        'fps': args.frames / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("Performance regressions against baseline:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            sys.exit(1)
+        print("No regressions against baseline", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import math
+import time
+import numpy as np
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.config import Config
+from app.navigation import NavigationAssistant
+
+FRAME_SIZES = [(640, 480), (1280, 720), (1920, 1080)]
+DETECTION_COUNTS = [10, 100, 1000, 10000]
+
+def trigonometric_direction(config, center_x, center_y, frame_width, frame_height):
+    """Per-object geometry as calculate_direction computed it before the lookup table"""
+    offset_x = center_x - frame_width // 2
+    offset_y = center_y - frame_height // 2
+    distance = math.sqrt(offset_x**2 + offset_y**2)
+    threshold = config.object_distance_threshold
+    bucket = 0 if distance < threshold else 1 if distance < threshold * 2 else 2 if distance < threshold * 4 else 3
+    if abs(offset_x) < threshold and abs(offset_y) < threshold:
+        return 0, bucket
+    angle = math.degrees(math.atan2(-offset_y, offset_x)) % 360
+    sector_size = 360 / config.direction_sectors
+    return int((angle + sector_size / 2) // sector_size) % config.direction_sectors, bucket
+
+def best_of(function, repeats=5):
+    """Fastest of several runs, in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def main():
+    """Compare the trigonometric and lookup-table navigation paths"""
+    config = Config()
+    nav = NavigationAssistant(config)
+    rng = np.random.default_rng(0)
+
+    print("Navigation geometry benchmark (best of 5, ms)")
+    print(f"{'frame':>10} {'objects':>8} {'per-object':>11} {'vector trig':>12} {'lookup':>9} {'speedup':>8}")
+    for width, height in FRAME_SIZES:
+        start = time.perf_counter()
+        nav.lookup_table(width, height)
+        build_ms = (time.perf_counter() - start) * 1000
+        for count in DETECTION_COUNTS:
+            centers = np.stack([rng.integers(0, width, count), rng.integers(0, height, count)], axis=1)
+            offsets = (centers - (width // 2, height // 2)).astype(np.float64)
+
+            per_object = best_of(lambda: [
+                trigonometric_direction(config, x, y, width, height) for x, y in centers.tolist()
+            ], repeats=1 if count > 1000 else 5)
+            vector_trig = best_of(lambda: nav._classify(offsets[:, 0], offsets[:, 1]))
+            lookup = best_of(lambda: nav.classify_centers(centers, width, height))
+
+            sectors, buckets = nav.classify_centers(centers, width, height)
+            expected = [trigonometric_direction(config, x, y, width, height) for x, y in centers[:200].tolist()]
+            assert list(zip(sectors[:200].tolist(), buckets[:200].tolist())) == expected, "lookup table mismatch"
+
+            print(f"{width}x{height:<5} {count:>8} {per_object:>11.3f} {vector_trig:>12.3f} {lookup:>9.3f} "
+                  f"{per_object / max(lookup, 1e-9):>7.1f}x")
+        print(f"{'':>10} table built once in {build_ms:.1f} ms ({width * height / 1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    main()
@@ -60,6 +60,435 @@ def test_navigation():
         print(f"✗ Navigation module test failed: {e}")
         return False
 
+def test_detections():
+    """Test the columnar detections container"""
+    print("Testing detections container...")
+    try:
+        from app.detections import Detections
+        detections = [
+            {'bbox': [0, 0, 100, 50], 'center': (50, 25), 'confidence': 0.5, 'class_id': 56, 'label': 'chair'},
+            {'bbox': [300, 200, 340, 280], 'center': (320, 240), 'confidence': 0.75, 'class_id': 0, 'label': 'person'}
+        ]
+        columnar = Detections.from_list(detections)
+        assert columnar.to_list() == detections, "round trip changed detections"
+        assert columnar.areas.tolist() == [5000, 3200], "unexpected areas"
+        print(f"✓ Detections container round-trips {len(columnar)} detections")
+        return True
+    except Exception as e:
+        print(f"✗ Detections test failed: {e}")
+        return False
+
+def test_tracking():
+    """Test that the tracker keeps ids across frames and extrapolates motion"""
+    print("Testing object tracker...")
+    try:
+        from app.config import Config
+        from app.detections import Detections
+        from app.tracking import ObjectTracker
+        tracker = ObjectTracker(Config())
+        for step in range(4):
+            x = 100 + 10 * step
+            tracked = tracker.update(Detections([[x, 100, x + 50, 200], [400, 100, 450, 200]], [0.9, 0.8], [0, 0], ['person', 'person']))
+        assert tracked.track_ids.tolist() == [1, 2], f"unexpected track ids {tracked.track_ids}"
+        predicted = tracker.predict()
+        assert predicted.boxes[0, 0] > 130, "track did not extrapolate forward"
+        print(f"✓ Tracker kept {len(tracked)} identities across frames")
+        return True
+    except Exception as e:
+        print(f"✗ Tracking test failed: {e}")
+        return False
+
+def test_tracking_lost_objects():
+    """Test that objects that left the scene are not extrapolated on skipped frames"""
+    print("Testing tracker with disappearing objects...")
+    try:
+        from app.config import Config
+        from app.detections import Detections
+        from app.tracking import ObjectTracker
+        tracker = ObjectTracker(Config())
+        person = Detections([[100, 100, 150, 200]], [0.9], [0], ['person'])
+        for _ in range(3):
+            tracker.update(Detections([[100, 100, 150, 200], [400, 100, 450, 200]], [0.9, 0.8], [0, 56], ['person', 'chair']))
+        assert len(tracker.predict()) == 2, "confirmed tracks not extrapolated"
+        # The chair leaves the scene
+        tracker.update(person)
+        for _ in range(5):
+            predicted = tracker.predict()
+            assert list(predicted.labels) == ['person'], f"lost object came back: {list(predicted.labels)}"
+        # A confirmed object that is missed once is extrapolated again once re-associated
+        tracker.update(Detections.empty())
+        assert len(tracker.predict()) == 0, "missed object extrapolated"
+        tracker.update(person)
+        assert list(tracker.predict().labels) == ['person'], "re-associated object not extrapolated"
+        # A single detection is not extrapolated until it is confirmed
+        tracker.update(Detections([[100, 100, 150, 200], [250, 50, 300, 90]], [0.9, 0.7], [0, 2], ['person', 'car']))
+        assert list(tracker.predict().labels) == ['person'], "unconfirmed track extrapolated"
+        print("✓ Tracker dropped the lost object and the unconfirmed one from predictions")
+        return True
+    except Exception as e:
+        print(f"✗ Tracker lost-object test failed: {e}")
+        return False
+
+def test_speech_cache():
+    """Test that cached phrase clips are concatenated in speaking order"""
+    print("Testing phrase clip cache...")
+    try:
+        import os
+        import wave
+        import tempfile
+        from app.config import Config
+        from app.speech_cache import PhraseClipCache
+        config = Config()
+        config.phrase_cache_dir = tempfile.mkdtemp()
+        cache = PhraseClipCache(config)
+        for text, sample in (("person", b"\x01\x00"), ("left", b"\x02\x00")):
+            with wave.open(cache.clip_path(text), "wb") as clip:
+                clip.setnchannels(1)
+                clip.setsampwidth(2)
+                clip.setframerate(8000)
+                clip.writeframes(sample * 100)
+        assert cache.missing(["person", "left", "close"]) == ["close"], "unexpected missing pieces"
+        assert cache.compose(["person", "close"]) is None, "composed a phrase with a missing piece"
+        params, frames = cache.compose(["person", "left"])
+        assert params == (1, 2, 8000) and frames.startswith(b"\x01\x00") and frames.endswith(b"\x02\x00")
+        print(f"✓ Composed {len(frames)} bytes from {len(os.listdir(config.phrase_cache_dir))} cached clips")
+        return True
+    except Exception as e:
+        print(f"✗ Speech cache test failed: {e}")
+        return False
+
+def test_navigation_analysis():
+    """Test that the vectorized navigation pass matches the per-object geometry"""
+    print("Testing vectorized navigation analysis...")
+    try:
+        from app.config import Config
+        from app.detections import Detections
+        from app.navigation import NavigationAssistant
+        nav = NavigationAssistant(Config())
+        detections = Detections(
+            [[300, 220, 340, 260], [0, 0, 200, 150], [100, 300, 160, 420]],
+            [0.9, 0.8, 0.7], [56, 2, 0], ['chair', 'car', 'person']
+        )
+        analysis = nav.analyze(detections, 640, 480)
+        for i, (x, y) in enumerate(detections.centers.tolist()):
+            expected = nav.calculate_direction(x, y, 640, 480)
+            assert (analysis.directions[i], analysis.distance_labels[i]) == expected, f"detection {i} differs"
+        assert analysis.priority.tolist() == [2, 1, 0], f"unexpected priority {analysis.priority}"
+        assert analysis.instruction == f"Person detected at {analysis.directions[2]}", analysis.instruction
+        print(f"✓ Analyzed {len(analysis)} detections: {analysis.instruction}")
+        return True
+    except Exception as e:
+        print(f"✗ Navigation analysis test failed: {e}")
+        return False
+
+def test_metrics():
+    """Test that stage timings land in the rolling histograms and the text export"""
+    print("Testing metrics registry...")
+    try:
+        from app.metrics import MetricsRegistry
+        registry = MetricsRegistry(window=60.0)
+        for _ in range(99):
+            registry.observe("detect", 0.02)
+        registry.observe("detect", 0.4)
+        with registry.timer("draw"):
+            pass
+        stats = registry.snapshot()
+        assert stats["detect"]["window_count"] == 100, stats["detect"]
+        assert stats["detect"]["p50_ms"] == 25.0 and stats["detect"]["p99_ms"] == 25.0, stats["detect"]
+        text = registry.render_prometheus()
+        assert 'visora_stage_seconds_count{stage="draw"} 1' in text, "draw timer missing from export"
+        assert 'visora_stage_seconds_bucket{stage="detect",le="+Inf"} 100' in text, "histogram buckets missing"
+        assert 'visora_stage_seconds_sum{stage="detect"} 2.380000' in text, "histogram sum missing"
+        assert 'visora_stage_window_seconds{stage="detect",quantile="0.5"} 0.025' in text, "window gauges missing"
+        print(f"✓ Recorded {len(stats)} stages, detect p95 {stats['detect']['p95_ms']:.0f} ms")
+        return True
+    except Exception as e:
+        print(f"✗ Metrics test failed: {e}")
+        return False
+
+def test_renderer():
+    """Test that the renderer reuses its buffer and emits RGB directly"""
+    print("Testing annotation renderer...")
+    try:
+        import numpy as np
+        from app.renderer import AnnotationRenderer
+        frame = np.random.default_rng(0).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        original = frame.copy()
+        detections = [{'bbox': [20, 30, 80, 100], 'center': (50, 65), 'confidence': 0.87, 'label': 'person'}]
+        renderer = AnnotationRenderer()
+        bgr = renderer.render(frame, detections).copy()
+        rgb = renderer.render(frame, detections, rgb=True)
+        assert renderer.render(frame, detections, rgb=True) is rgb, "output buffer was not reused"
+        assert np.array_equal(rgb, bgr[..., ::-1]), "RGB output differs from the BGR drawing"
+        assert np.array_equal(frame, original), "input frame was modified"
+        assert not np.array_equal(bgr, frame), "nothing was drawn"
+        print(f"✓ Rendered {len(detections)} detection with {len(renderer.sprites)} cached label sprites")
+        return True
+    except Exception as e:
+        print(f"✗ Renderer test failed: {e}")
+        return False
+
+def test_frame_ring():
+    """Test that held ring slots survive the writer lapping the ring"""
+    print("Testing frame ring...")
+    try:
+        import numpy as np
+        from app.frame_ring import FrameRing
+        ring = FrameRing((4, 4, 3), slots=5, readers=3)
+        try:
+            for i in range(3):
+                ring.write(np.full((4, 4, 3), i, dtype=np.uint8))
+            held = ring.acquire_latest(0)
+            assert held.seq == 3 and not held.frame.flags.writeable, held
+            for i in range(10):
+                slot = ring.begin_write()
+                slot[...] = 100 + i
+                ring.commit()
+            assert held.frame[0, 0, 0] == 2, "held slot was overwritten"
+            assert ring.acquire(1, 4) is None, "overwritten frame still returned"
+            assert ring.acquire_latest(1).frame[0, 0, 0] == 109
+            writes = ring.latest_seq - held.seq
+        finally:
+            ring.close()
+        assert ring.latest_seq == 0, "closed ring still reports frames"
+        print(f"✓ Ring kept held frame {held.seq} across {writes} writes")
+        return True
+    except Exception as e:
+        print(f"✗ Frame ring test failed: {e}")
+        return False
+
+def test_latest_frame_camera():
+    """Test that the threaded camera hands out the newest frame and counts skipped ones"""
+    print("Testing latest-frame camera...")
+    try:
+        import time
+        import numpy as np
+        from app.config import Config
+        from app.camera import LatestFrameCamera
+
+        class CountingCapture:
+            def __init__(self):
+                self.count = 0
+
+            def read(self):
+                time.sleep(0.002)
+                self.count += 1
+                if self.count > 200:
+                    return False, None
+                return True, np.full((4, 4, 3), self.count % 256, dtype=np.uint8)
+
+            def set(self, prop_id, value):
+                return False
+
+            def get(self, prop_id):
+                return 0.0
+
+            def isOpened(self):
+                return True
+
+            def release(self):
+                pass
+
+        camera = LatestFrameCamera(CountingCapture(), Config())
+        reads = 0
+        try:
+            while True:
+                ret, frame, captured_at = camera.read_timestamped(timeout=1.0)
+                if not ret:
+                    break
+                assert time.time() - captured_at < 1.0, "stale capture timestamp"
+                reads += 1
+                time.sleep(0.01)
+        finally:
+            camera.release()
+        assert reads and camera.frames_captured == 200, camera.frames_captured
+        assert camera.dropped > 0 and reads + camera.dropped <= 200, (reads, camera.dropped)
+        print(f"✓ Camera delivered {reads} newest frames, dropped {camera.dropped}")
+        return True
+    except Exception as e:
+        print(f"✗ Latest-frame camera test failed: {e}")
+        return False
+
+def test_camera_cache():
+    """Test that the backend that opened a source is cached and tried first"""
+    print("Testing camera backend cache...")
+    try:
+        import os
+        import platform
+        import tempfile
+        import cv2
+        import numpy as np
+        from app import camera
+        from app.config import Config
+        from app.camera import CameraCache, candidate_backends, open_camera
+        from app.metrics import REGISTRY
+
+        if platform.system() != "Windows":
+            assert cv2.CAP_DSHOW not in candidate_backends(0), "Windows backend probed on another platform"
+        with tempfile.TemporaryDirectory() as directory:
+            video = os.path.join(directory, "clip.avi")
+            writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+            for i in range(5):
+                writer.write(np.full((48, 64, 3), i * 40, dtype=np.uint8))
+            writer.release()
+
+            config = Config()
+            config.camera_cache_file = os.path.join(directory, "camera.json")
+            cap = open_camera(config, video)
+            assert cap is not None, "could not open the test clip"
+            cap.release()
+            entry = CameraCache(config.camera_cache_file).get(video)
+            assert entry is not None and (entry["width"], entry["height"]) == (64, 48), entry
+            assert entry["requested"] == [config.frame_width, config.frame_height], entry
+
+            # The next start (CLI or web, both go through initialize_camera) opens from the cache
+            probes = []
+            original_probe = camera.probe_camera
+            camera.probe_camera = lambda *args: probes.append(args)
+            try:
+                initialized = REGISTRY.snapshot().get("camera_init", {}).get("total_count", 0)
+                cap = open_camera(config, video)
+            finally:
+                camera.probe_camera = original_probe
+            assert cap is not None and not probes, "cached backend was not used"
+            cap.release()
+            assert REGISTRY.snapshot()["camera_init"]["total_count"] == initialized + 1, "camera_init not timed"
+
+            # A cached backend that stops working is forgotten and probed again
+            cache = CameraCache(config.camera_cache_file)
+            cache.put(video, cv2.CAP_V4L2 if platform.system() != "Linux" else cv2.CAP_DSHOW,
+                      (config.frame_width, config.frame_height), 64, 48)
+            cap = open_camera(config, video, cache=cache)
+            assert cap is not None, "probe after a stale cache entry failed"
+            cap.release()
+            assert CameraCache(config.camera_cache_file).get(video)["backend"] == entry["backend"]
+        print(f"✓ Camera cache remembered backend {entry['backend']} at {entry['width']}x{entry['height']}")
+        return True
+    except Exception as e:
+        print(f"✗ Camera cache test failed: {e}")
+        return False
+
+def test_camera_probe():
+    """Test that the parallel probe keeps the first backend to deliver a frame and releases the rest"""
+    print("Testing parallel camera probe...")
+    try:
+        import time
+        import numpy as np
+        from app import camera
+
+        class FakeCapture:
+            def __init__(self):
+                self.released = False
+
+            def release(self):
+                self.released = True
+
+        # backend -> (seconds to open, opens successfully)
+        behaviour = {1: (0.05, False), 2: (0.15, True), 3: (0.02, True), 4: (0.25, True), 5: (0.0, False)}
+        captures = {}
+
+        def fake_open_capture(source, backend, width, height):
+            delay, ok = behaviour[backend]
+            time.sleep(delay)
+            if not ok:
+                return None
+            captures[backend] = FakeCapture()
+            return captures[backend], np.zeros((height, width, 3), dtype=np.uint8)
+
+        original = camera.open_capture
+        camera.open_capture = fake_open_capture
+        try:
+            cap, frame, backend = camera.probe_camera(0, [1, 2, 3, 4, 5], 32, 24)
+            time.sleep(0.4)  # Let the slower backends finish
+        finally:
+            camera.open_capture = original
+        assert backend == 3 and cap is captures[3] and frame.shape == (24, 32, 3), backend
+        assert not cap.released, "winning capture was released"
+        assert captures[2].released and captures[4].released, "losing captures were not released"
+        print(f"✓ Probe kept backend {backend} and released {len(captures) - 1} slower captures")
+        return True
+    except Exception as e:
+        print(f"✗ Camera probe test failed: {e}")
+        return False
+
+def test_pipeline():
+    """Test the threaded detection pipeline with a synthetic camera"""
+    print("Testing detection pipeline...")
+    try:
+        import numpy as np
+        from app.config import Config
+        from app.pipeline import DetectionPipeline
+
+        class SyntheticCapture:
+            def read(self):
+                return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+        class StaticDetector:
+            def detect_objects(self, frame):
+                return [{'bbox': [0, 0, 10, 10], 'center': (5, 5), 'confidence': 0.9, 'class_id': 0, 'label': 'person'}]
+
+        pipeline = DetectionPipeline(Config(), StaticDetector(), SyntheticCapture())
+        pipeline.start()
+        result = None
+        for _ in range(50):
+            result = pipeline.get_result(timeout=0.1)
+            if result is not None:
+                break
+        pipeline.stop()
+        assert result is not None, "pipeline produced no results"
+        report = pipeline.report()
+        print(f"✓ Pipeline produced results: {report['inference']['total']} frames inferred")
+        return True
+    except Exception as e:
+        print(f"✗ Pipeline test failed: {e}")
+        return False
+
+def test_process_pool():
+    """Test the process inference pool end to end with a forked stand-in detector"""
+    print("Testing process inference pool...")
+    try:
+        import multiprocessing as mp
+        if "fork" not in mp.get_all_start_methods():
+            print("✓ Process pool test skipped (no fork start method)")
+            return True
+        import os
+        import time
+        import numpy as np
+        from app import process_pool
+        from app.config import Config
+        from app.detections import Detections
+
+        class PixelDetector:
+            """Reports the frame's first pixel and the worker's thread budget"""
+            def detect_objects_array(self, frame):
+                value = int(frame[0, 0, 0])
+                time.sleep(0.02 if value % 3 == 0 else 0.001)  # Finish out of order
+                return Detections([[0, 0, 10, 10]], [value / 255], [0], [os.environ.get("OMP_NUM_THREADS", "")])
+
+        config = Config()
+        config.process_start_method = "fork"
+        config.inference_backend = "onnx"
+        config.inference_threads = 1
+        process_pool._FORK_DETECTOR = PixelDetector()
+        pool = process_pool.ProcessInferencePool(config, workers=2, max_frame_shape=(8, 8, 3))
+        try:
+            pool.start(timeout=30)
+            frames = [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(3 * pool.slot_count)]
+            results = pool.detect_batch_array(frames)
+            values = [round(float(r.confidences[0]) * 255) for r in results]
+            assert values == list(range(len(frames))), f"results out of order: {values}"
+            assert {r.labels[0] for r in results} == {"1"}, "worker thread budget not applied"
+            assert pool._free_slots.qsize() == pool.slot_count, "shared slots not recycled"
+        finally:
+            pool.close()
+            process_pool._FORK_DETECTOR = None
+        assert not pool.processes and pool.block is None, "pool did not shut down cleanly"
+        print(f"✓ Pool returned {len(frames)} ordered results through {pool.slot_count} shared slots")
+        return True
+    except Exception as e:
+        print(f"✗ Process pool test failed: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("Running Visora component tests...\n")
@@ -68,7 +497,20 @@ def main():
         test_config,
         test_vision,
         test_audio,
-        test_navigation
+        test_navigation,
+        test_navigation_analysis,
+        test_detections,
+        test_tracking,
+        test_tracking_lost_objects,
+        test_speech_cache,
+        test_metrics,
+        test_renderer,
+        test_frame_ring,
+        test_latest_frame_camera,
+        test_camera_cache,
+        test_camera_probe,
+        test_pipeline,
+        test_process_pool
     ]
     
     passed = 0